@@ -0,0 +1,115 @@
+"""
+Time Interval Utilities for Voice AI Agent
+Interval indexing and free-slot search for the MCP server's calendar features
+"""
+
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+class IntervalTree:
+    """
+    Augmented interval tree: intervals sorted by start form an implicit balanced BST, and every node
+    records the latest end in its subtree so whole subtrees that finish before a query window are skipped.
+    Changes mark the tree dirty and it is rebuilt on the next query, which suits a cache that changes
+    in sync batches and is read far more often. Queries are O(log n + k).
+    """
+
+    def __init__(self):
+        self._intervals: Dict[Hashable, Tuple[float, float, Any]] = {}
+        self._sorted: List[Tuple[float, float, Any]] = []
+        self._max_end: List[float] = []
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def add(self, key: Hashable, start: float, end: float, value: Any):
+        """Insert or replace the interval stored under key"""
+        self._intervals[key] = (start, max(start, end), value)
+        self._dirty = True
+
+    def remove(self, key: Hashable):
+        if self._intervals.pop(key, None) is not None:
+            self._dirty = True
+
+    def clear(self):
+        self._intervals.clear()
+        self._dirty = True
+
+    def _build(self):
+        self._sorted = sorted(self._intervals.values(), key=lambda interval: (interval[0], interval[1]))
+        self._max_end = [0.0] * len(self._sorted)
+
+        def build(lo: int, hi: int) -> float:
+            if lo >= hi:
+                return float("-inf")
+            mid = (lo + hi) // 2
+            self._max_end[mid] = max(self._sorted[mid][1], build(lo, mid), build(mid + 1, hi))
+            return self._max_end[mid]
+
+        build(0, len(self._sorted))
+        self._dirty = False
+
+    def overlapping(self, start: float, end: float) -> List[Tuple[float, float, Any]]:
+        """(start, end, value) of every interval overlapping [start, end), ordered by start"""
+        if self._dirty:
+            self._build()
+        found = []
+
+        def visit(lo: int, hi: int):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < start:
+                return
+            visit(lo, mid)
+            interval_start, interval_end, _ = self._sorted[mid]
+            if interval_start < end:
+                # Zero-length intervals (reminders) count when they fall inside the window
+                if interval_end > start or interval_start >= start:
+                    found.append(self._sorted[mid])
+                visit(mid + 1, hi)
+
+        visit(0, len(self._sorted))
+        return found
+
+def find_free_slots(busy: Iterable[Tuple[float, float]], open_windows: Iterable[Tuple[float, float]],
+                    duration: float, count: int, granularity: float = 900) -> List[Tuple[float, float]]:
+    """
+    Sweep line over open windows (e.g. working hours) and busy intervals, in epoch seconds.
+    Time is free while some open window covers it and no busy interval does. Returns up to `count`
+    non-overlapping (start, end) slots of `duration` seconds starting on multiples of `granularity`,
+    earliest first.
+    """
+    OPEN, BUSY = 0, 1
+    boundaries = []
+    for layer, intervals in ((OPEN, open_windows), (BUSY, busy)):
+        for start, end in intervals:
+            if end > start:
+                boundaries.append((start, layer, 1))
+                boundaries.append((end, layer, -1))
+    boundaries.sort()
+
+    step = math.ceil(duration / granularity) * granularity
+    depth = [0, 0]
+    free_since = None
+    slots = []
+    i = 0
+    while i < len(boundaries) and len(slots) < count:
+        now = boundaries[i][0]
+        while i < len(boundaries) and boundaries[i][0] == now:
+            _, layer, delta = boundaries[i]
+            depth[layer] += delta
+            i += 1
+
+        free = depth[OPEN] > 0 and depth[BUSY] == 0
+        if free and free_since is None:
+            free_since = now
+        elif not free and free_since is not None:
+            slot_start = math.ceil(free_since / granularity) * granularity
+            while slot_start + duration <= now and len(slots) < count:
+                slots.append((slot_start, slot_start + duration))
+                slot_start += step
+            free_since = None
+
+    return slots
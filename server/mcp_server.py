@@ -5,19 +5,32 @@ Combines Gmail, Calendar, People, and YouTube APIs with Google OAuth2 authentica
 No mock data - Real Google services only
 """
 
+import io
 import os
+import html
 import json
+import time
+import uuid
+import random
+import hashlib
+import tempfile
+import sqlite3
+import heapq
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+import threading
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Tuple
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from google.auth.transport.requests import Request as GoogleRequest
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+from intervals import IntervalTree, find_free_slots
+from name_index import NameIndex
+from text_index import BM25Index, snippet, tokenize
+from semantic_index import EMBEDDINGS_AVAILABLE, LocalEmbedder, VectorMatrix
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -92,22 +105,89 @@ CLIENT_SECRETS = {
 
 TOKEN_FILE = os.path.join(os.path.dirname(__file__), 'mcp_token.json')
 
+# Access tokens are renewed in the background this many seconds before they expire
+TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+TOKEN_CHECK_INTERVAL = float(os.getenv("TOKEN_CHECK_INTERVAL", "30"))
+
+# Discovery documents fetched from Google (only for APIs googleapiclient does not bundle) are cached here
+DISCOVERY_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'discovery_cache')
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/{api}/{version}/rest"
+
+class GoogleClientRegistry:
+    """
+    Builds each Google API client once from a local discovery document and reuses it across requests.
+    A client is rebuilt only when it is asked for with a different credentials object.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._documents = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._builds = 0
+
+    def discovery_document(self, api: str, version: str) -> str:
+        """On-disk cache first, then googleapiclient's bundled copy, then a one-time fetch"""
+        key = (api, version)
+        if key not in self._documents:
+            path = os.path.join(self.cache_dir, f"{api}.{version}.json")
+            document = None
+            if os.path.exists(path):
+                with open(path, 'r') as document_file:
+                    document = document_file.read()
+            if document is None:
+                from googleapiclient.discovery_cache import get_static_doc
+                document = get_static_doc(api, version)
+            if document is None:
+                logger.info(f"Fetching {api} {version} discovery document (cached at {path})")
+                with urllib.request.urlopen(DISCOVERY_URL.format(api=api, version=version), timeout=10) as response:
+                    document = response.read().decode('utf-8')
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(path, 'w') as document_file:
+                    document_file.write(document)
+            self._documents[key] = document
+        return self._documents[key]
+
+    def get(self, api: str, version: str, credentials):
+        """Client for api/version bound to credentials"""
+        with self._lock:
+            cached = self._clients.get((api, version))
+            if cached and cached[0] is credentials:
+                return cached[1]
+
+            from googleapiclient.discovery import build_from_document
+            client = build_from_document(self.discovery_document(api, version), credentials=credentials)
+            self._clients[(api, version)] = (credentials, client)
+            self._builds += 1
+            logger.info(f"Built {api} {version} client")
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": [f"{api}/{version}" for api, version in self._clients],
+                "documents": [f"{api}/{version}" for api, version in self._documents],
+                "builds": self._builds
+            }
+
+google_clients = GoogleClientRegistry(DISCOVERY_CACHE_DIR)
+
 class GoogleServiceManager:
     """Manages Google API services with unified authentication"""
     
     def __init__(self):
         self._credentials = None
-        self._gmail_service = None
-        self._calendar_service = None
-        self._people_service = None
-        self._youtube_service = None
-        self._drive_service = None
+        self._authenticated = False
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = None
+        self._refresh_failures = 0
         self._load_credentials()
     
     def _load_credentials(self):
         """Load and refresh credentials if available"""
         if os.path.exists(TOKEN_FILE):
             try:
+                from google.oauth2.credentials import Credentials
                 logger.info(f"Loading credentials from {TOKEN_FILE}")
                 with open(TOKEN_FILE, 'r') as token_file:
                     creds_data = json.load(token_file)
@@ -115,154 +195,138 @@ class GoogleServiceManager:
                 
                 logger.info("Credentials loaded successfully")
                 
-                # Refresh if expired
-                if self._credentials and self._credentials.expired and self._credentials.refresh_token:
+                # Refresh if expired (or about to)
+                if self.needs_refresh():
                     logger.info("Credentials expired, refreshing...")
-                    self._credentials.refresh(GoogleRequest())
-                    self._save_credentials()
-                    logger.info("Credentials refreshed and saved")
-                elif self._credentials and self._credentials.valid:
+                    self.refresh()
+                elif self._credentials.valid:
+                    self._authenticated = True
                     logger.info("Credentials are valid and ready to use")
                     
             except Exception as e:
                 logger.error(f"Error loading credentials: {e}")
                 self._credentials = None
+                self._authenticated = False
         else:
             logger.info(f"No token file found at {TOKEN_FILE}")
     
     def _save_credentials(self):
-        """Save credentials to file"""
+        """Save credentials to file atomically (write a temp file, then rename over the old one)"""
         if self._credentials:
             try:
-                with open(TOKEN_FILE, 'w') as token_file:
-                    json.dump({
-                        'token': self._credentials.token,
-                        'refresh_token': self._credentials.refresh_token,
-                        'token_uri': self._credentials.token_uri,
-                        'client_id': self._credentials.client_id,
-                        'client_secret': self._credentials.client_secret,
-                        'scopes': self._credentials.scopes
-                    }, token_file)
+                token_dir = os.path.dirname(os.path.abspath(TOKEN_FILE))
+                fd, temp_path = tempfile.mkstemp(dir=token_dir, prefix='.mcp_token.', suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'w') as token_file:
+                        json.dump({
+                            'token': self._credentials.token,
+                            'refresh_token': self._credentials.refresh_token,
+                            'token_uri': self._credentials.token_uri,
+                            'client_id': self._credentials.client_id,
+                            'client_secret': self._credentials.client_secret,
+                            'scopes': self._credentials.scopes,
+                            'expiry': self._credentials.expiry.isoformat() if self._credentials.expiry else None
+                        }, token_file)
+                        token_file.flush()
+                        os.fsync(token_file.fileno())
+                    os.replace(temp_path, TOKEN_FILE)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
             except Exception as e:
                 logger.error(f"Error saving credentials: {e}")
     
+    def seconds_until_expiry(self) -> Optional[float]:
+        """Seconds before the access token expires, or None if its expiry is unknown"""
+        if not self._credentials or not self._credentials.expiry:
+            return None
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (self._credentials.expiry - now).total_seconds()
+    
+    def needs_refresh(self) -> bool:
+        """True when the token is expired or will expire within TOKEN_REFRESH_MARGIN"""
+        if not self._credentials or not self._credentials.refresh_token:
+            return False
+        remaining = self.seconds_until_expiry()
+        return not self._credentials.token or (remaining is not None and remaining < TOKEN_REFRESH_MARGIN)
+    
+    def refresh(self) -> bool:
+        """
+        Refresh the access token. Single-flight: concurrent callers wait for the refresh in progress
+        and then reuse its result instead of starting another one.
+        """
+        with self._refresh_lock:
+            if not self.needs_refresh():
+                self._expire_unrefreshable()
+                return self._authenticated
+            try:
+                from google.auth.transport.requests import Request as GoogleRequest
+                self._credentials.refresh(GoogleRequest())
+                self._save_credentials()
+                self._authenticated = True
+                self._last_refresh = time.time()
+                self._refresh_failures = 0
+                logger.info("Credentials refreshed successfully")
+            except Exception as refresh_error:
+                self._refresh_failures += 1
+                self._authenticated = bool(self._credentials.valid)
+                logger.error(f"Failed to refresh credentials: {refresh_error}")
+            return self._authenticated
+    
+    def _expire_unrefreshable(self):
+        """Drop the authenticated flag once a token that cannot be refreshed has expired"""
+        if self._authenticated and self._credentials.expired and not self._credentials.refresh_token:
+            logger.warning("Credentials expired and no refresh token is available - re-authentication required")
+            self._authenticated = False
+    
     def is_authenticated(self) -> bool:
-        """Check if user is authenticated"""
+        """Check if user is authenticated (a cached flag; the token refresher keeps it current)"""
+        self._expire_unrefreshable()
+        return self._authenticated
+    
+    def token_status(self) -> Dict[str, Any]:
+        remaining = self.seconds_until_expiry()
+        return {
+            "authenticated": self._authenticated,
+            "expires_in_seconds": round(remaining) if remaining is not None else None,
+            "last_refresh": datetime.fromtimestamp(self._last_refresh).isoformat() if self._last_refresh else None,
+            "refresh_failures": self._refresh_failures
+        }
+    
+    def _get_service(self, api: str, version: str):
+        """Get a client for an API, built once and reused until the credentials change"""
+        if not self.is_authenticated():
+            return None
+        
         try:
-            if not self._credentials:
-                logger.debug("No credentials found")
-                return False
-                
-            # Check if credentials are valid
-            if self._credentials.valid:
-                logger.debug("Credentials are valid")
-                return True
-                
-            # Try to refresh if expired but have refresh token
-            if self._credentials.expired and self._credentials.refresh_token:
-                logger.info("Credentials expired, attempting refresh...")
-                try:
-                    self._credentials.refresh(GoogleRequest())
-                    self._save_credentials()
-                    logger.info("Credentials refreshed successfully")
-                    return True
-                except Exception as refresh_error:
-                    logger.error(f"Failed to refresh credentials: {refresh_error}")
-                    return False
-            
-            logger.warning("Credentials exist but are invalid and cannot be refreshed")
-            return False
-            
+            return google_clients.get(api, version, self._credentials)
         except Exception as e:
-            logger.error(f"Error checking credential validity: {e}")
-            return False
+            logger.error(f"Error building {api} service: {e}")
+            return None
     
     def get_gmail_service(self):
         """Get Gmail service instance"""
-        if not self.is_authenticated():
-            return None
-        
-        if not self._gmail_service:
-            try:
-                self._gmail_service = build('gmail', 'v1', credentials=self._credentials)
-            except Exception as e:
-                logger.error(f"Error building Gmail service: {e}")
-                return None
-        
-        return self._gmail_service
+        return self._get_service('gmail', 'v1')
     
     def get_calendar_service(self):
         """Get Calendar service instance"""
-        if not self.is_authenticated():
-            return None
-        
-        if not self._calendar_service:
-            try:
-                self._calendar_service = build('calendar', 'v3', credentials=self._credentials)
-            except Exception as e:
-                logger.error(f"Error building Calendar service: {e}")
-                return None
-        
-        return self._calendar_service
+        return self._get_service('calendar', 'v3')
     
     def get_people_service(self):
         """Get People API service instance"""
-        if not self.is_authenticated():
-            return None
-        
-        if not self._people_service:
-            try:
-                self._people_service = build('people', 'v1', credentials=self._credentials)
-            except Exception as e:
-                logger.error(f"Error building People service: {e}")
-                return None
-        
-        return self._people_service
+        return self._get_service('people', 'v1')
     
     def get_youtube_service(self):
         """Get YouTube Data API service instance"""
-        if not self.is_authenticated():
-            return None
-        
-        if not self._youtube_service:
-            try:
-                self._youtube_service = build('youtube', 'v3', credentials=self._credentials)
-            except Exception as e:
-                logger.error(f"Error building YouTube service: {e}")
-                return None
-        
-        return self._youtube_service
+        return self._get_service('youtube', 'v3')
     
     def get_drive_service(self):
         """Get Google Drive API service instance"""
-        if not self.is_authenticated():
-            return None
-        
-        if not self._drive_service:
-            try:
-                self._drive_service = build('drive', 'v3', credentials=self._credentials)
-            except Exception as e:
-                logger.error(f"Error building Drive service: {e}")
-                return None
-        
-        return self._drive_service
+        return self._get_service('drive', 'v3')
     
     def get_docs_service(self):
         """Get Google Docs API service instance"""
-        if not self.is_authenticated():
-            return None
-        
-        if not hasattr(self, '_docs_service'):
-            self._docs_service = None
-            
-        if not self._docs_service:
-            try:
-                self._docs_service = build('docs', 'v1', credentials=self._credentials)
-            except Exception as e:
-                logger.error(f"Error building Docs service: {e}")
-                return None
-        
-        return self._docs_service
+        return self._get_service('docs', 'v1')
     
     def get_credentials(self):
         """Get current credentials"""
@@ -270,16 +334,293 @@ class GoogleServiceManager:
     
     def set_credentials(self, credentials):
         """Set new credentials"""
-        self._credentials = credentials
-        self._gmail_service = None
-        self._calendar_service = None
-        self._people_service = None
-        self._youtube_service = None
-        self._save_credentials()
+        with self._refresh_lock:
+            self._credentials = credentials
+            self._authenticated = bool(credentials and credentials.valid)
+            self._save_credentials()
 
 # Global service manager
 service_manager = GoogleServiceManager()
 
+# Google API calls run on a bounded thread pool; each service gets its own concurrency limit
+GOOGLE_MAX_WORKERS = int(os.getenv("GOOGLE_MAX_WORKERS", "16"))
+GOOGLE_CALL_TIMEOUT = float(os.getenv("GOOGLE_CALL_TIMEOUT", "20"))
+GOOGLE_SERVICE_LIMITS = {
+    name: int(os.getenv(f"GOOGLE_LIMIT_{name.upper()}", default))
+    for name, default in {"gmail": 4, "calendar": 4, "people": 4, "youtube": 2, "drive": 4, "docs": 4}.items()
+}
+
+class GoogleCallExecutor:
+    """
+    Runs blocking googleapiclient calls off the event loop.
+    httplib2 is not thread-safe, so every worker thread executes requests over its own authorized transport.
+    """
+
+    def __init__(self, credentials_provider: Callable, max_workers: int, limits: Dict[str, int], timeout: float):
+        self._credentials_provider = credentials_provider
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="google-api")
+        self._local = threading.local()
+        self._limits = {name: asyncio.Semaphore(limit) for name, limit in limits.items()}
+        self._in_flight = {name: 0 for name in limits}
+        self._timeouts = {name: 0 for name in limits}
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def _http(self):
+        """This thread's transport, rebuilt when the credentials object changes"""
+        credentials = self._credentials_provider()
+        if getattr(self._local, "http", None) is None or self._local.credentials is not credentials:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            self._local.http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=self.timeout))
+            self._local.credentials = credentials
+        return self._local.http
+
+    def execute_sync(self, request):
+        """Execute an HttpRequest or BatchHttpRequest; only call this from a pool thread"""
+        return request.execute(http=self._http())
+
+    async def run(self, service: str, fn: Callable, *args, timeout: Optional[float] = None):
+        """Run a blocking function that makes calls to `service` on the pool"""
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        limit = self._limits[service]
+        await limit.acquire()
+        self._in_flight[service] += 1
+
+        def release():
+            self._in_flight[service] -= 1
+            limit.release()
+
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            release()
+            raise
+        def on_done(_):
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                pass  # the event loop has shut down; nothing is left waiting on the slot
+
+        # A timed-out call keeps running on its thread, so its slot is only returned once the thread is done
+        future.add_done_callback(on_done)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._timeouts[service] += 1
+            raise TimeoutError(f"Google {service} call timed out after {timeout:g}s")
+
+    async def execute(self, service: str, request):
+        """Execute a single googleapiclient request without blocking the event loop"""
+        return await self.run(service, self.execute_sync, request)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "timeout_seconds": self.timeout,
+            "limits": {name: semaphore._value + self._in_flight[name] for name, semaphore in self._limits.items()},
+            "in_flight": dict(self._in_flight),
+            "timeouts": dict(self._timeouts)
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+google_calls = GoogleCallExecutor(service_manager.get_credentials, GOOGLE_MAX_WORKERS,
+                                  GOOGLE_SERVICE_LIMITS, GOOGLE_CALL_TIMEOUT)
+
+# Mutating calls (event creates, note creates, list writes) are journaled and run by a background worker
+JOBS_DB = os.path.join(os.path.dirname(__file__), 'mcp_jobs.db')
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "8"))
+JOB_RETRY_BASE = float(os.getenv("JOB_RETRY_BASE", "2"))
+JOB_RETRY_MAX = float(os.getenv("JOB_RETRY_MAX", "300"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))
+# Longest a request may hold on to a job waiting for its outcome
+JOB_MAX_WAIT = 60
+
+class PermanentJobError(Exception):
+    """Raised by (or for) a job that would fail the same way on every attempt"""
+
+def is_permanent_error(e: Exception) -> bool:
+    """Client errors will fail the same way again; auth, rate-limit and timeout errors are worth retrying"""
+    if isinstance(e, PermanentJobError):
+        return True
+    status = getattr(getattr(e, 'resp', None), 'status', None)
+    return status is not None and 400 <= int(status) < 500 and int(status) not in (401, 403, 408, 429)
+
+class WriteQueue:
+    """
+    Durable write-behind job journal in SQLite (WAL). Each job carries an idempotency key: submitting a
+    key that is already journaled returns the existing job instead of running the write twice.
+    Workers run due jobs and reschedule failures with exponential backoff and jitter until
+    max_attempts; jobs left running by a crash are queued again on startup.
+    """
+
+    def __init__(self, db_path: str, workers: int, max_attempts: int, retry_base: float, retry_max: float):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, kind TEXT, payload TEXT,
+                status TEXT, attempts INTEGER, next_attempt REAL, result TEXT, error TEXT,
+                created REAL, updated REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_attempt);
+        """)
+        self._db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        self._db.commit()
+        self._handlers: Dict[str, Callable] = {}
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, kind: str, handler: Callable):
+        """handler(payload, job) is awaited to run a job of this kind and returns its result"""
+        self._handlers[kind] = handler
+
+    def _job(self, row) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._job(self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def submit(self, kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None,
+               delay: float = 0.0) -> Dict[str, Any]:
+        """Journal a job to run after `delay` seconds; an already known idempotency key returns that job"""
+        if idempotency_key:
+            existing = self._db.execute("SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            if existing is not None:
+                return self._job(existing)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO jobs (id, idempotency_key, kind, payload, status, attempts, next_attempt, created, updated) "
+            "VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?)",
+            (job_id, idempotency_key or job_id, kind, json.dumps(payload), now + delay, now, now)
+        )
+        self._db.commit()
+        if self._wakeup:
+            self._wakeup.set()
+        return self.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """The job once it has succeeded or failed, or as it stands after `timeout` seconds"""
+        job = self.get(job_id)
+        if job is None or job["status"] in ("succeeded", "failed") or timeout <= 0:
+            return job
+        event = self._waiters.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get(job_id)
+
+    def recent(self, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created DESC LIMIT ?", (status, limit))
+        else:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+        return [self._job(row) for row in rows]
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        row = self._db.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' AND next_attempt <= ? ORDER BY next_attempt LIMIT 1",
+            (time.time(),)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?", (time.time(), row["id"]))
+        self._db.commit()
+        return self._job(row)
+
+    def _next_due_in(self) -> Optional[float]:
+        next_attempt = self._db.execute(
+            "SELECT MIN(next_attempt) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return None if next_attempt is None else max(0.0, next_attempt - time.time())
+
+    async def _run(self, job: Dict[str, Any]):
+        attempts = job["attempts"] + 1
+        try:
+            handler = self._handlers.get(job["kind"])
+            if handler is None:
+                raise PermanentJobError(f"No handler for job kind '{job['kind']}'")
+            result = await handler(job["payload"], job)
+            self._db.execute(
+                "UPDATE jobs SET status = 'succeeded', attempts = ?, result = ?, error = NULL, updated = ? WHERE id = ?",
+                (attempts, json.dumps(result), time.time(), job["id"])
+            )
+            logger.info(f"✅ Job {job['kind']} {job['id'][:8]} succeeded (attempt {attempts})")
+        except Exception as e:
+            if is_permanent_error(e) or attempts >= self.max_attempts:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', attempts = ?, error = ?, updated = ? WHERE id = ?",
+                    (attempts, str(e), time.time(), job["id"])
+                )
+                logger.error(f"❌ Job {job['kind']} {job['id'][:8]} failed after {attempts} attempts: {e}")
+            else:
+                backoff = min(self.retry_max, self.retry_base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+                self._db.execute(
+                    "UPDATE jobs SET status = 'queued', attempts = ?, next_attempt = ?, error = ?, updated = ? WHERE id = ?",
+                    (attempts, time.time() + backoff, str(e), time.time(), job["id"])
+                )
+                logger.warning(f"⚠️ Job {job['kind']} {job['id'][:8]} attempt {attempts} failed, retrying in {backoff:.1f}s: {e}")
+        self._db.commit()
+
+        if self.get(job["id"])["status"] != "queued" and job["id"] in self._waiters:
+            self._waiters.pop(job["id"]).set()
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            job = self._claim()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._next_due_in())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    def prune(self, older_than: float):
+        """Forget finished jobs (and their idempotency keys) older than `older_than` seconds"""
+        self._db.execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated < ?", (time.time() - older_than,))
+        self._db.commit()
+
+    def start(self) -> List[asyncio.Task]:
+        self._wakeup = asyncio.Event()
+        return [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stats(self) -> Dict[str, Any]:
+        counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"workers": self.workers, "max_attempts": self.max_attempts, **counts}
+
+write_queue = WriteQueue(JOBS_DB, JOB_WORKERS, JOB_MAX_ATTEMPTS, JOB_RETRY_BASE, JOB_RETRY_MAX)
+
+async def job_response(job: Dict[str, Any], wait: float) -> Dict[str, Any]:
+    """Acknowledge a write job, optionally waiting up to `wait` seconds for its outcome"""
+    job = await write_queue.wait(job["id"], min(wait, JOB_MAX_WAIT))
+    return {
+        "success": job["status"] != "failed",
+        "queued": job["status"] in ("queued", "running"),
+        "job_id": job["id"],
+        "job_status": job["status"],
+        "result": job["result"],
+        "error": job["error"] if job["status"] == "failed" else None
+    }
+
 # ============================================================================
 # AUTHENTICATION ENDPOINTS
 # ============================================================================
@@ -292,6 +633,12 @@ async def health_check():
         "services": ["gmail", "calendar", "contacts", "youtube"],
         "port": 8080,
         "authenticated": service_manager.is_authenticated(),
+        "token": service_manager.token_status(),
+        "google_calls": google_calls.stats(),
+        "google_clients": google_clients.stats(),
+        "lists": list_store.stats(),
+        "jobs": write_queue.stats(),
+        "semantic_index": semantic_index.stats(),
         "version": "1.0.0"
     }
 
@@ -299,6 +646,7 @@ async def health_check():
 async def login():
     """Initiate Google OAuth2 login for all services"""
     try:
+        from google_auth_oauthlib.flow import Flow
         flow = Flow.from_client_config(
             CLIENT_SECRETS,
             scopes=ALL_SCOPES,
@@ -333,6 +681,7 @@ async def auth_callback(code: str = None, state: str = None, error: str = None):
             raise HTTPException(status_code=400, detail="No authorization code received")
         
         # Create flow with flexible scope handling
+        from google_auth_oauthlib.flow import Flow
         flow = Flow.from_client_config(
             CLIENT_SECRETS,
             scopes=ALL_SCOPES,
@@ -419,10 +768,382 @@ async def auth_status():
 # GMAIL ENDPOINTS
 # ============================================================================
 
+# Gmail batch requests: one HTTP round-trip per GMAIL_BATCH_SIZE messages (Gmail allows up to 100,
+# but recommends staying at or below 50 to avoid per-user rate limiting inside a batch)
+GMAIL_BATCH_SIZE = max(1, min(int(os.getenv("GMAIL_BATCH_SIZE", "50")), 100))
+GMAIL_MAX_COUNT = int(os.getenv("GMAIL_MAX_COUNT", "500"))
+GMAIL_METADATA_HEADERS = ['From', 'Subject', 'Date']
+
+def list_message_ids(gmail_service, label_ids: List[str], count: int) -> List[str]:
+    """List up to `count` message IDs for the given labels, following nextPageToken"""
+    message_ids = []
+    page_token = None
+    while len(message_ids) < count:
+        results = google_calls.execute_sync(gmail_service.users().messages().list(
+            userId='me',
+            labelIds=label_ids,
+            maxResults=min(count - len(message_ids), 500),
+            pageToken=page_token
+        ))
+        message_ids.extend(msg['id'] for msg in results.get('messages', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+    return message_ids[:count]
+
+def fetch_message_metadata(gmail_service, message_ids: List[str]) -> Dict[str, Any]:
+    """
+    Fetch metadata for many messages with Gmail batch requests.
+    Returns {"messages": [...] in the order of message_ids, "failed": [{"id", "error"}]}.
+    Messages that fail inside a batch are retried once in a follow-up batch.
+    """
+    fetched = {}
+    errors = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = str(exception)
+        else:
+            fetched[request_id] = response
+            errors.pop(request_id, None)
+
+    pending = list(message_ids)
+    for attempt in range(2):
+        for start in range(0, len(pending), GMAIL_BATCH_SIZE):
+            batch = gmail_service.new_batch_http_request(callback=on_response)
+            for message_id in pending[start:start + GMAIL_BATCH_SIZE]:
+                batch.add(
+                    gmail_service.users().messages().get(
+                        userId='me',
+                        id=message_id,
+                        format='metadata',
+                        metadataHeaders=GMAIL_METADATA_HEADERS
+                    ),
+                    request_id=message_id
+                )
+            google_calls.execute_sync(batch)
+
+        pending = [message_id for message_id in pending if message_id in errors]
+        if not pending:
+            break
+        logger.warning(f"{len(pending)} Gmail messages failed in batch (attempt {attempt + 1})")
+
+    return {
+        "messages": [fetched[message_id] for message_id in message_ids if message_id in fetched],
+        "failed": [{"id": message_id, "error": errors[message_id]} for message_id in pending]
+    }
+
+def format_email(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a metadata-format Gmail message into the shape the endpoints return"""
+    headers = message.get('payload', {}).get('headers', [])
+    return {
+        "id": message['id'],
+        "thread_id": message['threadId'],
+        "subject": next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject'),
+        "sender": next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown'),
+        "date": next((h['value'] for h in headers if h['name'] == 'Date'), ''),
+        "snippet": message.get('snippet', ''),
+        "unread": 'UNREAD' in message.get('labelIds', [])
+    }
+
+# Local mailbox mirror
+MAILBOX_DB = os.path.join(os.path.dirname(__file__), 'mcp_mailbox.db')
+GMAIL_SYNC_INTERVAL = float(os.getenv("GMAIL_SYNC_INTERVAL", "60"))
+GMAIL_MIRROR_SEED = int(os.getenv("GMAIL_MIRROR_SEED", "200"))
+# Unread inbox messages are seeded in full (up to this many) so /gmail/unread never misses older unread mail
+GMAIL_MIRROR_UNREAD_MAX = int(os.getenv("GMAIL_MIRROR_UNREAD_MAX", "2000"))
+# Seeding runs one page of message IDs at a time and stops after this many seconds per sync, resuming next sync
+GMAIL_SEED_STEP_SECONDS = float(os.getenv("GMAIL_SEED_STEP_SECONDS", "15"))
+GMAIL_SEED_PAGE_SIZE = 100
+
+# The label sets the endpoints query and how many messages of each are seeded; a query for more than the
+# mirror can vouch for (see covers()) is answered live
+MIRROR_SEEDS = {
+    "INBOX": (['INBOX'], GMAIL_MIRROR_SEED),
+    "INBOX+UNREAD": (['INBOX', 'UNREAD'], GMAIL_MIRROR_UNREAD_MAX),
+}
+
+class MailboxMirror:
+    """
+    Local SQLite copy of Gmail message metadata, labels and snippets.
+    Seeded once from the inbox, then kept current with users.history.list from the stored historyId.
+    The seed runs a page at a time with its position saved in meta, so an interrupted seed resumes.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS messages (
+                id TEXT PRIMARY KEY,
+                thread_id TEXT,
+                subject TEXT,
+                sender TEXT,
+                date TEXT,
+                snippet TEXT,
+                internal_date INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS messages_by_date ON messages (internal_date DESC);
+            CREATE TABLE IF NOT EXISTS message_labels (
+                label TEXT,
+                message_id TEXT,
+                PRIMARY KEY (label, message_id)
+            );
+            CREATE INDEX IF NOT EXISTS labels_by_message ON message_labels (message_id);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self._get_meta("history_id") is not None
+
+    def _store(self, messages: List[Dict[str, Any]]):
+        for message in messages:
+            email = format_email(message)
+            self._db.execute(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (email["id"], email["thread_id"], email["subject"], email["sender"], email["date"],
+                 email["snippet"], int(message.get("internalDate", 0)))
+            )
+            self._set_labels(message["id"], message.get("labelIds", []))
+
+    def _set_labels(self, message_id: str, label_ids: List[str]):
+        self._db.execute("DELETE FROM message_labels WHERE message_id = ?", (message_id,))
+        self._db.executemany(
+            "INSERT INTO message_labels (label, message_id) VALUES (?, ?)",
+            [(label, message_id) for label in label_ids]
+        )
+
+    def _delete(self, message_id: str):
+        self._db.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+        self._db.execute("DELETE FROM message_labels WHERE message_id = ?", (message_id,))
+
+    def _has(self, message_id: str) -> bool:
+        return self._db.execute("SELECT 1 FROM messages WHERE id = ?", (message_id,)).fetchone() is not None
+
+    def _start_seed(self, gmail_service):
+        """Empty the mirror and record where a fresh seed starts"""
+        # Take the history cursor first so nothing that arrives while seeding is missed
+        history_id = google_calls.execute_sync(gmail_service.users().getProfile(userId='me'))['historyId']
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM messages")
+            self._db.execute("DELETE FROM message_labels")
+            self._db.execute("DELETE FROM meta WHERE key IN ('history_id', 'complete_labels', 'seeded_depths') OR key LIKE 'seed\\_%' ESCAPE '\\'")
+            self._set_meta("seed_history_id", str(history_id))
+            self._set_meta("seed_stage", next(iter(MIRROR_SEEDS)))
+            self._set_meta("seed_listed", "0")
+            self._set_meta("seed_complete", "")
+        logger.info("📬 Seeding mailbox mirror")
+
+    def _seed_page(self, gmail_service) -> bool:
+        """Seed one page of the current stage; returns True once the seed is finished"""
+        with self._lock:
+            meta = dict(self._db.execute("SELECT key, value FROM meta WHERE key LIKE 'seed\\_%' ESCAPE '\\'").fetchall())
+        stages = list(MIRROR_SEEDS)
+        stage = meta["seed_stage"]
+        label_ids, depth = MIRROR_SEEDS[stage]
+        listed = int(meta["seed_listed"])
+        complete = [name for name in meta["seed_complete"].split(",") if name]
+
+        queried = listed < depth
+        results = google_calls.execute_sync(gmail_service.users().messages().list(
+            userId='me',
+            labelIds=label_ids,
+            maxResults=min(GMAIL_SEED_PAGE_SIZE, depth - listed),
+            pageToken=meta.get("seed_page_token") or None
+        )) if queried else {}
+        page_ids = [message['id'] for message in results.get('messages', [])]
+        with self._lock:
+            new_ids = [message_id for message_id in page_ids if not self._has(message_id)]
+        fetched = fetch_message_metadata(gmail_service, new_ids) if new_ids else {"messages": [], "failed": []}
+        listed += len(page_ids)
+        page_token = results.get('nextPageToken')
+
+        with self._lock, self._db:
+            self._store(fetched["messages"])
+            if fetched["failed"]:
+                # Missing messages mean the mirror can no longer vouch for short answers; those go live instead
+                logger.warning(f"📬 {len(fetched['failed'])} messages failed to fetch while seeding the mailbox mirror")
+                self._set_meta("seed_failed", "1")
+            if page_token and listed < depth:
+                self._set_meta("seed_page_token", page_token)
+                self._set_meta("seed_listed", str(listed))
+                return False
+            if queried and not page_token:
+                # Every message with these labels was listed, so there are no older ones to miss
+                complete.append(stage)
+            self._set_meta("seed_complete", ",".join(complete))
+            self._db.execute("DELETE FROM meta WHERE key = 'seed_page_token'")
+            if stages.index(stage) + 1 < len(stages):
+                self._set_meta("seed_stage", stages[stages.index(stage) + 1])
+                self._set_meta("seed_listed", "0")
+                return False
+
+            failed = self._get_meta("seed_failed") is not None
+            self._set_meta("complete_labels", "" if failed else ",".join(complete))
+            self._set_meta("seeded_depths", json.dumps({name: depth for name, (_, depth) in MIRROR_SEEDS.items()}))
+            self._set_meta("history_id", meta["seed_history_id"])
+            self._set_meta("last_sync", str(time.time()))
+            self._db.execute("DELETE FROM meta WHERE key LIKE 'seed\\_%' ESCAPE '\\'")
+            count = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        logger.info(f"📬 Mailbox mirror seeded with {count} messages")
+        return True
+
+    def seed(self, gmail_service, restart: bool = False):
+        """
+        Build the mirror from the most recent inbox messages plus every unread inbox message, resuming a
+        seed in progress. Stops after GMAIL_SEED_STEP_SECONDS; the next sync carries on from the saved page.
+        """
+        with self._lock:
+            in_progress = self._get_meta("seed_stage") is not None
+        if restart or not in_progress:
+            self._start_seed(gmail_service)
+        deadline = time.monotonic() + GMAIL_SEED_STEP_SECONDS
+        while not self._seed_page(gmail_service):
+            if time.monotonic() >= deadline:
+                with self._lock:
+                    logger.info(f"📬 Mailbox mirror seed paused at {self._get_meta('seed_stage')} "
+                                f"({self._get_meta('seed_listed')} listed); resuming next sync")
+                return
+
+    def covers(self, label_ids: List[str], count: int, found: int) -> bool:
+        """
+        Whether a mirror query that found `found` of `count` messages is the full answer: either the seed
+        listed every message with these labels (so there are no older ones to miss), or it found them all
+        within the most recent messages the seed took for these labels (deeper, the mirror has gaps)
+        """
+        name = "+".join(label_ids)
+        with self._lock:
+            complete = (self._get_meta("complete_labels") or "").split(",")
+            depths = json.loads(self._get_meta("seeded_depths") or "{}")
+        return name in complete or (found >= count and count <= depths.get(name, 0))
+
+    def sync(self, gmail_service):
+        """Apply changes since the stored historyId (or continue seeding); one sync or seed runs at a time"""
+        with self._sync_lock:
+            self._sync(gmail_service)
+
+    def _sync(self, gmail_service):
+        """Apply changes since the stored historyId, reseeding if Gmail no longer has that history"""
+        with self._lock:
+            start_history_id = self._get_meta("history_id")
+        if start_history_id is None:
+            self.seed(gmail_service)
+            return
+
+        added, deleted, relabeled = set(), set(), {}
+        history_id = start_history_id
+        page_token = None
+        try:
+            while True:
+                response = google_calls.execute_sync(gmail_service.users().history().list(
+                    userId='me',
+                    startHistoryId=start_history_id,
+                    historyTypes=['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved'],
+                    pageToken=page_token
+                ))
+                for record in response.get('history', []):
+                    for item in record.get('messagesAdded', []):
+                        added.add(item['message']['id'])
+                        deleted.discard(item['message']['id'])
+                    for item in record.get('messagesDeleted', []):
+                        deleted.add(item['message']['id'])
+                        added.discard(item['message']['id'])
+                    for item in record.get('labelsAdded', []) + record.get('labelsRemoved', []):
+                        relabeled[item['message']['id']] = item['message'].get('labelIds', [])
+                history_id = response.get('historyId', history_id)
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+        except Exception as e:
+            if getattr(getattr(e, 'resp', None), 'status', None) == 404:
+                logger.warning("Gmail history expired, reseeding mailbox mirror")
+                self.seed(gmail_service, restart=True)
+                return
+            raise
+
+        # Messages relabeled into view (e.g. moved back to the inbox) that the mirror never held need fetching too
+        with self._lock:
+            unknown = {message_id for message_id in relabeled
+                       if message_id not in deleted and not self._has(message_id)}
+        to_fetch = sorted(added | unknown)
+        fetched = fetch_message_metadata(gmail_service, to_fetch) if to_fetch else {"messages": [], "failed": []}
+        with self._lock, self._db:
+            self._store(fetched["messages"])
+            for message_id in deleted:
+                self._delete(message_id)
+            for message_id, label_ids in relabeled.items():
+                if message_id not in to_fetch and message_id not in deleted:
+                    self._set_labels(message_id, label_ids)
+            # Keep the old cursor when any fetch failed, so the next sync replays this history and retries them
+            if not fetched["failed"]:
+                self._set_meta("history_id", str(history_id))
+            self._set_meta("last_sync", str(time.time()))
+        if fetched["failed"]:
+            logger.warning(f"📬 {len(fetched['failed'])} messages failed to fetch; history cursor kept at {start_history_id}")
+        if added or deleted or relabeled:
+            logger.info(f"📬 Mailbox mirror synced: +{len(added)} -{len(deleted)} ~{len(relabeled)}")
+
+    def query(self, label_ids: List[str], count: int) -> List[Dict[str, Any]]:
+        """Most recent messages carrying every one of label_ids"""
+        placeholders = ", ".join("?" for _ in label_ids)
+        with self._lock:
+            rows = self._db.execute(f"""
+                SELECT m.id, m.thread_id, m.subject, m.sender, m.date, m.snippet,
+                       EXISTS (SELECT 1 FROM message_labels u WHERE u.message_id = m.id AND u.label = 'UNREAD')
+                FROM messages m
+                JOIN message_labels l ON l.message_id = m.id AND l.label IN ({placeholders})
+                GROUP BY m.id
+                HAVING COUNT(DISTINCT l.label) = ?
+                ORDER BY m.internal_date DESC
+                LIMIT ?
+            """, (*label_ids, len(label_ids), count)).fetchall()
+        return [
+            {"id": row[0], "thread_id": row[1], "subject": row[2], "sender": row[3],
+             "date": row[4], "snippet": row[5], "unread": bool(row[6])}
+            for row in rows
+        ]
+
+    def all_messages(self) -> List[Dict[str, Any]]:
+        """Every mirrored message (id, subject, sender, snippet), newest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, subject, sender, snippet FROM messages ORDER BY internal_date DESC").fetchall()
+        return [{"id": row[0], "subject": row[1], "sender": row[2], "snippet": row[3]} for row in rows]
+
+    def freshness(self) -> Dict[str, Any]:
+        with self._lock:
+            last_sync = self._get_meta("last_sync")
+            history_id = self._get_meta("history_id")
+        return {
+            "source": "mirror",
+            "history_id": history_id,
+            "last_sync": datetime.fromtimestamp(float(last_sync)).isoformat() if last_sync else None,
+            "age_seconds": round(time.time() - float(last_sync), 1) if last_sync else None
+        }
+
+mailbox = MailboxMirror(MAILBOX_DB)
+
 @app.get("/gmail/recent")
-async def get_recent_emails(count: int = 10):
-    """Get recent emails from Gmail"""
+async def get_recent_emails(count: int = 10, live: bool = False):
+    """Get recent emails from Gmail (served from the local mirror once it has synced; ?live=true bypasses it)"""
     try:
+        count = max(1, min(count, GMAIL_MAX_COUNT))
+        emails = mailbox.query(['INBOX'], count) if not live and mailbox.ready else None
+        if emails is not None and mailbox.covers(['INBOX'], count, len(emails)):
+            return {"emails": emails, "count": len(emails), "failed": [], "service": "gmail",
+                    "freshness": mailbox.freshness()}
+
         gmail_service = service_manager.get_gmail_service()
         if not gmail_service:
             return {
@@ -431,48 +1152,29 @@ async def get_recent_emails(count: int = 10):
                 "auth_url": "http://localhost:8080/auth/login"
             }
         
-        # Get message list
-        results = gmail_service.users().messages().list(
-            userId='me',
-            maxResults=count,
-            labelIds=['INBOX']
-        ).execute()
-        
-        messages = results.get('messages', [])
-        
-        emails = []
-        for msg in messages:
-            message = gmail_service.users().messages().get(
-                userId='me',
-                id=msg['id'],
-                format='metadata',
-                metadataHeaders=['From', 'Subject', 'Date']
-            ).execute()
-            
-            headers = message.get('payload', {}).get('headers', [])
-            
-            email_data = {
-                "id": message['id'],
-                "thread_id": message['threadId'],
-                "subject": next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject'),
-                "sender": next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown'),
-                "date": next((h['value'] for h in headers if h['name'] == 'Date'), ''),
-                "snippet": message.get('snippet', ''),
-                "unread": 'UNREAD' in message.get('labelIds', [])
-            }
-            emails.append(email_data)
+        # List IDs (paginated for large counts), then fetch metadata in batches
+        message_ids = await google_calls.run("gmail", list_message_ids, gmail_service, ['INBOX'], count)
+        fetched = await google_calls.run("gmail", fetch_message_metadata, gmail_service, message_ids)
+        emails = [format_email(message) for message in fetched["messages"]]
         
-        logger.info(f"Retrieved {len(emails)} recent emails")
-        return {"emails": emails, "count": len(emails), "service": "gmail"}
+        logger.info(f"Retrieved {len(emails)} recent emails ({len(fetched['failed'])} failed)")
+        return {"emails": emails, "count": len(emails), "failed": fetched["failed"], "service": "gmail",
+                "freshness": {"source": "live"}}
         
     except Exception as e:
         logger.error(f"Error fetching recent emails: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch emails: {str(e)}")
 
 @app.get("/gmail/unread")
-async def get_unread_emails():
-    """Get unread emails from Gmail"""
+async def get_unread_emails(count: int = 10, live: bool = False):
+    """Get unread emails from Gmail (served from the local mirror once it has synced; ?live=true bypasses it)"""
     try:
+        count = max(1, min(count, GMAIL_MAX_COUNT))
+        emails = mailbox.query(['INBOX', 'UNREAD'], count) if not live and mailbox.ready else None
+        if emails is not None and mailbox.covers(['INBOX', 'UNREAD'], count, len(emails)):
+            return {"emails": emails, "count": len(emails), "failed": [], "service": "gmail",
+                    "freshness": mailbox.freshness()}
+
         gmail_service = service_manager.get_gmail_service()
         if not gmail_service:
             return {
@@ -482,36 +1184,13 @@ async def get_unread_emails():
             }
         
         # Get unread messages
-        results = gmail_service.users().messages().list(
-            userId='me',
-            labelIds=['INBOX', 'UNREAD']
-        ).execute()
-        
-        messages = results.get('messages', [])
-        
-        emails = []
-        for msg in messages[:10]:  # Limit to 10 for performance
-            message = gmail_service.users().messages().get(
-                userId='me',
-                id=msg['id'],
-                format='metadata',
-                metadataHeaders=['From', 'Subject', 'Date']
-            ).execute()
-            
-            headers = message.get('payload', {}).get('headers', [])
-            
-            email_data = {
-                "id": message['id'],
-                "subject": next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject'),
-                "sender": next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown'),
-                "date": next((h['value'] for h in headers if h['name'] == 'Date'), ''),
-                "snippet": message.get('snippet', ''),
-                "unread": True
-            }
-            emails.append(email_data)
+        message_ids = await google_calls.run("gmail", list_message_ids, gmail_service, ['INBOX', 'UNREAD'], count)
+        fetched = await google_calls.run("gmail", fetch_message_metadata, gmail_service, message_ids)
+        emails = [format_email(message) for message in fetched["messages"]]
         
-        logger.info(f"Retrieved {len(emails)} unread emails")
-        return {"emails": emails, "count": len(emails), "service": "gmail"}
+        logger.info(f"Retrieved {len(emails)} unread emails ({len(fetched['failed'])} failed)")
+        return {"emails": emails, "count": len(emails), "failed": fetched["failed"], "service": "gmail",
+                "freshness": {"source": "live"}}
         
     except Exception as e:
         logger.error(f"Error fetching unread emails: {e}")
@@ -521,8 +1200,160 @@ async def get_unread_emails():
 # CALENDAR ENDPOINTS
 # ============================================================================
 
+# Local event cache: per-calendar, incrementally synced with nextSyncToken, indexed in an interval tree
+CALENDAR_DB = os.path.join(os.path.dirname(__file__), 'mcp_calendar.db')
+CALENDAR_SYNC_INTERVAL = float(os.getenv("CALENDAR_SYNC_INTERVAL", "60"))
+CALENDAR_IDS = [calendar_id.strip() for calendar_id in os.getenv("CALENDAR_IDS", "primary").split(",") if calendar_id.strip()]
+
+def parse_event_time(value: Dict[str, str]) -> float:
+    """Epoch seconds for an event start/end ({'dateTime': RFC3339} or all-day {'date': 'YYYY-MM-DD'} in local time)"""
+    if 'dateTime' in value:
+        return datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00')).timestamp()
+    return datetime.strptime(value['date'], "%Y-%m-%d").timestamp()
+
+def format_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a Calendar API event into the shape the endpoints return"""
+    return {
+        "id": event['id'],
+        "title": event.get('summary', 'No Title'),
+        "description": event.get('description', ''),
+        "start": event['start'].get('dateTime', event['start'].get('date')),
+        "end": event['end'].get('dateTime', event['end'].get('date')),
+        "location": event.get('location', ''),
+        "attendees": [attendee.get('email') for attendee in event.get('attendees', [])],
+        "all_day": 'date' in event['start']
+    }
+
+class CalendarEventCache:
+    """Events of each synced calendar, persisted to SQLite and answered locally for any time window"""
+
+    def __init__(self, db_path: str, calendar_ids: List[str]):
+        self.calendar_ids = calendar_ids
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS events (
+                calendar_id TEXT,
+                event_id TEXT,
+                event TEXT,
+                PRIMARY KEY (calendar_id, event_id)
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (calendar_id TEXT PRIMARY KEY, sync_token TEXT, last_sync REAL);
+        """)
+        self._trees: Dict[str, IntervalTree] = {}
+        for calendar_id, event in self._db.execute("SELECT calendar_id, event FROM events"):
+            self._index(calendar_id, json.loads(event))
+        self._sync_state = {
+            calendar_id: {"sync_token": sync_token, "last_sync": last_sync}
+            for calendar_id, sync_token, last_sync in self._db.execute("SELECT * FROM sync_state")
+        }
+
+    def ready(self, calendar_id: str = 'primary') -> bool:
+        return bool(self._sync_state.get(calendar_id, {}).get("sync_token"))
+
+    def _index(self, calendar_id: str, event: Dict[str, Any]):
+        tree = self._trees.setdefault(calendar_id, IntervalTree())
+        if event.get('status') == 'cancelled' or 'start' not in event:
+            tree.remove(event['id'])
+        else:
+            tree.add(event['id'], parse_event_time(event['start']), parse_event_time(event['end']), event)
+
+    def upsert(self, calendar_id: str, event: Dict[str, Any]):
+        """Apply one event change (e.g. an event we just created) without waiting for the next sync"""
+        with self._lock, self._db:
+            self._index(calendar_id, event)
+            if event.get('status') == 'cancelled':
+                self._db.execute("DELETE FROM events WHERE calendar_id = ? AND event_id = ?", (calendar_id, event['id']))
+            else:
+                self._db.execute("INSERT OR REPLACE INTO events VALUES (?, ?, ?)",
+                                 (calendar_id, event['id'], json.dumps(event)))
+
+    def _fetch(self, calendar_service, calendar_id: str, sync_token: Optional[str]):
+        """All pages of events (or of changes since sync_token) plus the next sync token"""
+        events = []
+        page_token = None
+        while True:
+            response = google_calls.execute_sync(calendar_service.events().list(
+                calendarId=calendar_id,
+                singleEvents=True,
+                maxResults=2500,
+                syncToken=sync_token,
+                pageToken=page_token
+            ))
+            events.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return events, response.get('nextSyncToken')
+
+    def sync_calendar(self, calendar_service, calendar_id: str):
+        sync_token = self._sync_state.get(calendar_id, {}).get("sync_token")
+        try:
+            events, next_token = self._fetch(calendar_service, calendar_id, sync_token)
+        except Exception as e:
+            # An invalidated sync token answers 410 Gone; start over with a full sync
+            if sync_token is None or getattr(getattr(e, 'resp', None), 'status', None) != 410:
+                raise
+            logger.warning(f"Calendar sync token for {calendar_id} expired, running a full sync")
+            sync_token = None
+            events, next_token = self._fetch(calendar_service, calendar_id, None)
+
+        with self._lock, self._db:
+            if sync_token is None:
+                self._trees[calendar_id] = IntervalTree()
+                self._db.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+            for event in events:
+                self._index(calendar_id, event)
+                if event.get('status') == 'cancelled':
+                    self._db.execute("DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                                     (calendar_id, event['id']))
+                else:
+                    self._db.execute("INSERT OR REPLACE INTO events VALUES (?, ?, ?)",
+                                     (calendar_id, event['id'], json.dumps(event)))
+            self._sync_state[calendar_id] = {"sync_token": next_token, "last_sync": time.time()}
+            self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                             (calendar_id, next_token, self._sync_state[calendar_id]["last_sync"]))
+        if events:
+            logger.info(f"📅 Calendar {calendar_id} synced: {len(events)} changes, {len(self._trees[calendar_id])} events")
+
+    def sync(self, calendar_service):
+        """Sync every configured calendar"""
+        with self._sync_lock:
+            for calendar_id in self.calendar_ids:
+                self.sync_calendar(calendar_service, calendar_id)
+
+    def events_between(self, start: datetime, end: datetime, calendar_id: str = 'primary') -> List[Dict[str, Any]]:
+        """Events overlapping [start, end), ordered by start time"""
+        with self._lock:
+            tree = self._trees.get(calendar_id)
+            if tree is None:
+                return []
+            return [event for _, _, event in tree.overlapping(start.timestamp(), end.timestamp())]
+
+    def freshness(self, calendar_id: str = 'primary') -> Dict[str, Any]:
+        last_sync = self._sync_state.get(calendar_id, {}).get("last_sync")
+        return {
+            "source": "cache",
+            "calendar_id": calendar_id,
+            "last_sync": datetime.fromtimestamp(last_sync).isoformat() if last_sync else None,
+            "age_seconds": round(time.time() - last_sync, 1) if last_sync else None
+        }
+
+calendar_cache = CalendarEventCache(CALENDAR_DB, CALENDAR_IDS)
+
+async def load_events(calendar_service, start: datetime, end: datetime, calendar_id: str = 'primary',
+                      refresh: bool = False) -> List[Dict[str, Any]]:
+    """Formatted events for a window from the cache, syncing first if it has never synced (or if asked to)"""
+    if calendar_id not in calendar_cache.calendar_ids:
+        raise HTTPException(status_code=400, detail=f"Calendar '{calendar_id}' is not synced (see CALENDAR_IDS)")
+    if refresh or not calendar_cache.ready(calendar_id):
+        await google_calls.run("calendar", calendar_cache.sync, calendar_service,
+                               timeout=max(GOOGLE_CALL_TIMEOUT, CALENDAR_SYNC_INTERVAL))
+    return [format_event(event) for event in calendar_cache.events_between(start, end, calendar_id)]
+
 @app.get("/calendar/today")
-async def get_today_events():
+async def get_today_events(refresh: bool = False):
     """Get today's calendar events"""
     try:
         calendar_service = service_manager.get_calendar_service()
@@ -533,56 +1364,29 @@ async def get_today_events():
                 "auth_url": "http://localhost:8080/auth/login"
             }
         
-        # Get today's date range
+        # Get today's date range (local time)
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         tomorrow = today + timedelta(days=1)
         
-        # Format for API
-        time_min = today.isoformat() + 'Z'
-        time_max = tomorrow.isoformat() + 'Z'
-        
-        # Get events
-        events_result = calendar_service.events().list(
-            calendarId='primary',
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-        
-        calendar_events = []
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
-            
-            event_data = {
-                "id": event['id'],
-                "title": event.get('summary', 'No Title'),
-                "description": event.get('description', ''),
-                "start": start,
-                "end": end,
-                "location": event.get('location', ''),
-                "attendees": [attendee.get('email') for attendee in event.get('attendees', [])],
-                "all_day": 'date' in event['start']
-            }
-            calendar_events.append(event_data)
+        calendar_events = await load_events(calendar_service, today, tomorrow, refresh=refresh)
         
         logger.info(f"Retrieved {len(calendar_events)} events for today")
         return {
             "events": calendar_events, 
             "count": len(calendar_events), 
             "date": today.strftime("%Y-%m-%d"),
-            "service": "calendar"
+            "service": "calendar",
+            "freshness": calendar_cache.freshness()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching today's events: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch events: {str(e)}")
 
 @app.get("/calendar/upcoming")
-async def get_upcoming_events(days: int = 7):
+async def get_upcoming_events(days: int = 7, refresh: bool = False):
     """Get upcoming events for the next N days"""
     try:
         calendar_service = service_manager.get_calendar_service()
@@ -597,50 +1401,332 @@ async def get_upcoming_events(days: int = 7):
         now = datetime.now()
         future = now + timedelta(days=days)
         
-        # Format for API
-        time_min = now.isoformat() + 'Z'
-        time_max = future.isoformat() + 'Z'
-        
-        # Get events
-        events_result = calendar_service.events().list(
-            calendarId='primary',
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-        
-        calendar_events = []
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
-            
-            event_data = {
-                "id": event['id'],
-                "title": event.get('summary', 'No Title'),
-                "description": event.get('description', ''),
-                "start": start,
-                "end": end,
-                "location": event.get('location', ''),
-                "attendees": [attendee.get('email') for attendee in event.get('attendees', [])],
-                "all_day": 'date' in event['start']
-            }
-            calendar_events.append(event_data)
+        calendar_events = await load_events(calendar_service, now, future, refresh=refresh)
         
         logger.info(f"Retrieved {len(calendar_events)} upcoming events for next {days} days")
         return {
             "events": calendar_events, 
             "count": len(calendar_events), 
             "days": days,
-            "service": "calendar"
+            "service": "calendar",
+            "freshness": calendar_cache.freshness()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching upcoming events: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch events: {str(e)}")
 
+@app.get("/calendar/range")
+async def get_events_in_range(start: str, end: str, calendar_id: str = 'primary', refresh: bool = False):
+    """
+    Get events overlapping an arbitrary window.
+    start/end are ISO 8601 dates or datetimes; naive values are local time.
+    """
+    try:
+        calendar_service = service_manager.get_calendar_service()
+        if not calendar_service:
+            return {
+                "error": "Not authenticated",
+                "auth_required": True,
+                "auth_url": "http://localhost:8080/auth/login"
+            }
+        
+        try:
+            window_start = datetime.fromisoformat(start.replace('Z', '+00:00'))
+            window_end = datetime.fromisoformat(end.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start and end must be ISO 8601 dates or datetimes")
+        if window_end <= window_start:
+            raise HTTPException(status_code=400, detail="end must be after start")
+        
+        calendar_events = await load_events(calendar_service, window_start, window_end, calendar_id, refresh)
+        
+        logger.info(f"Retrieved {len(calendar_events)} events between {start} and {end}")
+        return {
+            "events": calendar_events,
+            "count": len(calendar_events),
+            "start": window_start.isoformat(),
+            "end": window_end.isoformat(),
+            "service": "calendar",
+            "freshness": calendar_cache.freshness(calendar_id)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching events in range: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch events: {str(e)}")
+
+# Multi-calendar aggregation: the selected calendars are read concurrently and merged by start time
+CALENDAR_LIST_TTL = float(os.getenv("CALENDAR_LIST_TTL", "300"))
+_calendar_list_cache: Dict[str, Any] = {"calendars": None, "fetched": 0.0}
+
+async def selected_calendar_ids(calendar_service, owned_only: bool = False) -> List[str]:
+    """
+    IDs of the calendars the user has selected in Google Calendar (the list is cached for CALENDAR_LIST_TTL).
+    owned_only keeps the primary calendar and calendars the user owns, leaving out calendars shared by
+    others (colleagues, holidays, rooms).
+    """
+    if _calendar_list_cache["calendars"] is None or time.time() - _calendar_list_cache["fetched"] > CALENDAR_LIST_TTL:
+        calendar_list = await google_calls.execute("calendar", calendar_service.calendarList().list())
+        _calendar_list_cache["calendars"] = [
+            calendar for calendar in calendar_list.get('items', [])
+            if calendar.get('selected') or calendar.get('primary')
+        ]
+        _calendar_list_cache["fetched"] = time.time()
+    return [
+        calendar['id'] for calendar in _calendar_list_cache["calendars"]
+        if not owned_only or calendar.get('primary') or calendar.get('accessRole') == 'owner'
+    ]
+
+def fetch_calendar_events(calendar_service, calendar_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Every event of one calendar in a window, ordered by start (runs on the Google call pool)"""
+    events = []
+    page_token = None
+    while True:
+        response = google_calls.execute_sync(calendar_service.events().list(
+            calendarId=calendar_id,
+            timeMin=start.astimezone().isoformat(),
+            timeMax=end.astimezone().isoformat(),
+            singleEvents=True,
+            orderBy='startTime',
+            maxResults=2500,
+            pageToken=page_token
+        ))
+        events.extend(response.get('items', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return events
+
+async def aggregate_events(calendar_service, start: datetime, end: datetime,
+                           calendar_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Events of several calendars in one start-ordered list. Calendars in the local cache are read from it,
+    the rest are fetched concurrently; the per-calendar sorted streams are combined with a heap-based
+    k-way merge and events present on several calendars (same iCalUID and start) are reported once.
+    """
+    calendar_ids = calendar_ids or await selected_calendar_ids(calendar_service)
+
+    async def read_calendar(calendar_id: str):
+        started = time.monotonic()
+        try:
+            if calendar_cache.ready(calendar_id):
+                events, source = calendar_cache.events_between(start, end, calendar_id), "cache"
+            else:
+                events, source = await google_calls.run(
+                    "calendar", fetch_calendar_events, calendar_service, calendar_id, start, end), "live"
+            error = None
+        except Exception as e:
+            events, source, error = [], "live", str(e)
+        return calendar_id, events, {
+            "calendar_id": calendar_id,
+            "source": source,
+            "count": len(events),
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "error": error
+        }
+
+    results = await asyncio.gather(*(read_calendar(calendar_id) for calendar_id in calendar_ids))
+
+    def stream(calendar_id: str, events: List[Dict[str, Any]]):
+        for event in events:
+            if 'start' in event:
+                yield parse_event_time(event['start']), calendar_id, event
+
+    streams = [stream(calendar_id, events) for calendar_id, events, _ in results]
+    merged = []
+    seen = {}
+    for starts_at, calendar_id, event in heapq.merge(*streams, key=lambda item: item[0]):
+        # Compare parsed instants: calendars in different zones render the same start with different offsets
+        key = (event.get('iCalUID', event['id']), starts_at)
+        if key in seen:
+            seen[key]["calendars"].append(calendar_id)
+            continue
+        formatted = dict(format_event(event), calendar_id=calendar_id, calendars=[calendar_id])
+        seen[key] = formatted
+        merged.append(formatted)
+
+    return {"events": merged, "calendars": [stats for _, _, stats in results]}
+
+@app.get("/calendar/aggregate")
+async def get_aggregated_events(start: Optional[str] = None, end: Optional[str] = None, calendars: str = ""):
+    """
+    Events across calendars in one list.
+    calendars is a comma-separated list of calendar IDs (default: every calendar selected in Google Calendar);
+    start/end are ISO 8601 and default to the next 7 days.
+    """
+    try:
+        calendar_service = service_manager.get_calendar_service()
+        if not calendar_service:
+            return {
+                "error": "Not authenticated",
+                "auth_required": True,
+                "auth_url": "http://localhost:8080/auth/login"
+            }
+        
+        try:
+            window_start = datetime.fromisoformat(start.replace('Z', '+00:00')) if start else datetime.now()
+            window_end = datetime.fromisoformat(end.replace('Z', '+00:00')) if end else window_start + timedelta(days=7)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start and end must be ISO 8601 dates or datetimes")
+        if window_end <= window_start:
+            raise HTTPException(status_code=400, detail="end must be after start")
+        
+        calendar_ids = [calendar_id.strip() for calendar_id in calendars.split(",") if calendar_id.strip()]
+        aggregated = await aggregate_events(calendar_service, window_start, window_end, calendar_ids or None)
+        
+        logger.info(f"Aggregated {len(aggregated['events'])} events from {len(aggregated['calendars'])} calendars")
+        return {
+            "events": aggregated["events"],
+            "count": len(aggregated["events"]),
+            "calendars": aggregated["calendars"],
+            "start": window_start.isoformat(),
+            "end": window_end.isoformat(),
+            "service": "calendar"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error aggregating calendars: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to aggregate events: {str(e)}")
+
+# Working hours (local time) used when looking for free slots
+WORK_DAY_START = int(os.getenv("WORK_DAY_START", "9"))
+WORK_DAY_END = int(os.getenv("WORK_DAY_END", "17"))
+
+def resolve_attendee(attendee: str) -> Dict[str, Any]:
+    """An email address as-is, or a spoken name resolved to its best contact's email through the name index"""
+    if '@' in attendee:
+        return {"query": attendee, "email": attendee, "resolved": True}
+    for hit in contact_index.search(attendee, limit=3):
+        person = contacts_store.get(hit["id"])
+        emails = person.get('emailAddresses', []) if person else []
+        if emails and hit["score"] >= 0.8:
+            return {"query": attendee, "email": emails[0].get('value'), "name": contact_names(person)[0],
+                    "score": hit["score"], "resolved": True}
+    return {"query": attendee, "email": None, "resolved": False}
+
+def working_windows(window_start: datetime, window_end: datetime, work_start: int, work_end: int,
+                    include_weekends: bool) -> List[tuple]:
+    """Working-hours intervals (epoch seconds) of each local day in the window, clipped to the window"""
+    windows = []
+    day = window_start.astimezone().replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    while day.timestamp() < window_end.timestamp():
+        if include_weekends or day.weekday() < 5:
+            start = max(day.replace(hour=work_start).timestamp(), window_start.timestamp())
+            end = min((day + timedelta(hours=work_end)).timestamp(), window_end.timestamp())
+            if end > start:
+                windows.append((start, end))
+        day += timedelta(days=1)
+    return windows
+
+FREEBUSY_MAX_CALENDARS = 50
+
+@app.get("/calendar/availability")
+async def find_availability(duration_minutes: int = 30, start: Optional[str] = None, end: Optional[str] = None,
+                            attendees: str = "", count: int = 3, work_start: int = WORK_DAY_START,
+                            work_end: int = WORK_DAY_END, include_weekends: bool = False,
+                            granularity_minutes: int = 15, calendar_ids: str = ""):
+    """
+    Find the next free slots of duration_minutes within working hours.
+    Busy time comes from freebusy.query over the user's own calendars (CALENDAR_IDS plus the selected
+    calendars they own; shared calendars such as colleagues', holidays and rooms are left out), or the
+    comma-separated calendar_ids if given, plus any attendees (comma-separated emails or contact names)
+    whose calendars we are allowed to see.
+    start/end default to now and a week from now.
+    """
+    try:
+        calendar_service = service_manager.get_calendar_service()
+        if not calendar_service:
+            return {
+                "error": "Not authenticated",
+                "auth_required": True,
+                "auth_url": "http://localhost:8080/auth/login"
+            }
+        
+        if duration_minutes <= 0 or not 0 <= work_start < work_end <= 24:
+            raise HTTPException(status_code=400, detail="Invalid duration or working hours")
+        try:
+            window_start = datetime.fromisoformat(start.replace('Z', '+00:00')) if start else datetime.now()
+            window_end = datetime.fromisoformat(end.replace('Z', '+00:00')) if end else window_start + timedelta(days=7)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start and end must be ISO 8601 dates or datetimes")
+        window_start = max(window_start.astimezone(), datetime.now().astimezone())
+        window_end = window_end.astimezone()
+        
+        resolved = [resolve_attendee(name.strip()) for name in attendees.split(",") if name.strip()]
+        own_calendars = [calendar_id.strip() for calendar_id in calendar_ids.split(",") if calendar_id.strip()]
+        if not own_calendars:
+            try:
+                own_calendars = CALENDAR_IDS + await selected_calendar_ids(calendar_service, owned_only=True)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not list selected calendars, using CALENDAR_IDS only: {e}")
+                own_calendars = CALENDAR_IDS
+        calendar_ids = list(dict.fromkeys(own_calendars + [a["email"] for a in resolved if a["email"]]))
+        
+        busy = []
+        unavailable = []
+        if window_end > window_start:
+            # freebusy.query answers for at most FREEBUSY_MAX_CALENDARS calendars per request
+            responses = await asyncio.gather(*(
+                google_calls.execute("calendar", calendar_service.freebusy().query(body={
+                    "timeMin": window_start.isoformat(),
+                    "timeMax": window_end.isoformat(),
+                    "items": [{"id": calendar_id} for calendar_id in calendar_ids[i:i + FREEBUSY_MAX_CALENDARS]]
+                }))
+                for i in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS)
+            ))
+            calendars = {}
+            for freebusy in responses:
+                calendars.update(freebusy.get('calendars', {}))
+            for calendar_id, calendar in calendars.items():
+                if calendar.get('errors'):
+                    # Typically notFound / no permission to see an attendee's calendar
+                    unavailable.append({"calendar_id": calendar_id,
+                                        "reason": calendar['errors'][0].get('reason', 'unknown')})
+                for period in calendar.get('busy', []):
+                    busy.append((parse_event_time({'dateTime': period['start']}),
+                                 parse_event_time({'dateTime': period['end']})))
+        
+        slots = find_free_slots(
+            busy,
+            working_windows(window_start, window_end, work_start, work_end, include_weekends),
+            duration=duration_minutes * 60,
+            count=max(1, count),
+            granularity=max(1, granularity_minutes) * 60
+        )
+        
+        free_slots = []
+        for slot_start, slot_end in slots:
+            local_start = datetime.fromtimestamp(slot_start)
+            free_slots.append({
+                "start": local_start.isoformat(),
+                "end": datetime.fromtimestamp(slot_end).isoformat(),
+                "readable": local_start.strftime("%A at %I:%M %p")
+            })
+        
+        logger.info(f"Found {len(free_slots)} free {duration_minutes}-minute slots across {len(calendar_ids)} calendars")
+        return {
+            "slots": free_slots,
+            "count": len(free_slots),
+            "duration_minutes": duration_minutes,
+            "window": {"start": window_start.isoformat(), "end": window_end.isoformat()},
+            "calendars": calendar_ids,
+            "attendees": resolved,
+            "unavailable_calendars": unavailable,
+            "busy_intervals": len(busy),
+            "service": "calendar"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding availability: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to find availability: {str(e)}")
+
 @app.get("/calendar/list")
 async def get_calendars():
     """Get list of user's calendars"""
@@ -654,7 +1740,7 @@ async def get_calendars():
             }
         
         # Get calendar list
-        calendar_list = calendar_service.calendarList().list().execute()
+        calendar_list = await google_calls.execute("calendar", calendar_service.calendarList().list())
         calendars = []
         
         for calendar in calendar_list.get('items', []):
@@ -675,9 +1761,42 @@ async def get_calendars():
         logger.error(f"Error fetching calendars: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch calendars: {str(e)}")
 
+async def run_create_event(payload: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+    """Write-behind handler for /calendar/create_event"""
+    calendar_service = service_manager.get_calendar_service()
+    if not calendar_service:
+        raise RuntimeError("Not authenticated with Google")
+    calendar_id = payload['calendar_id']
+    event = payload['event']
+    
+    try:
+        created_event = await google_calls.execute("calendar", calendar_service.events().insert(
+            calendarId=calendar_id,
+            body=event,
+            sendUpdates='all'  # Send email invites to attendees
+        ))
+    except Exception as e:
+        # The event ID is derived from the idempotency key, so retrying an insert that did go through answers 409
+        if getattr(getattr(e, 'resp', None), 'status', None) != 409:
+            raise
+        created_event = await google_calls.execute("calendar", calendar_service.events().get(
+            calendarId=calendar_id, eventId=event['id']))
+    
+    logger.info(f"Created calendar event: {event['summary']} at {event['start']['dateTime']}")
+    if calendar_id in calendar_cache.calendar_ids:
+        calendar_cache.upsert(calendar_id, created_event)
+    return {"event_id": created_event['id'], "calendar_link": created_event.get('htmlLink', '')}
+
+write_queue.register("calendar.create_event", run_create_event)
+
 @app.post("/calendar/create_event")
-async def create_calendar_event(request: Request):
-    """Create a new calendar event"""
+async def create_calendar_event(request: Request, wait: float = 0):
+    """
+    Create a new calendar event.
+    The event is journaled and created in the background; the response acknowledges the job (poll /jobs/{job_id},
+    or pass wait=<seconds> to wait for the outcome). Send an idempotency_key (body) or Idempotency-Key header
+    to make retries safe.
+    """
     try:
         calendar_service = service_manager.get_calendar_service()
         if not calendar_service:
@@ -700,12 +1819,15 @@ async def create_calendar_event(request: Request):
         location = event_data.get('location', '')
         attendees = event_data.get('attendees', [])  # List of email addresses
         calendar_id = event_data.get('calendar_id', 'primary')
+        idempotency_key = event_data.get('idempotency_key') or request.headers.get('Idempotency-Key') or uuid.uuid4().hex
         
         if not start_time or not end_time:
             raise HTTPException(status_code=400, detail="start_time and end_time are required")
         
         # Format event for Google Calendar API
         event = {
+            # Client-chosen ID (hex is valid base32hex) so a retried insert cannot create a second event
+            'id': hashlib.sha1(idempotency_key.encode('utf-8')).hexdigest(),
             'summary': title,
             'description': description,
             'start': {
@@ -726,27 +1848,25 @@ async def create_calendar_event(request: Request):
         if attendees:
             event['attendees'] = [{'email': email} for email in attendees]
         
-        # Create the event
-        created_event = calendar_service.events().insert(
-            calendarId=calendar_id,
-            body=event,
-            sendUpdates='all'  # Send email invites to attendees
-        ).execute()
-        
-        logger.info(f"Created calendar event: {title} at {start_time}")
+        job = write_queue.submit("calendar.create_event", {"calendar_id": calendar_id, "event": event},
+                                 idempotency_key=f"calendar:{idempotency_key}")
+        logger.info(f"Queued calendar event: {title} at {start_time} (job {job['id'][:8]})")
+        acknowledgment = await job_response(job, wait)
         
         return {
-            "success": True,
-            "event_id": created_event['id'],
+            **acknowledgment,
+            "event_id": event['id'],
             "title": title,
             "start_time": start_time,
             "end_time": end_time,
             "location": location,
             "attendees": attendees,
-            "calendar_link": created_event.get('htmlLink', ''),
+            "calendar_link": (acknowledgment["result"] or {}).get('calendar_link', ''),
             "service": "calendar"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating calendar event: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create event: {str(e)}")
@@ -755,8 +1875,146 @@ async def create_calendar_event(request: Request):
 # PEOPLE API ENDPOINTS
 # ============================================================================
 
+# Local contacts store: fully paginated on first sync, then incremental via the People API syncToken
+CONTACTS_DB = os.path.join(os.path.dirname(__file__), 'mcp_contacts.db')
+CONTACTS_SYNC_INTERVAL = float(os.getenv("CONTACTS_SYNC_INTERVAL", "300"))
+CONTACT_PERSON_FIELDS = 'names,emailAddresses,phoneNumbers,organizations,addresses,birthdays,metadata'
+
+class ContactsStore:
+    """Every connection of the user, kept in memory and persisted to SQLite between restarts"""
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS contacts (resource_name TEXT PRIMARY KEY, person TEXT);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._people = {
+            resource_name: json.loads(person)
+            for resource_name, person in self._db.execute("SELECT resource_name, person FROM contacts")
+        }
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        self._sync_token = meta.get("sync_token")
+        self._last_sync = float(meta["last_sync"]) if "last_sync" in meta else None
+        self._listeners: List[Callable] = []
+        self.version = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._sync_token is not None
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._people.values())
+
+    def get(self, resource_name: str) -> Optional[Dict[str, Any]]:
+        return self._people.get(resource_name)
+
+    def subscribe(self, listener: Callable):
+        """Call listener(updated_people, removed_resource_names) after every sync that changes something"""
+        self._listeners.append(listener)
+
+    def _fetch(self, people_service, sync_token: Optional[str]):
+        """All pages of connections (or of changes since sync_token) plus the next sync token"""
+        persons = []
+        page_token = None
+        while True:
+            response = google_calls.execute_sync(people_service.people().connections().list(
+                resourceName='people/me',
+                personFields=CONTACT_PERSON_FIELDS,
+                pageSize=1000,
+                requestSyncToken=True,
+                syncToken=sync_token,
+                pageToken=page_token
+            ))
+            persons.extend(response.get('connections', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return persons, response.get('nextSyncToken')
+
+    def sync(self, people_service) -> Dict[str, Any]:
+        """Pull changes since the last sync (everything on the first run or after the token expires)"""
+        with self._sync_lock:
+            sync_token = self._sync_token
+            try:
+                persons, next_token = self._fetch(people_service, sync_token)
+            except Exception as e:
+                # Sync tokens expire after seven days; the API answers 410 EXPIRED_SYNC_TOKEN
+                if sync_token is None or not (getattr(getattr(e, 'resp', None), 'status', None) == 410
+                                              or 'EXPIRED_SYNC_TOKEN' in str(e)):
+                    raise
+                logger.warning("Contacts sync token expired, running a full sync")
+                sync_token = None
+                persons, next_token = self._fetch(people_service, None)
+
+            upserted = [p for p in persons if not p.get('metadata', {}).get('deleted')]
+            removed = [p['resourceName'] for p in persons if p.get('metadata', {}).get('deleted')]
+            with self._lock, self._db:
+                if sync_token is None:
+                    removed = [name for name in self._people if name not in {p['resourceName'] for p in upserted}]
+                    self._people = {}
+                    self._db.execute("DELETE FROM contacts")
+                for person in upserted:
+                    self._people[person['resourceName']] = person
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO contacts (resource_name, person) VALUES (?, ?)",
+                    [(person['resourceName'], json.dumps(person)) for person in upserted]
+                )
+                for resource_name in removed:
+                    self._people.pop(resource_name, None)
+                    self._db.execute("DELETE FROM contacts WHERE resource_name = ?", (resource_name,))
+                self._sync_token = next_token
+                self._last_sync = time.time()
+                self._db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                     [("sync_token", next_token), ("last_sync", str(self._last_sync))])
+                if upserted or removed:
+                    self.version += 1
+
+            if upserted or removed:
+                logger.info(f"👥 Contacts synced: {len(upserted)} updated, {len(removed)} removed, {len(self._people)} total")
+                for listener in self._listeners:
+                    listener(upserted, removed)
+            return {"updated": upserted, "removed": removed, "full": sync_token is None}
+
+    def freshness(self) -> Dict[str, Any]:
+        return {
+            "source": "store",
+            "contacts": len(self._people),
+            "last_sync": datetime.fromtimestamp(self._last_sync).isoformat() if self._last_sync else None,
+            "age_seconds": round(time.time() - self._last_sync, 1) if self._last_sync else None
+        }
+
+contacts_store = ContactsStore(CONTACTS_DB)
+
+# Fuzzy/phonetic name index over the store, updated incrementally as contacts change
+contact_index = NameIndex()
+
+def contact_names(person: Dict[str, Any]) -> List[str]:
+    names = []
+    for name in person.get('names', []):
+        names.extend(filter(None, (name.get('displayName'), name.get('givenName'), name.get('familyName'))))
+    return names
+
+def index_contacts(updated: List[Dict[str, Any]], removed: List[str]):
+    for resource_name in removed:
+        contact_index.remove(resource_name)
+    for person in updated:
+        contact_index.update(person['resourceName'], contact_names(person))
+
+contacts_store.subscribe(index_contacts)
+
+async def load_contacts(people_service, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Contacts from the local store, syncing first if it has never synced (or if refresh is asked for)"""
+    if refresh or not contacts_store.ready:
+        await google_calls.run("people", contacts_store.sync, people_service,
+                               timeout=max(GOOGLE_CALL_TIMEOUT, CONTACTS_SYNC_INTERVAL))
+    return contacts_store.all()
+
 @app.get("/contacts/all")
-async def get_all_contacts():
+async def get_all_contacts(refresh: bool = False):
     """Get all contacts from Google Contacts"""
     try:
         people_service = service_manager.get_people_service()
@@ -767,13 +2025,8 @@ async def get_all_contacts():
                 "auth_url": "http://localhost:8080/auth/login"
             }
         
-        # Get connections (contacts)
-        results = people_service.people().connections().list(
-            resourceName='people/me',
-            personFields='names,emailAddresses,phoneNumbers,organizations,addresses,birthdays'
-        ).execute()
-        
-        connections = results.get('connections', [])
+        # Served from the local contacts store
+        connections = await load_contacts(people_service, refresh)
         contacts = []
         
         for person in connections:
@@ -854,7 +2107,8 @@ async def get_all_contacts():
         return {
             "contacts": contacts,
             "count": len(contacts),
-            "service": "people"
+            "service": "people",
+            "freshness": contacts_store.freshness()
         }
         
     except Exception as e:
@@ -862,7 +2116,7 @@ async def get_all_contacts():
         raise HTTPException(status_code=500, detail=f"Failed to fetch contacts: {str(e)}")
 
 @app.get("/contacts/search")
-async def search_contacts(query: str):
+async def search_contacts(query: str, refresh: bool = False):
     """Search contacts by name or email"""
     try:
         people_service = service_manager.get_people_service()
@@ -873,13 +2127,8 @@ async def search_contacts(query: str):
                 "auth_url": "http://localhost:8080/auth/login"
             }
         
-        # Get all connections first, then filter
-        results = people_service.people().connections().list(
-            resourceName='people/me',
-            personFields='names,emailAddresses,phoneNumbers'
-        ).execute()
-        
-        connections = results.get('connections', [])
+        # Served from the local contacts store
+        connections = await load_contacts(people_service, refresh)
         matching_contacts = []
         query_lower = query.lower()
         
@@ -921,7 +2170,8 @@ async def search_contacts(query: str):
             "contacts": matching_contacts,
             "count": len(matching_contacts),
             "query": query,
-            "service": "people"
+            "service": "people",
+            "freshness": contacts_store.freshness()
         }
         
     except Exception as e:
@@ -941,10 +2191,10 @@ async def get_my_profile():
             }
         
         # Get user profile
-        profile = people_service.people().get(
+        profile = await google_calls.execute("people", people_service.people().get(
             resourceName='people/me',
             personFields='names,emailAddresses,phoneNumbers,addresses,organizations,birthdays,genders'
-        ).execute()
+        ))
         
         profile_data = {
             "resource_name": profile.get('resourceName', ''),
@@ -968,7 +2218,7 @@ async def get_my_profile():
         raise HTTPException(status_code=500, detail=f"Failed to fetch profile: {str(e)}")
 
 @app.get("/contacts/find")
-async def find_contact_by_name(name: str):
+async def find_contact_by_name(name: str, refresh: bool = False):
     """Find a specific contact by name (for meeting scheduling)"""
     try:
         people_service = service_manager.get_people_service()
@@ -979,63 +2229,32 @@ async def find_contact_by_name(name: str):
                 "auth_url": "http://localhost:8080/auth/login"
             }
         
-        # Get all connections and find best match
-        results = people_service.people().connections().list(
-            resourceName='people/me',
-            personFields='names,emailAddresses,phoneNumbers'
-        ).execute()
-        
-        connections = results.get('connections', [])
-        name_lower = name.lower()
-        best_matches = []
-        
-        for person in connections:
-            if 'names' in person:
-                for person_name in person['names']:
-                    display_name = person_name.get('displayName', '').lower()
-                    given_name = person_name.get('givenName', '').lower()
-                    family_name = person_name.get('familyName', '').lower()
-                    
-                    # Exact match gets highest priority
-                    if name_lower == display_name or name_lower == given_name or name_lower == family_name:
-                        contact_data = {
-                            "resource_name": person.get('resourceName', ''),
-                            "display_name": person_name.get('displayName', ''),
-                            "given_name": person_name.get('givenName', ''),
-                            "family_name": person_name.get('familyName', ''),
-                            "emails": person.get('emailAddresses', []),
-                            "phones": person.get('phoneNumbers', []),
-                            "match_type": "exact"
-                        }
-                        best_matches.insert(0, contact_data)  # Add to front for exact matches
-                    # Partial match
-                    elif (name_lower in display_name or name_lower in given_name or name_lower in family_name):
-                        contact_data = {
-                            "resource_name": person.get('resourceName', ''),
-                            "display_name": person_name.get('displayName', ''),
-                            "given_name": person_name.get('givenName', ''),
-                            "family_name": person_name.get('familyName', ''),
-                            "emails": person.get('emailAddresses', []),
-                            "phones": person.get('phoneNumbers', []),
-                            "match_type": "partial"
-                        }
-                        best_matches.append(contact_data)
-        
-        # Remove duplicates and limit results
+        # Ranked fuzzy and phonetic matches ("Jon" finds John, "Aisha" finds Ayesha)
+        await load_contacts(people_service, refresh)
         unique_matches = []
-        seen_names = set()
-        for match in best_matches:
-            name_key = match.get('display_name', '').lower()
-            if name_key not in seen_names:
-                seen_names.add(name_key)
-                unique_matches.append(match)
+        for hit in contact_index.search(name, limit=5):
+            person = contacts_store.get(hit["id"])
+            if not person:
+                continue
+            person_name = (person.get('names') or [{}])[0]
+            unique_matches.append({
+                "resource_name": person.get('resourceName', ''),
+                "display_name": person_name.get('displayName', ''),
+                "given_name": person_name.get('givenName', ''),
+                "family_name": person_name.get('familyName', ''),
+                "emails": person.get('emailAddresses', []),
+                "phones": person.get('phoneNumbers', []),
+                "match_type": hit["match_type"],
+                "score": hit["score"]
+            })
         
         logger.info(f"Found {len(unique_matches)} contacts matching '{name}'")
         return {
-            "contacts": unique_matches[:5],  # Return top 5 matches
+            "contacts": unique_matches,  # Top 5 matches, best first
             "count": len(unique_matches),
             "query": name,
-            "service": "people"
+            "service": "people",
+            "freshness": contacts_store.freshness()
         }
         
     except Exception as e:
@@ -1043,7 +2262,7 @@ async def find_contact_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Failed to find contact: {str(e)}")
 
 @app.get("/contacts/emails")
-async def get_contact_emails():
+async def get_contact_emails(refresh: bool = False):
     """Get all contact emails for easy access"""
     try:
         people_service = service_manager.get_people_service()
@@ -1054,13 +2273,8 @@ async def get_contact_emails():
                 "auth_url": "http://localhost:8080/auth/login"
             }
         
-        # Get connections with email addresses
-        results = people_service.people().connections().list(
-            resourceName='people/me',
-            personFields='names,emailAddresses'
-        ).execute()
-        
-        connections = results.get('connections', [])
+        # Served from the local contacts store
+        connections = await load_contacts(people_service, refresh)
         email_contacts = []
         
         for person in connections:
@@ -1088,7 +2302,8 @@ async def get_contact_emails():
         return {
             "email_contacts": email_contacts,
             "count": len(email_contacts),
-            "service": "people"
+            "service": "people",
+            "freshness": contacts_store.freshness()
         }
         
     except Exception as e:
@@ -1112,10 +2327,10 @@ async def get_my_channel():
             }
         
         # Get user's channel
-        channels_response = youtube_service.channels().list(
+        channels_response = await google_calls.execute("youtube", youtube_service.channels().list(
             part='snippet,statistics,contentDetails',
             mine=True
-        ).execute()
+        ))
         
         channels = channels_response.get('items', [])
         
@@ -1170,10 +2385,10 @@ async def get_my_videos(max_results: int = 10):
             }
         
         # First get the uploads playlist ID
-        channels_response = youtube_service.channels().list(
+        channels_response = await google_calls.execute("youtube", youtube_service.channels().list(
             part='contentDetails',
             mine=True
-        ).execute()
+        ))
         
         channels = channels_response.get('items', [])
         if not channels:
@@ -1186,11 +2401,11 @@ async def get_my_videos(max_results: int = 10):
         uploads_playlist_id = channels[0]['contentDetails']['relatedPlaylists']['uploads']
         
         # Get videos from uploads playlist
-        playlist_response = youtube_service.playlistItems().list(
+        playlist_response = await google_calls.execute("youtube", youtube_service.playlistItems().list(
             part='snippet',
             playlistId=uploads_playlist_id,
             maxResults=max_results
-        ).execute()
+        ))
         
         videos = []
         for item in playlist_response.get('items', []):
@@ -1231,12 +2446,12 @@ async def search_youtube(q: str, max_results: int = 10):
             raise HTTPException(status_code=401, detail="YouTube service not authenticated")
         
         # Search for videos
-        search_response = youtube_service.search().list(
+        search_response = await google_calls.execute("youtube", youtube_service.search().list(
             q=q,
             part='id,snippet',
             maxResults=max_results,
             type='video'
-        ).execute()
+        ))
         
         videos = []
         for search_result in search_response.get('items', []):
@@ -1281,11 +2496,11 @@ async def get_my_playlists(max_results: int = 25):
             }
         
         # Get user's playlists
-        playlists_response = youtube_service.playlists().list(
+        playlists_response = await google_calls.execute("youtube", youtube_service.playlists().list(
             part='snippet,contentDetails',
             mine=True,
             maxResults=max_results
-        ).execute()
+        ))
         
         playlists = []
         for item in playlists_response.get('items', []):
@@ -1320,6 +2535,292 @@ async def get_my_playlists(max_results: int = 25):
 # NOTES & LISTS API (Google Drive-based)
 # ============================================================================
 
+NOTES_FOLDER_NAME = "June Notes"
+NOTES_FOLDER_MIME = "application/vnd.google-apps.folder"
+GOOGLE_DOC_MIME = "application/vnd.google-apps.document"
+
+class NotesFolder:
+    """
+    ID of the "June Notes" Drive folder, looked up (or created) once and then reused.
+    It is only looked up again after a write into it fails, e.g. because the folder was deleted.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._folder_id: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    async def resolve(self, drive_service, create: bool = True) -> Optional[str]:
+        """Folder ID, creating the folder if it does not exist (unless create is False)"""
+        if self._folder_id:
+            return self._folder_id
+        async with self._lock:
+            if self._folder_id:
+                return self._folder_id
+            folder_result = await google_calls.execute("drive", drive_service.files().list(q=self._query(), fields="files(id)"))
+            
+            if folder_result.get('files'):
+                self._folder_id = folder_result.get('files')[0].get('id')
+            elif create:
+                folder = await google_calls.execute("drive", drive_service.files().create(
+                    body={'name': self.name, 'mimeType': NOTES_FOLDER_MIME},
+                    fields="id"
+                ))
+                self._folder_id = folder.get('id')
+                logger.info(f"📁 Created Drive folder '{self.name}'")
+            return self._folder_id
+
+    def _query(self) -> str:
+        return f"name='{self.name}' and mimeType='{NOTES_FOLDER_MIME}' and trashed=false"
+
+    def lookup_sync(self, drive_service) -> Optional[str]:
+        """resolve() for pool threads: the cached ID, or a lookup that never creates the folder"""
+        if not self._folder_id:
+            folder_result = google_calls.execute_sync(drive_service.files().list(q=self._query(), fields="files(id)"))
+            if folder_result.get('files'):
+                self._folder_id = folder_result.get('files')[0].get('id')
+        return self._folder_id
+
+    def invalidate(self):
+        self._folder_id = None
+
+notes_folder = NotesFolder(NOTES_FOLDER_NAME)
+
+async def write_to_notes_folder(drive_service, write: Callable[[str], Any]):
+    """Run an async write that needs the folder ID; a 404 means the cached folder is gone, so look it up again and retry once"""
+    folder_id = await notes_folder.resolve(drive_service)
+    try:
+        return await write(folder_id)
+    except Exception as e:
+        if getattr(getattr(e, 'resp', None), 'status', None) != 404:
+            raise
+        logger.warning(f"⚠️ Notes folder {folder_id} not found, looking it up again")
+        notes_folder.invalidate()
+        return await write(await notes_folder.resolve(drive_service))
+
+def note_html(text: str) -> str:
+    """Markdown-like note text as HTML, so Drive's conversion keeps the headings, bold lines and bullets"""
+    parts = []
+    in_list = False
+    for line in text.split('\n'):
+        is_bullet = line.startswith('• ') or line.startswith('- ')
+        if in_list and not is_bullet:
+            parts.append("</ul>")
+            in_list = False
+        if is_bullet:
+            if not in_list:
+                parts.append("<ul>")
+                in_list = True
+            parts.append(f"<li>{html.escape(line[2:])}</li>")
+        elif line.startswith('# '):
+            parts.append(f"<h1>{html.escape(line[2:])}</h1>")
+        elif line.startswith('## '):
+            parts.append(f"<h2>{html.escape(line[3:])}</h2>")
+        elif line.startswith('**') and line.endswith('**') and len(line) > 4:
+            parts.append(f"<p><b>{html.escape(line[2:-2])}</b></p>")
+        elif line.strip():
+            parts.append(f"<p>{html.escape(line)}</p>")
+    if in_list:
+        parts.append("</ul>")
+    return "<html><body>" + "".join(parts) + "</body></html>"
+
+async def reserve_file_id(drive_service) -> str:
+    """A Drive file ID to create a document under later, so retrying the create cannot make a second copy"""
+    response = await google_calls.execute("drive", drive_service.files().generateIds(count=1, space='drive', type='files'))
+    return response['ids'][0]
+
+async def upload_document(drive_service, folder_id: str, title: str, text: str, file_id: Optional[str] = None) -> str:
+    """
+    Create a Google Doc with its content in a single multipart upload (Drive converts the HTML).
+    With a reserved file_id the create is idempotent: a 409 means an earlier attempt already created it.
+    """
+    from googleapiclient.http import MediaIoBaseUpload
+    
+    media = MediaIoBaseUpload(io.BytesIO(note_html(text).encode('utf-8')), mimetype='text/html', resumable=False)
+    body = {'name': title, 'parents': [folder_id], 'mimeType': GOOGLE_DOC_MIME}
+    if file_id:
+        body['id'] = file_id
+    try:
+        doc = await google_calls.execute("drive", drive_service.files().create(
+            body=body,
+            media_body=media,
+            fields="id"
+        ))
+    except Exception as e:
+        if not file_id or getattr(getattr(e, 'resp', None), 'status', None) != 409:
+            raise
+        logger.info(f"Document {file_id} was already created by an earlier attempt")
+        return file_id
+    return doc.get('id')
+
+# Local full-text index over the notes folder, kept current through the Drive change feed
+NOTES_DB = os.path.join(os.path.dirname(__file__), 'mcp_notes.db')
+NOTES_SYNC_INTERVAL = float(os.getenv("NOTES_SYNC_INTERVAL", "60"))
+NOTE_FILE_FIELDS = "id,name,mimeType,parents,trashed,createdTime,modifiedTime"
+
+class NotesMirror:
+    """
+    Plain text of every Google Doc in the notes folder, persisted to SQLite and indexed for BM25 search.
+    The first sync exports every document; later syncs read the Drive change feed from a persisted
+    page token and export only the documents that changed.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS notes (id TEXT PRIMARY KEY, name TEXT, created TEXT, modified TEXT, text TEXT);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._notes = {
+            row[0]: {"id": row[0], "name": row[1], "createdTime": row[2], "modifiedTime": row[3], "text": row[4]}
+            for row in self._db.execute("SELECT id, name, created, modified, text FROM notes")
+        }
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        self._page_token = meta.get("page_token")
+        self._last_sync = float(meta["last_sync"]) if "last_sync" in meta else None
+        self.index = BM25Index()
+
+    @property
+    def ready(self) -> bool:
+        return self._page_token is not None
+
+    def build_index(self):
+        for note in self.all():
+            self.index.update(note['id'], f"{note['name']}\n{note['text']}")
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Every note, most recently modified first"""
+        with self._lock:
+            notes = list(self._notes.values())
+        return sorted(notes, key=lambda note: note.get('modifiedTime') or '', reverse=True)
+
+    def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        return self._notes.get(note_id)
+
+    def upsert(self, file: Dict[str, Any], text: str):
+        note = {
+            "id": file['id'],
+            "name": file.get('name', 'Untitled'),
+            "createdTime": file.get('createdTime'),
+            "modifiedTime": file.get('modifiedTime'),
+            "text": text
+        }
+        with self._lock, self._db:
+            self._notes[note['id']] = note
+            self._db.execute(
+                "INSERT OR REPLACE INTO notes (id, name, created, modified, text) VALUES (?, ?, ?, ?, ?)",
+                (note['id'], note['name'], note['createdTime'], note['modifiedTime'], text)
+            )
+        self.index.update(note['id'], f"{note['name']}\n{text}")
+
+    def remove(self, note_id: str):
+        with self._lock, self._db:
+            self._notes.pop(note_id, None)
+            self._db.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+        self.index.remove(note_id)
+
+    def _export(self, drive_service, file_id: str) -> str:
+        data = google_calls.execute_sync(drive_service.files().export(fileId=file_id, mimeType='text/plain'))
+        return data.decode('utf-8-sig') if isinstance(data, bytes) else data
+
+    def _full_sync(self, drive_service, folder_id: str) -> Tuple[str, int, int]:
+        """Export every document in the folder; returns the change feed position taken before listing and the counts"""
+        start_token = google_calls.execute_sync(drive_service.changes().getStartPageToken())['startPageToken']
+        files = []
+        page_token = None
+        while True:
+            response = google_calls.execute_sync(drive_service.files().list(
+                q=f"parents in '{folder_id}' and mimeType='{GOOGLE_DOC_MIME}' and trashed=false",
+                fields=f"nextPageToken,files({NOTE_FILE_FIELDS})",
+                pageSize=1000,
+                pageToken=page_token
+            ))
+            files.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        current = {file['id'] for file in files}
+        gone = [note_id for note_id in self._notes if note_id not in current]
+        for note_id in gone:
+            self.remove(note_id)
+        updated = 0
+        for file in files:
+            known = self._notes.get(file['id'])
+            if not known or known['modifiedTime'] != file.get('modifiedTime'):
+                self.upsert(file, self._export(drive_service, file['id']))
+                updated += 1
+        return start_token, updated, len(gone)
+
+    def _apply_changes(self, drive_service, folder_id: str, page_token: str) -> Tuple[str, int, int]:
+        """Follow the change feed from page_token; returns the next start token and the updated/removed counts"""
+        updated = removed = 0
+        while True:
+            response = google_calls.execute_sync(drive_service.changes().list(
+                pageToken=page_token,
+                spaces='drive',
+                includeRemoved=True,
+                pageSize=1000,
+                fields=f"nextPageToken,newStartPageToken,changes(fileId,removed,file({NOTE_FILE_FIELDS}))"
+            ))
+            for change in response.get('changes', []):
+                file = change.get('file') or {}
+                in_folder = (not change.get('removed') and not file.get('trashed')
+                             and file.get('mimeType') == GOOGLE_DOC_MIME and folder_id in file.get('parents', []))
+                known = self._notes.get(change['fileId'])
+                if not in_folder:
+                    if known:
+                        self.remove(change['fileId'])
+                        removed += 1
+                elif not known or known['modifiedTime'] != file.get('modifiedTime'):
+                    self.upsert(file, self._export(drive_service, file['id']))
+                    updated += 1
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return response['newStartPageToken'], updated, removed
+
+    def sync(self, drive_service) -> Dict[str, Any]:
+        """Bring the mirror up to date (a full export on the first run or when the page token is rejected)"""
+        with self._sync_lock:
+            folder_id = notes_folder.lookup_sync(drive_service)
+            if not folder_id:
+                return {"updated": 0, "removed": 0, "full": False}
+
+            full = self._page_token is None
+            updated = removed = 0
+            if not full:
+                try:
+                    page_token, updated, removed = self._apply_changes(drive_service, folder_id, self._page_token)
+                except Exception as e:
+                    if getattr(getattr(e, 'resp', None), 'status', None) not in (400, 404, 410):
+                        raise
+                    logger.warning(f"Drive change feed token rejected ({e}), running a full notes sync")
+                    full = True
+            if full:
+                page_token, updated, removed = self._full_sync(drive_service, folder_id)
+
+            with self._db:
+                self._page_token = page_token
+                self._last_sync = time.time()
+                self._db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                     [("page_token", page_token), ("last_sync", str(self._last_sync))])
+            if full or updated or removed:
+                logger.info(f"🗒️ Notes synced: {updated} updated, {removed} removed, {len(self._notes)} total")
+            return {"updated": updated, "removed": removed, "full": full}
+
+    def freshness(self) -> Dict[str, Any]:
+        return {
+            "source": "index",
+            "notes": len(self._notes),
+            "last_sync": datetime.fromtimestamp(self._last_sync).isoformat() if self._last_sync else None,
+            "age_seconds": round(time.time() - self._last_sync, 1) if self._last_sync else None
+        }
+
+notes_mirror = NotesMirror(NOTES_DB)
+
 @app.get("/notes/all")
 async def get_all_notes():
     """Get all June notes stored in Google Drive"""
@@ -1331,27 +2832,14 @@ async def get_all_notes():
         if not drive_service:
             raise HTTPException(status_code=503, detail="Drive service not available")
         
-        # Search for June notes folder or create it
-        folder_query = "name='June Notes' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        folder_result = drive_service.files().list(q=folder_query).execute()
-        
-        if not folder_result.get('files'):
-            # Create June Notes folder
-            folder_metadata = {
-                'name': 'June Notes',
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            folder = drive_service.files().create(body=folder_metadata).execute()
-            folder_id = folder.get('id')
-        else:
-            folder_id = folder_result.get('files')[0].get('id')
+        folder_id = await notes_folder.resolve(drive_service)
         
         # Get all notes in the folder
         notes_query = f"parents in '{folder_id}' and trashed=false"
-        notes_result = drive_service.files().list(
+        notes_result = await google_calls.execute("drive", drive_service.files().list(
             q=notes_query,
             fields="files(id,name,createdTime,modifiedTime,mimeType)"
-        ).execute()
+        ))
         
         notes_list = []
         for file in notes_result.get('files', []):
@@ -1376,36 +2864,35 @@ async def get_all_notes():
         logger.error(f"Error fetching notes: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch notes: {str(e)}")
 
+async def run_create_note(payload: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+    """Write-behind handler for /notes/create"""
+    drive_service = service_manager.get_drive_service()
+    if not drive_service:
+        raise RuntimeError("Drive service not available")
+    doc_id = await write_to_notes_folder(
+        drive_service, lambda folder_id: upload_document(
+            drive_service, folder_id, payload['title'], payload['content'], payload.get('file_id'))
+    )
+    logger.info(f"Created note: {payload['title']}")
+    # Searchable right away; the change feed replaces this with Drive's own export on the next sync
+    notes_mirror.upsert({"id": doc_id, "name": payload['title']}, payload['content'])
+    return {"note_id": doc_id}
+
+write_queue.register("notes.create", run_create_note)
+
 @app.post("/notes/create")
-async def create_note(request: dict):
-    """Create a new note in Google Drive (for meeting minutes/notes)"""
+async def create_note(request: dict, wait: float = 0):
+    """
+    Create a new note in Google Drive (for meeting minutes/notes).
+    The note is written in the background; see /calendar/create_event for wait and idempotency_key.
+    """
     if not service_manager.is_authenticated():
         raise HTTPException(status_code=401, detail="Not authenticated with Google")
     
     try:
-        drive_service = service_manager.get_drive_service()
-        if not drive_service:
-            raise HTTPException(status_code=503, detail="Drive service not available")
-        
         title = request.get('title', 'Meeting Notes')
         content = request.get('content', '')
         
-        # Ensure June Notes folder exists
-        folder_query = "name='June Notes' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        folder_result = drive_service.files().list(q=folder_query).execute()
-        
-        if not folder_result.get('files'):
-            folder_metadata = {
-                'name': 'June Notes',
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            folder = drive_service.files().create(body=folder_metadata).execute()
-            folder_id = folder.get('id')
-        else:
-            folder_id = folder_result.get('files')[0].get('id')
-        
-        # Create the note as a Google Doc
-        from datetime import datetime
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
         
         note_content = f"""# {title}
@@ -1415,110 +2902,20 @@ Created by: June AI Assistant
 {content}
 """
         
-        # Create Google Doc
-        doc_metadata = {
-            'name': title,
-            'parents': [folder_id],
-            'mimeType': 'application/vnd.google-apps.document'
-        }
-        
-        # Create empty doc first
-        doc = drive_service.files().create(body=doc_metadata).execute()
-        doc_id = doc.get('id')
-        
-        # Update content using Google Docs API with proper formatting
-        from googleapiclient.discovery import build
-        docs_service = build('docs', 'v1', credentials=service_manager.get_credentials())
-        
-        # Convert markdown-like content to Google Docs formatting
-        formatted_requests = []
-        
-        # Insert the base content first
-        formatted_requests.append({
-            'insertText': {
-                'location': {'index': 1},
-                'text': note_content
-            }
-        })
-        
-        # Apply formatting based on content structure
-        lines = note_content.split('\n')
-        current_index = 1
-        
-        for line in lines:
-            line_length = len(line) + 1  # +1 for newline
-            
-            # Format headers (lines starting with #)
-            if line.startswith('# '):
-                formatted_requests.append({
-                    'updateTextStyle': {
-                        'range': {
-                            'startIndex': current_index,
-                            'endIndex': current_index + len(line)
-                        },
-                        'textStyle': {
-                            'fontSize': {'magnitude': 24, 'unit': 'PT'},
-                            'bold': True
-                        },
-                        'fields': 'fontSize,bold'
-                    }
-                })
-            elif line.startswith('## '):
-                formatted_requests.append({
-                    'updateTextStyle': {
-                        'range': {
-                            'startIndex': current_index,
-                            'endIndex': current_index + len(line)
-                        },
-                        'textStyle': {
-                            'fontSize': {'magnitude': 16, 'unit': 'PT'},
-                            'bold': True
-                        },
-                        'fields': 'fontSize,bold'
-                    }
-                })
-            elif line.startswith('**') and line.endswith('**'):
-                # Bold text
-                formatted_requests.append({
-                    'updateTextStyle': {
-                        'range': {
-                            'startIndex': current_index,
-                            'endIndex': current_index + len(line)
-                        },
-                        'textStyle': {
-                            'bold': True
-                        },
-                        'fields': 'bold'
-                    }
-                })
-            elif line.startswith('• ') or line.startswith('- '):
-                # Bullet points - apply list formatting
-                formatted_requests.append({
-                    'createParagraphBullets': {
-                        'range': {
-                            'startIndex': current_index,
-                            'endIndex': current_index + len(line)
-                        },
-                        'bulletPreset': 'BULLET_DISC_CIRCLE_SQUARE'
-                    }
-                })
-            
-            current_index += line_length
-        
-        # Execute all formatting requests
-        if formatted_requests:
-            docs_service.documents().batchUpdate(
-                documentId=doc_id,
-                body={'requests': formatted_requests}
-            ).execute()
+        idempotency_key = request.get('idempotency_key')
+        # The document ID is fixed before the job is journaled, so a retried create finds its earlier attempt
+        file_id = await reserve_file_id(service_manager.get_drive_service())
+        job = write_queue.submit("notes.create", {"title": title, "content": note_content, "file_id": file_id},
+                                 idempotency_key=f"note:{idempotency_key}" if idempotency_key else None)
+        logger.info(f"Queued note: {title} (job {job['id'][:8]})")
+        acknowledgment = await job_response(job, wait)
         
-        logger.info(f"Created note: {title}")
         return {
-            "success": True,
-            "note_id": doc_id,
+            **acknowledgment,
+            "note_id": (acknowledgment["result"] or {}).get('note_id'),
             "title": title,
             "content": content,
-            "message": f"Note '{title}' created successfully in Google Drive",
+            "message": f"Note '{title}' saved to Google Drive",
             "service": "drive"
         }
         
@@ -1526,145 +2923,325 @@ Created by: June AI Assistant
         logger.error(f"Error creating note: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create note: {str(e)}")
 
+LISTS_DB = os.path.join(os.path.dirname(__file__), 'mcp_lists.db')
+LIST_COALESCE_WINDOW = float(os.getenv("LIST_COALESCE_WINDOW", "1.5"))
+
+def list_item_key(item: str) -> str:
+    """Items that differ only in case or spacing are the same item"""
+    return " ".join(item.lower().split())
+
+class ListStore:
+    """
+    Lists kept locally as ordered, de-duplicated items and persisted to SQLite.
+    Adding items returns at once; the Google Doc behind each list is written by a write-behind job.
+    Items added within `window` seconds of each other share one job and go out together as one Docs
+    batchUpdate that inserts at the end of the body, so appending never has to fetch the document.
+    An append is not idempotent: the exact text of each attempt and the items it carries are recorded
+    locally first, so after a failed attempt the document is checked for that text before writing again.
+    A new document is created under a reserved Drive file ID, so a retried create cannot make a second copy.
+    """
+
+    def __init__(self, db_path: str, window: float):
+        self.window = window
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS lists (title TEXT PRIMARY KEY, doc_id TEXT);
+            CREATE TABLE IF NOT EXISTS list_items (
+                title TEXT, key TEXT, item TEXT, added REAL, synced INTEGER,
+                PRIMARY KEY (title, key)
+            );
+            CREATE TABLE IF NOT EXISTS list_appends (title TEXT, key TEXT, marker TEXT, PRIMARY KEY (title, key));
+            CREATE TABLE IF NOT EXISTS list_creates (title TEXT PRIMARY KEY, file_id TEXT);
+            CREATE TABLE IF NOT EXISTS list_attempts (marker TEXT PRIMARY KEY, title TEXT, text TEXT);
+        """)
+        # title -> {"doc_id", "items": {key: item} in insertion order, "pending": [key], "generation", "batch"}
+        self._lists: Dict[str, Dict[str, Any]] = {}
+        for title, doc_id in self._db.execute("SELECT title, doc_id FROM lists"):
+            self._list(title)["doc_id"] = doc_id
+        for title, key, item, synced in self._db.execute(
+                "SELECT title, key, item, synced FROM list_items ORDER BY added"):
+            state = self._list(title)
+            state["items"][key] = item
+            if not synced:
+                state["pending"].append(key)
+        self._write_locks: Dict[str, asyncio.Lock] = {}
+
+    def _list(self, title: str) -> Dict[str, Any]:
+        return self._lists.setdefault(
+            title, {"doc_id": None, "items": {}, "pending": [], "generation": 0, "batch": None})
+
+    def items(self, title: str) -> List[str]:
+        return list(self._lists[title]["items"].values()) if title in self._lists else []
+
+    def add(self, title: str, items: List[str], replace: bool = False):
+        """Add items to a list (or start it over with replace); returns (added, duplicates, write job)"""
+        state = self._list(title)
+        if replace:
+            # Starting over writes a fresh document rather than appending to the old one
+            state.update(doc_id=None, items={}, pending=[], generation=state["generation"] + 1)
+            self._db.execute("DELETE FROM list_items WHERE title = ?", (title,))
+            self._db.execute("DELETE FROM list_appends WHERE title = ?", (title,))
+            self._db.execute("DELETE FROM list_creates WHERE title = ?", (title,))
+            self._db.execute("DELETE FROM list_attempts WHERE title = ?", (title,))
+            self._db.execute("DELETE FROM lists WHERE title = ?", (title,))
+
+        added, duplicates = [], []
+        now = time.time()
+        for item in items:
+            item = item.strip()
+            key = list_item_key(item)
+            if not key:
+                continue
+            if key in state["items"]:
+                duplicates.append(item)
+                continue
+            state["items"][key] = item
+            state["pending"].append(key)
+            added.append(item)
+            self._db.execute(
+                "INSERT OR REPLACE INTO list_items (title, key, item, added, synced) VALUES (?, ?, ?, ?, 0)",
+                (title, key, item, now)
+            )
+        self._db.commit()
+
+        job = None
+        if added or replace:
+            # Adds up to the moment the write starts join the batch already waiting for it
+            if state["batch"] is None:
+                state["batch"] = uuid.uuid4().hex
+            job = write_queue.submit("lists.write", {"title": title},
+                                     idempotency_key=f"list:{title}:{state['batch']}", delay=self.window)
+        return added, duplicates, job
+
+    async def _find_document(self, drive_service, title: str) -> Optional[str]:
+        folder_id = await notes_folder.resolve(drive_service)
+        escaped_title = title.replace("\\", "\\\\").replace("'", "\\'")
+        list_result = await google_calls.execute("drive", drive_service.files().list(
+            q=f"name='{escaped_title}' and parents in '{folder_id}' and trashed=false",
+            fields="files(id)"
+        ))
+        files = list_result.get('files', [])
+        return files[0].get('id') if files else None
+
+    async def _appended(self, drive_service, doc_id: str, title: str, keys: List[str]) -> List[str]:
+        """Keys among `keys` whose earlier append attempt reached the document despite failing"""
+        attempts = dict(self._db.execute(
+            f"SELECT key, marker FROM list_appends WHERE title = ? AND key IN ({','.join('?' * len(keys))})",
+            (title, *keys)
+        ).fetchall())
+        if not attempts:
+            return []
+        sent = dict(self._db.execute(
+            f"SELECT marker, text FROM list_attempts WHERE marker IN ({','.join('?' * len(set(attempts.values())))})",
+            tuple(set(attempts.values()))
+        ).fetchall())
+        data = await google_calls.execute("drive", drive_service.files().export(fileId=doc_id, mimeType='text/plain'))
+        # Compare with whitespace collapsed: the plain-text export does not keep our exact line breaks
+        text = " ".join((data.decode('utf-8-sig') if isinstance(data, bytes) else data).split())
+        landed = {marker for marker, attempt in sent.items() if " ".join(attempt.split()) in text}
+        if landed:
+            logger.info(f"📝 Append {', '.join(sorted(landed))} to '{title}' already reached the document")
+        return [key for key, marker in attempts.items() if marker in landed]
+
+    async def _create(self, drive_service, title: str, keys: List[str], timestamp: str) -> Tuple[str, List[str]]:
+        """
+        Create the list's document; returns its ID and the keys it was created with. The reserved file ID and
+        those keys are recorded before the first attempt, so a retry sends the same document again and
+        Drive's 409 for the existing ID means the earlier attempt went through.
+        """
+        state = self._lists[title]
+        row = self._db.execute("SELECT file_id FROM list_creates WHERE title = ?", (title,)).fetchone()
+        if row is not None:
+            file_id = row[0]
+            recorded = {key for (key,) in self._db.execute(
+                "SELECT key FROM list_appends WHERE title = ? AND marker = ?", (title, f"create:{file_id}"))}
+            keys = [key for key in state["items"] if key in recorded]
+        else:
+            file_id = await reserve_file_id(drive_service)
+            self._db.execute("INSERT OR REPLACE INTO list_creates (title, file_id) VALUES (?, ?)", (title, file_id))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO list_appends (title, key, marker) VALUES (?, ?, ?)",
+                [(title, key, f"create:{file_id}") for key in keys]
+            )
+            self._db.commit()
+
+        list_content = f"""# {title}
+Created: {timestamp}
+Created by: June AI Assistant
+
+"""
+        for key in keys:
+            list_content += f"□ {state['items'][key]}\n"
+        doc_id = await write_to_notes_folder(
+            drive_service, lambda folder_id: upload_document(drive_service, folder_id, title, list_content, file_id)
+        )
+        self._db.execute("DELETE FROM list_creates WHERE title = ? AND file_id = ?", (title, file_id))
+        self._db.commit()
+        return doc_id, keys
+
+    def _mark_synced(self, title: str, doc_id: str, keys: List[str]):
+        state = self._lists[title]
+        state["doc_id"] = doc_id
+        written = set(keys)
+        state["pending"] = [key for key in state["pending"] if key not in written]
+        self._db.execute("INSERT OR REPLACE INTO lists (title, doc_id) VALUES (?, ?)", (title, doc_id))
+        self._db.executemany(
+            "UPDATE list_items SET synced = 1 WHERE title = ? AND key = ?", [(title, key) for key in keys]
+        )
+        self._db.executemany("DELETE FROM list_appends WHERE title = ? AND key = ?", [(title, key) for key in keys])
+        self._db.execute(
+            "DELETE FROM list_attempts WHERE title = ? AND marker NOT IN (SELECT marker FROM list_appends WHERE title = ?)",
+            (title, title)
+        )
+        self._db.commit()
+
+    async def flush(self, title: str, job_id: str) -> Dict[str, Any]:
+        """Write the pending items of a list to its Google Doc, creating the document if needed"""
+        async with self._write_locks.setdefault(title, asyncio.Lock()):
+            return await self._flush(title, job_id[:12])
+
+    async def _flush(self, title: str, marker: str) -> Dict[str, Any]:
+        state = self._lists[title]
+        state["batch"] = None
+        keys = list(state["pending"])
+        if not keys:
+            return {"note_id": state["doc_id"], "items_written": 0}
+        generation = state["generation"]
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+        drive_service = service_manager.get_drive_service()
+        if not drive_service:
+            raise RuntimeError("Not authenticated with Google")
+
+        doc_id = state["doc_id"]
+        created = False
+        written = 0
+        if doc_id is None and generation == 0 and self._db.execute(
+                "SELECT 1 FROM list_creates WHERE title = ?", (title,)).fetchone() is None:
+            doc_id = await self._find_document(drive_service, title)
+        if doc_id is None:
+            doc_id, created_keys = await self._create(drive_service, title, keys, timestamp)
+            if state["generation"] != generation:
+                # The list was started over while this write was in flight
+                return {"note_id": doc_id, "items_written": len(created_keys)}
+            self._mark_synced(title, doc_id, created_keys)
+            created = True
+            written += len(created_keys)
+            keys = [key for key in keys if key not in set(created_keys)]
+        else:
+            landed = await self._appended(drive_service, doc_id, title, keys)
+            if landed and state["generation"] == generation:
+                self._mark_synced(title, doc_id, landed)
+                keys = [key for key in keys if key not in set(landed)]
+
+        if keys:
+            items = [state["items"][key] for key in keys]
+            new_items_text = "\n" + "\n".join([f"□ {item}" for item in items])
+            new_items_text += f"\n\nUpdated: {timestamp}\n"
+            # Record what this attempt carries before sending it, so a retry can tell whether it landed
+            self._db.execute("INSERT OR REPLACE INTO list_attempts (marker, title, text) VALUES (?, ?, ?)",
+                             (marker, title, new_items_text))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO list_appends (title, key, marker) VALUES (?, ?, ?)",
+                [(title, key, marker) for key in keys]
+            )
+            self._db.commit()
+            await google_calls.execute("docs", service_manager.get_docs_service().documents().batchUpdate(
+                documentId=doc_id,
+                body={'requests': [{
+                    'insertText': {
+                        'endOfSegmentLocation': {'segmentId': ''},
+                        'text': new_items_text
+                    }
+                }]}
+            ))
+            if state["generation"] != generation:
+                # The list was started over while this write was in flight
+                return {"note_id": doc_id, "items_written": written + len(keys)}
+            self._mark_synced(title, doc_id, keys)
+            written += len(keys)
+
+        if written:
+            logger.info(f"📝 {'Created' if created else 'Appended to'} list '{title}' in Drive with {written} items")
+        return {"note_id": doc_id, "items_written": written}
+
+    def status(self, title: str) -> Dict[str, Any]:
+        state = self._lists.get(title)
+        if state is None:
+            return {"exists": False}
+        return {
+            "exists": True,
+            "note_id": state["doc_id"],
+            "total_items": len(state["items"]),
+            "pending_items": len(state["pending"])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lists": len(self._lists),
+            "pending_items": sum(len(state["pending"]) for state in self._lists.values())
+        }
+
+list_store = ListStore(LISTS_DB, LIST_COALESCE_WINDOW)
+
+async def run_list_write(payload: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+    """Write-behind handler for /lists/create"""
+    return await list_store.flush(payload['title'], job['id'])
+
+write_queue.register("lists.write", run_list_write)
+
 @app.post("/lists/create")
 async def create_shopping_list(request: dict):
-    """Create or update a shopping list in Google Drive"""
+    """Create or update a shopping list in Google Drive (the document is written in the background)"""
     if not service_manager.is_authenticated():
         raise HTTPException(status_code=401, detail="Not authenticated with Google")
     
     try:
-        drive_service = service_manager.get_drive_service()
-        if not drive_service:
-            raise HTTPException(status_code=503, detail="Drive service not available")
-        
         title = request.get('title', 'Shopping List')
         items = request.get('items', [])
         append_to_existing = request.get('append', True)
         
-        # Ensure June Notes folder exists
-        folder_query = "name='June Notes' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        folder_result = drive_service.files().list(q=folder_query).execute()
+        existed = bool(list_store.items(title)) and append_to_existing
+        added, duplicates, job = list_store.add(title, items, replace=not append_to_existing)
+        status = list_store.status(title)
         
-        if not folder_result.get('files'):
-            folder_metadata = {
-                'name': 'June Notes',
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            folder = drive_service.files().create(body=folder_metadata).execute()
-            folder_id = folder.get('id')
-        else:
-            folder_id = folder_result.get('files')[0].get('id')
-        
-        # Try to find existing shopping list
-        existing_list = None
-        if append_to_existing:
-            list_query = f"name='{title}' and parents in '{folder_id}' and trashed=false"
-            list_result = drive_service.files().list(q=list_query).execute()
-            
-            if list_result.get('files'):
-                existing_list = list_result.get('files')[0]
-        
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        
-        if existing_list and append_to_existing:
-            # Append to existing list
-            doc_id = existing_list.get('id')
-            
-            # Get current content
-            from googleapiclient.discovery import build
-            docs_service = build('docs', 'v1', credentials=service_manager.get_credentials())
-            
-            doc = docs_service.documents().get(documentId=doc_id).execute()
-            
-            # Get the document's end index (total character count)
-            end_index = doc.get('body', {}).get('content', [])[-1].get('endIndex', 1) - 1
-            
-            # Add new items
-            new_items_text = "\n" + "\n".join([f"□ {item}" for item in items])
-            new_items_text += f"\n\nUpdated: {timestamp}\n"
-            
-            requests_body = [
-                {
-                    'insertText': {
-                        'location': {'index': end_index},
-                        'text': new_items_text
-                    }
-                }
-            ]
-            
-            docs_service.documents().batchUpdate(
-                documentId=doc_id,
-                body={'requests': requests_body}
-            ).execute()
-            
-            logger.info(f"Added {len(items)} items to existing shopping list")
-            return {
-                "success": True,
-                "note_id": doc_id,
-                "title": title,
-                "action": "appended",
-                "items_added": items,
-                "message": f"Added {len(items)} items to '{title}'",
-                "service": "drive"
-            }
-        else:
-            # Create new list
-            list_content = f"""# {title}
-Created: {timestamp}
-Created by: June AI Assistant
-
-"""
-            for item in items:
-                list_content += f"□ {item}\n"
-            
-            # Create Google Doc
-            doc_metadata = {
-                'name': title,
-                'parents': [folder_id],
-                'mimeType': 'application/vnd.google-apps.document'
-            }
-            
-            doc = drive_service.files().create(body=doc_metadata).execute()
-            doc_id = doc.get('id')
-            
-            # Update content
-            from googleapiclient.discovery import build
-            docs_service = build('docs', 'v1', credentials=service_manager.get_credentials())
-            
-            requests_body = [
-                {
-                    'insertText': {
-                        'location': {'index': 1},
-                        'text': list_content
-                    }
-                }
-            ]
-            
-            docs_service.documents().batchUpdate(
-                documentId=doc_id,
-                body={'requests': requests_body}
-            ).execute()
-            
-            logger.info(f"Created new shopping list: {title}")
-            return {
-                "success": True,
-                "note_id": doc_id,
-                "title": title,
-                "action": "created",
-                "items": items,
-                "total_items": len(items),
-                "message": f"Created '{title}' with {len(items)} items",
-                "service": "drive"
-            }
+        logger.info(f"Added {len(added)} items to '{title}' ({len(duplicates)} already on it)")
+        message = f"Added {len(added)} items to '{title}'" if existed else f"Created '{title}' with {len(added)} items"
+        if duplicates:
+            message += f" ({', '.join(duplicates)} already on the list)"
+        return {
+            "success": True,
+            "note_id": status["note_id"],
+            "title": title,
+            "action": "appended" if existed else "created",
+            "items_added": added,
+            "duplicates": duplicates,
+            "items": list_store.items(title),
+            "total_items": status["total_items"],
+            "pending_items": status["pending_items"],
+            "job_id": job["id"] if job else None,
+            "message": message,
+            "service": "drive"
+        }
         
     except Exception as e:
         logger.error(f"Error creating/updating shopping list: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create/update shopping list: {str(e)}")
 
+@app.get("/lists/items")
+async def get_list_items(title: str = 'Shopping List'):
+    """Items of a list from the local list store"""
+    return {
+        "title": title,
+        "items": list_store.items(title),
+        **list_store.status(title),
+        "service": "drive"
+    }
+
 @app.get("/notes/search")
-async def search_notes(query: str = ""):
-    """Search June notes in Google Drive"""
+async def search_notes(query: str = "", limit: int = 10, refresh: bool = False):
+    """Search June notes with the local full-text index, most relevant first (all notes when query is empty)"""
     if not service_manager.is_authenticated():
         raise HTTPException(status_code=401, detail="Not authenticated with Google")
     
@@ -1673,38 +3250,28 @@ async def search_notes(query: str = ""):
         if not drive_service:
             raise HTTPException(status_code=503, detail="Drive service not available")
         
-        # Find June Notes folder
-        folder_query = "name='June Notes' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        folder_result = drive_service.files().list(q=folder_query).execute()
-        
-        if not folder_result.get('files'):
-            return {
-                "notes": [],
-                "count": 0,
-                "query": query,
-                "service": "drive"
-            }
-        
-        folder_id = folder_result.get('files')[0].get('id')
+        if refresh or not notes_mirror.ready:
+            await google_calls.run("drive", notes_mirror.sync, drive_service,
+                                   timeout=max(GOOGLE_CALL_TIMEOUT, NOTES_SYNC_INTERVAL))
         
-        # Search notes with query
-        search_query = f"parents in '{folder_id}' and trashed=false"
-        if query:
-            search_query += f" and fullText contains '{query}'"
-        
-        notes_result = drive_service.files().list(
-            q=search_query,
-            fields="files(id,name,createdTime,modifiedTime,mimeType)"
-        ).execute()
+        query_terms = set(tokenize(query))
+        if query_terms:
+            hits = [(notes_mirror.get(note_id), score) for note_id, score in notes_mirror.index.search(query, limit)]
+        else:
+            hits = [(note, None) for note in notes_mirror.all()]
         
         notes_list = []
-        for file in notes_result.get('files', []):
+        for note, score in hits:
+            if note is None:
+                continue
             note_info = {
-                "id": file.get('id'),
-                "title": file.get('name', 'Untitled'),
-                "created_time": file.get('createdTime', ''),
-                "updated_time": file.get('modifiedTime', ''),
-                "type": "shopping_list" if "Shopping" in file.get('name', '') else "note"
+                "id": note['id'],
+                "title": note['name'],
+                "created_time": note.get('createdTime') or '',
+                "updated_time": note.get('modifiedTime') or '',
+                "type": "shopping_list" if "Shopping" in note['name'] else "note",
+                "score": round(score, 3) if score is not None else None,
+                "snippet": snippet(note['text'], query_terms)
             }
             notes_list.append(note_info)
         
@@ -1713,13 +3280,246 @@ async def search_notes(query: str = ""):
             "notes": notes_list,
             "count": len(notes_list),
             "query": query,
-            "service": "drive"
+            "service": "drive",
+            "freshness": notes_mirror.freshness()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching notes: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to search notes: {str(e)}")
 
+# ============================================================================
+# SEMANTIC SEARCH (local embeddings over notes and mail)
+# ============================================================================
+
+SEMANTIC_DIR = os.path.join(os.path.dirname(__file__), 'mcp_semantic')
+SEMANTIC_MODEL = os.getenv("SEMANTIC_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SEMANTIC_INTERVAL = float(os.getenv("SEMANTIC_INTERVAL", "60"))
+SEMANTIC_BATCH_SIZE = int(os.getenv("SEMANTIC_BATCH_SIZE", "64"))
+SEMANTIC_CHUNK_CHARS = 800
+SEMANTIC_MAX_CHUNKS = 16
+# Label stored with every vector so a search can be limited to one source
+SEMANTIC_SOURCES = {"notes": 0, "mail": 1}
+
+def note_chunks(note: Dict[str, Any]) -> List[str]:
+    """A note's text in paragraph-aligned pieces the embedding model can take whole, each led by the title"""
+    chunks, current = [], ""
+    for paragraph in note['text'].split('\n'):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > SEMANTIC_CHUNK_CHARS:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{paragraph}" if current else paragraph[:SEMANTIC_CHUNK_CHARS]
+    if current:
+        chunks.append(current)
+    return [f"{note['name']}\n{chunk}" for chunk in chunks[:SEMANTIC_MAX_CHUNKS]] or [note['name']]
+
+class SemanticIndex:
+    """
+    Embeddings of note chunks and mailbox messages for meaning-based search.
+    update() runs on a worker thread: it diffs the notes mirror and mailbox against what is already
+    embedded (by content digest), embeds only new or changed text in batches and drops what is gone.
+    Vectors live in a memory-mapped VectorMatrix; the key -> row map is kept in SQLite.
+    Nothing touches the disk until open_store() (at startup) or the first update/search.
+    """
+
+    def __init__(self, directory: str, embedder: LocalEmbedder):
+        self.directory = directory
+        self.embedder = embedder
+        self._update_lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._matrix: Optional[VectorMatrix] = None
+        self._last_update: Optional[float] = None
+
+    def open_store(self):
+        """Create the index directory and its item database"""
+        with self._open_lock:
+            self._open_store()
+
+    def _open_store(self):
+        if self._db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(self.directory, 'items.db'), check_same_thread=False)
+            self._db.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS items (
+                    key TEXT PRIMARY KEY, row INTEGER, source TEXT, ref_id TEXT, title TEXT, text TEXT, digest TEXT
+                );
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+
+    def _open(self) -> VectorMatrix:
+        """Attach the vector file, starting over if it was built with another model"""
+        with self._open_lock:
+            if self._matrix is None:
+                self._open_store()
+                meta = dict(self._db.execute("SELECT key, value FROM meta"))
+                path = os.path.join(self.directory, 'vectors.f32')
+                if meta.get("model") != self.embedder.model_name:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    with self._db:
+                        self._db.execute("DELETE FROM items")
+                        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model', ?)",
+                                         (self.embedder.model_name,))
+                self._matrix = VectorMatrix(path, self.embedder.dimension)
+                rows = self._db.execute("SELECT key, row, source, ref_id, title, text, digest FROM items").fetchall()
+                self._items = {
+                    key: {"row": row, "source": source, "ref_id": ref_id, "title": title, "text": text, "digest": digest}
+                    for key, row, source, ref_id, title, text, digest in rows
+                }
+                self._matrix.restore((key, item["row"], SEMANTIC_SOURCES[item["source"]]) for key, item in self._items.items())
+            return self._matrix
+
+    def _documents(self) -> Dict[str, Dict[str, Any]]:
+        """Everything that should be searchable, by index key"""
+        documents = {}
+        for note in notes_mirror.all():
+            for position, chunk in enumerate(note_chunks(note)):
+                documents[f"note:{note['id']}:{position}"] = {
+                    "source": "notes", "ref_id": note['id'], "title": note['name'], "text": chunk
+                }
+        for message in mailbox.all_messages():
+            documents[f"mail:{message['id']}"] = {
+                "source": "mail", "ref_id": message['id'], "title": message['subject'],
+                "text": f"{message['subject']}\n{message['sender']}\n{message['snippet']}"
+            }
+        for document in documents.values():
+            document["digest"] = hashlib.sha1(document["text"].encode('utf-8')).hexdigest()
+        return documents
+
+    def update(self) -> Dict[str, int]:
+        """Embed new and changed content and drop removed content"""
+        with self._update_lock:
+            matrix = self._open()
+            documents = self._documents()
+            removed = [key for key in self._items if key not in documents]
+            pending = [key for key, document in documents.items()
+                       if self._items.get(key, {}).get("digest") != document["digest"]]
+
+            with self._db:
+                for key in removed:
+                    matrix.remove(key)
+                    del self._items[key]
+                    self._db.execute("DELETE FROM items WHERE key = ?", (key,))
+
+            for start in range(0, len(pending), SEMANTIC_BATCH_SIZE):
+                batch = pending[start:start + SEMANTIC_BATCH_SIZE]
+                vectors = self.embedder.encode([documents[key]["text"] for key in batch])
+                with self._db:
+                    for key, vector in zip(batch, vectors):
+                        document = documents[key]
+                        row = matrix.put(key, vector, SEMANTIC_SOURCES[document["source"]])
+                        self._items[key] = dict(document, row=row)
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO items (key, row, source, ref_id, title, text, digest) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (key, row, document["source"], document["ref_id"], document["title"],
+                             document["text"], document["digest"])
+                        )
+            matrix.flush()
+            self._last_update = time.time()
+            if pending or removed:
+                logger.info(f"🧠 Semantic index updated: {len(pending)} embedded, {len(removed)} removed, {len(self._items)} total")
+            return {"embedded": len(pending), "removed": len(removed)}
+
+    def search(self, query: str, limit: int = 10, sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Closest notes and messages to the query; a note is reported once, with its best matching chunk"""
+        matrix = self._open()
+        query_vector = self.embedder.encode([query])[0]
+        labels = [SEMANTIC_SOURCES[source] for source in sources] if sources else None
+        results, seen = [], set()
+        # Several chunks of one note can rank together, so over-fetch before collapsing them
+        for key, score in matrix.search(query_vector, limit * 4, labels):
+            item = self._items.get(key)
+            if item is None or (item["source"], item["ref_id"]) in seen:
+                continue
+            seen.add((item["source"], item["ref_id"]))
+            results.append({
+                "source": item["source"],
+                "id": item["ref_id"],
+                "title": item["title"],
+                "snippet": " ".join(item["text"].split())[:200],
+                "score": round(score, 3)
+            })
+            if len(results) == limit:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": EMBEDDINGS_AVAILABLE,
+            "model": self.embedder.model_name,
+            "items": len(self._items),
+            "last_update": datetime.fromtimestamp(self._last_update).isoformat() if self._last_update else None
+        }
+
+semantic_index = SemanticIndex(SEMANTIC_DIR, LocalEmbedder(SEMANTIC_MODEL, os.getenv("MODEL_CACHE_DIR"), SEMANTIC_BATCH_SIZE))
+
+@app.get("/search/semantic")
+async def search_semantic(query: str, limit: int = 10, sources: str = "notes,mail"):
+    """
+    Meaning-based search over notes and mail ("what did I note about the dentist").
+    sources is a comma-separated subset of notes, mail.
+    """
+    if not EMBEDDINGS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Semantic search needs sentence-transformers (pip install sentence-transformers)")
+    
+    selected = [source.strip() for source in sources.split(",") if source.strip()]
+    unknown = [source for source in selected if source not in SEMANTIC_SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sources: {', '.join(unknown)} (use {', '.join(SEMANTIC_SOURCES)})")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, semantic_index.search, query, limit, selected)
+        
+        logger.info(f"Semantic search for '{query}' returned {len(results)} results")
+        return {
+            "results": results,
+            "count": len(results),
+            "query": query,
+            "index": semantic_index.stats()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error in semantic search: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+
+async def semantic_index_loop():
+    """Embed new notes and mail in the background every SEMANTIC_INTERVAL seconds"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, semantic_index.update)
+        except Exception as e:
+            logger.error(f"Semantic index update failed: {e}")
+        await asyncio.sleep(SEMANTIC_INTERVAL)
+
+# ============================================================================
+# WRITE-BEHIND JOBS
+# ============================================================================
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """Recent write-behind jobs, newest first (status: queued, running, succeeded or failed)"""
+    jobs = write_queue.recent(limit, status)
+    return {"jobs": jobs, "count": len(jobs), "stats": write_queue.stats()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Status of a write-behind job; wait=<seconds> holds the request until the job finishes (long poll)"""
+    job = await write_queue.wait(job_id, min(wait, JOB_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
 # ============================================================================
 # UNIFIED ENDPOINTS
 # ============================================================================
@@ -1740,7 +3540,7 @@ async def root():
                 "authenticated": authenticated
             },
             "calendar": {
-                "endpoints": ["/calendar/today", "/calendar/upcoming", "/calendar/list"],
+                "endpoints": ["/calendar/today", "/calendar/upcoming", "/calendar/range", "/calendar/aggregate", "/calendar/availability", "/calendar/list"],
                 "authenticated": authenticated
             },
             "contacts": {
@@ -1752,7 +3552,15 @@ async def root():
                 "authenticated": authenticated
             },
             "notes": {
-                "endpoints": ["/notes/all", "/notes/create", "/lists/create", "/notes/search"],
+                "endpoints": ["/notes/all", "/notes/create", "/lists/create", "/lists/items", "/notes/search"],
+                "authenticated": authenticated
+            },
+            "jobs": {
+                "endpoints": ["/jobs", "/jobs/{job_id}"],
+                "authenticated": authenticated
+            },
+            "search": {
+                "endpoints": ["/search", "/search/semantic"],
                 "authenticated": authenticated
             }
         },
@@ -1840,14 +3648,83 @@ async def search_unified(query: str = ""):
     """Search notes and lists - unified endpoint"""
     return await search_notes(query)
 
+# ============================================================================
+# BACKGROUND SYNC
+# ============================================================================
+
+background_tasks: List[asyncio.Task] = []
+
+async def periodic_sync(label: str, service_name: str, get_service: Callable, sync: Callable, interval: float):
+    """Run a local store's sync(service) every `interval` seconds while authenticated"""
+    while True:
+        try:
+            service = get_service()
+            if service:
+                await google_calls.run(service_name, sync, service, timeout=max(GOOGLE_CALL_TIMEOUT, interval))
+        except Exception as e:
+            logger.error(f"{label} sync failed: {e}")
+        await asyncio.sleep(interval)
+
+async def token_refresh_loop():
+    """Renew the access token shortly before it expires so requests never refresh inline"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            if service_manager.needs_refresh():
+                await loop.run_in_executor(None, service_manager.refresh)
+        except Exception as e:
+            logger.error(f"Token refresh failed: {e}")
+        await asyncio.sleep(TOKEN_CHECK_INTERVAL)
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the token refresher and background syncs of the local Google mirrors"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, index_contacts, contacts_store.all(), [])
+    logger.info(f"🔎 Contact name index built: {contact_index.stats()}")
+    await loop.run_in_executor(None, notes_mirror.build_index)
+    logger.info(f"🗒️ Notes full-text index built: {notes_mirror.index.stats()}")
+    background_tasks.append(asyncio.create_task(token_refresh_loop()))
+    background_tasks.append(asyncio.create_task(periodic_sync(
+        "Mailbox", "gmail", service_manager.get_gmail_service, mailbox.sync, GMAIL_SYNC_INTERVAL)))
+    background_tasks.append(asyncio.create_task(periodic_sync(
+        "Contacts", "people", service_manager.get_people_service, contacts_store.sync, CONTACTS_SYNC_INTERVAL)))
+    background_tasks.append(asyncio.create_task(periodic_sync(
+        "Calendar", "calendar", service_manager.get_calendar_service, calendar_cache.sync, CALENDAR_SYNC_INTERVAL)))
+    background_tasks.append(asyncio.create_task(periodic_sync(
+        "Notes", "drive", service_manager.get_drive_service, notes_mirror.sync, NOTES_SYNC_INTERVAL)))
+    logger.info(f"📬 Mailbox mirror sync every {GMAIL_SYNC_INTERVAL:.0f}s ({MAILBOX_DB})")
+    logger.info(f"👥 Contacts store sync every {CONTACTS_SYNC_INTERVAL:.0f}s ({CONTACTS_DB})")
+    logger.info(f"📅 Calendar cache sync every {CALENDAR_SYNC_INTERVAL:.0f}s for {', '.join(CALENDAR_IDS)} ({CALENDAR_DB})")
+    logger.info(f"🗒️ Notes index sync every {NOTES_SYNC_INTERVAL:.0f}s from the Drive change feed ({NOTES_DB})")
+    if EMBEDDINGS_AVAILABLE:
+        semantic_index.open_store()
+        background_tasks.append(asyncio.create_task(semantic_index_loop()))
+        logger.info(f"🧠 Semantic index update every {SEMANTIC_INTERVAL:.0f}s with {SEMANTIC_MODEL} ({SEMANTIC_DIR})")
+    else:
+        logger.warning("⚠️ sentence-transformers not installed - /search/semantic disabled")
+    write_queue.prune(JOB_RETENTION)
+    background_tasks.extend(write_queue.start())
+    logger.info(f"📝 List store writes coalesced over {LIST_COALESCE_WINDOW:.1f}s ({LISTS_DB})")
+    logger.info(f"🧾 Write-behind queue with {JOB_WORKERS} workers: {write_queue.stats()} ({JOBS_DB})")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background syncs"""
+    for task in background_tasks:
+        task.cancel()
+    google_calls.shutdown()
+
 if __name__ == "__main__":
     logger.info("🚀 Starting MCP Server (Gmail + Calendar + Contacts + YouTube + Drive) on http://0.0.0.0:8080")
     logger.info("🔐 Google OAuth2 authentication enabled for all services")
     logger.info("📧 Gmail endpoints: /gmail/recent, /gmail/unread")
-    logger.info("📅 Calendar endpoints: /calendar/today, /calendar/upcoming, /calendar/list, /calendar/create_event")
+    logger.info("📅 Calendar endpoints: /calendar/today, /calendar/upcoming, /calendar/range, /calendar/aggregate, /calendar/availability, /calendar/list, /calendar/create_event")
     logger.info("👥 Contacts endpoints: /contacts/all, /contacts/search, /contacts/find, /contacts/emails, /profile/me")
     logger.info("🎥 YouTube endpoints: /youtube/channel, /youtube/videos, /youtube/search, /youtube/playlists")
-    logger.info("📝 Drive endpoints: /notes/all, /notes/create, /lists/create, /notes/search")
+    logger.info("📝 Drive endpoints: /notes/all, /notes/create, /lists/create, /lists/items, /notes/search")
+    logger.info("🧾 Write job endpoints: /jobs, /jobs/{job_id}")
+    logger.info("🧠 Semantic search endpoint: /search/semantic")
     logger.info("🔑 Visit http://localhost:8080/auth/login to authenticate")
     logger.info("❌ NO MOCK DATA - Real Google services only!")
     uvicorn.run(app, host="0.0.0.0", port=8080)
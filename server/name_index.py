@@ -0,0 +1,311 @@
+"""
+Contact Name Index for Voice AI Agent
+Fuzzy and phonetic lookup of contact names as they come out of speech recognition
+"""
+
+import bisect
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Try to import Double Metaphone with error handling
+try:
+    from metaphone import doublemetaphone
+    METAPHONE_AVAILABLE = True
+except ImportError:
+    METAPHONE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Per-term similarity for each kind of match; the best signal wins
+PHONETIC_PRIMARY_SCORE = 0.85
+PHONETIC_SECONDARY_SCORE = 0.75
+PREFIX_SCORE = 0.8
+BKTREE_BELOW_SCORE = 0.8
+MIN_SCORE = 0.5
+
+# Lookup budget: index terms kept per query term, BK-tree hits and nodes visited per walk
+MAX_TERM_CANDIDATES = 12
+BKTREE_MAX_HITS = 8
+BKTREE_MAX_NODES = 64
+# Trigram matches below this Jaccard similarity are not worth a candidate slot; index terms read per query term
+TRIGRAM_MIN_SCORE = 0.3
+TRIGRAM_MAX_POSTINGS = 128
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"[^a-z0-9 ]+", " ", text.lower()).strip()
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def distance_from(pattern: str) -> Callable[[str], int]:
+    """
+    Levenshtein distance from a fixed pattern, using Myers' bit-parallel algorithm
+    (one pass of integer operations per character instead of a full DP table)
+    """
+    m = len(pattern)
+    if m == 0:
+        return len
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(pattern):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    def distance(text: str) -> int:
+        pv, mv, score = mask, 0, m
+        for ch in text:
+            eq = peq.get(ch, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+            if ph & last:
+                score += 1
+            elif mh & last:
+                score -= 1
+            ph = ((ph << 1) | 1) & mask
+            mh = (mh << 1) & mask
+            pv = mh | (~(xv | ph) & mask)
+            mv = ph & xv
+        return score
+
+    return distance
+
+def phonetic_codes(term: str) -> Tuple[str, str]:
+    """(primary, secondary) Double Metaphone codes, empty when the library is missing"""
+    if not METAPHONE_AVAILABLE or not term.isalpha():
+        return "", ""
+    return doublemetaphone(term)
+
+class BKTree:
+    """Burkhard-Keller tree over terms for edit-distance lookups"""
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, term: str):
+        self.size += 1
+        if self._root is None:
+            self._root = (term, {})
+            return
+        node = self._root
+        distance_to = distance_from(term)
+        while True:
+            distance = distance_to(node[0])
+            if distance == 0:
+                self.size -= 1
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (term, {})
+                return
+            node = child
+
+    def search(self, term: str, max_distance: int, max_hits: Optional[int] = None,
+               max_nodes: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Terms within max_distance edits of term; the walk stops after max_hits hits or max_nodes nodes"""
+        if self._root is None:
+            return []
+        found = []
+        distance_to = distance_from(term)
+        stack = [self._root]
+        visited = 0
+        while stack:
+            node_term, children = stack.pop()
+            distance = distance_to(node_term)
+            visited += 1
+            if distance <= max_distance:
+                found.append((node_term, distance))
+                if max_hits is not None and len(found) >= max_hits:
+                    break
+            if max_nodes is not None and visited >= max_nodes:
+                break
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+class NameIndex:
+    """
+    In-memory index over contact names combining Double Metaphone keys, a trigram index and a BK-tree.
+    Contacts are added, replaced and removed one at a time so the index follows the contact store.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contact_terms: Dict[str, Set[str]] = {}
+        self._contact_names: Dict[str, Set[str]] = {}
+        self._term_contacts: Dict[str, Set[str]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._term_grams: Dict[str, Set[str]] = {}
+        self._phonetic: Dict[str, Set[str]] = {}
+        self._bktree = BKTree()
+        self._sorted_terms: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._contact_terms)
+
+    def update(self, contact_id: str, names: Iterable[str]):
+        """Index (or re-index) a contact under all of its names"""
+        with self._lock:
+            self._remove(contact_id)
+            full_names = {normalize(name) for name in names} - {""}
+            terms = {term for name in full_names for term in name.split()}
+            self._contact_names[contact_id] = full_names
+            self._contact_terms[contact_id] = terms
+            for term in terms:
+                holders = self._term_contacts.setdefault(term, set())
+                if not holders:
+                    self._add_term(term)
+                holders.add(contact_id)
+
+    def remove(self, contact_id: str):
+        with self._lock:
+            self._remove(contact_id)
+
+    def _remove(self, contact_id: str):
+        for term in self._contact_terms.pop(contact_id, set()):
+            holders = self._term_contacts.get(term)
+            holders.discard(contact_id)
+            if not holders:
+                del self._term_contacts[term]
+                self._drop_term(term)
+        self._contact_names.pop(contact_id, None)
+
+        # The BK-tree cannot delete; rebuild it once most of its terms are gone
+        if self._bktree.size > 64 and self._bktree.size > 2 * len(self._term_contacts):
+            self._bktree = BKTree()
+            for term in self._term_contacts:
+                self._bktree.add(term)
+
+    def _add_term(self, term: str):
+        grams = trigrams(term)
+        self._term_grams[term] = grams
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(term)
+        for code in phonetic_codes(term):
+            if code:
+                self._phonetic.setdefault(code, set()).add(term)
+        self._bktree.add(term)
+        self._sorted_terms = None
+
+    def _drop_term(self, term: str):
+        for gram in self._term_grams.pop(term):
+            self._trigrams[gram].discard(term)
+        for code in phonetic_codes(term):
+            if code:
+                self._phonetic[code].discard(term)
+        self._sorted_terms = None
+
+    def _term_matches(self, query_term: str) -> Dict[str, Tuple[float, str]]:
+        """Candidate index terms for one query term with their best (score, match_type)"""
+        matches: Dict[str, Tuple[float, str]] = {}
+
+        def offer(term: str, score: float, match_type: str):
+            if term in self._term_contacts and score > matches.get(term, (0.0, ""))[0]:
+                matches[term] = (score, match_type)
+
+        if query_term in self._term_contacts:
+            offer(query_term, 1.0, "exact")
+
+        # Sounds alike
+        primary, secondary = phonetic_codes(query_term)
+        for code, score in ((primary, PHONETIC_PRIMARY_SCORE), (secondary, PHONETIC_SECONDARY_SCORE)):
+            for term in self._phonetic.get(code, ()) if code else ():
+                offer(term, score, "phonetic")
+
+        # Prefix ("sam" for "samantha")
+        if len(query_term) >= 2:
+            if self._sorted_terms is None:
+                self._sorted_terms = sorted(self._term_contacts)
+            start = bisect.bisect_left(self._sorted_terms, query_term)
+            for term in self._sorted_terms[start:start + 50]:
+                if not term.startswith(query_term):
+                    break
+                offer(term, PREFIX_SCORE, "prefix")
+
+        # Trigram overlap (Jaccard). A term scoring TRIGRAM_MIN_SCORE shares at least `needed` grams, so it holds
+        # one of the rarest len - needed + 1 query grams: only those postings are read, the most common skipped
+        query_grams = trigrams(query_term)
+        needed = max(2, math.ceil(TRIGRAM_MIN_SCORE * len(query_grams)))
+        rarest = sorted(query_grams, key=lambda gram: len(self._trigrams.get(gram, ())))[:len(query_grams) - needed + 1]
+        seen: Set[str] = set()
+        for gram in rarest:
+            for term in self._trigrams.get(gram, ()):
+                if term in seen:
+                    continue
+                if len(seen) >= TRIGRAM_MAX_POSTINGS:
+                    break
+                seen.add(term)
+                grams = self._term_grams[term]
+                count = len(query_grams & grams)
+                if count >= needed:
+                    offer(term, count / (len(query_grams) + len(grams) - count), "fuzzy")
+
+        # Edit distance walks a sizeable part of the BK-tree, so only pay for it when nothing cheaper
+        # matched well: one typo for short names, two for longer ones
+        if max((match[0] for match in matches.values()), default=0.0) < BKTREE_BELOW_SCORE:
+            max_distance = 1 if len(query_term) <= 4 else 2
+            for term, distance in self._bktree.search(query_term, max_distance, BKTREE_MAX_HITS, BKTREE_MAX_NODES):
+                offer(term, 1.0 - distance / max(len(term), len(query_term)), "fuzzy")
+
+        # Only the best few go on to be expanded to their contacts
+        if len(matches) > MAX_TERM_CANDIDATES:
+            matches = dict(heapq.nlargest(MAX_TERM_CANDIDATES, matches.items(), key=lambda item: item[1][0]))
+        return matches
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, object]]:
+        """Ranked contacts for a spoken name: [{"id", "score", "match_type"}]"""
+        normalized = normalize(query)
+        query_terms = normalized.split()
+        if not query_terms:
+            return []
+
+        with self._lock:
+            # Each query term is matched against the index once; contact -> per query term best (score, match_type)
+            term_matches = [self._term_matches(query_term) for query_term in query_terms]
+            per_contact: Dict[str, List[Tuple[float, str]]] = {}
+            for position, matches in enumerate(term_matches):
+                for term, match in matches.items():
+                    for contact_id in self._term_contacts[term]:
+                        best = per_contact.setdefault(contact_id, [(0.0, "")] * len(query_terms))
+                        if match[0] > best[position][0]:
+                            best[position] = match
+
+            results = []
+            for contact_id, best in per_contact.items():
+                if normalized in self._contact_names[contact_id]:
+                    score, match_type = 1.0, "exact"
+                else:
+                    score = sum(match[0] for match in best) / len(query_terms)
+                    if score < MIN_SCORE:
+                        continue
+                    match_type = min(best, key=lambda match: match[0])[1] or "partial"
+                    # Matching only part of a multi-word name is never as good as the whole name
+                    score = min(score, 0.99)
+                extra_terms = len(self._contact_terms[contact_id]) - len(query_terms)
+                results.append((score, -extra_terms, contact_id, match_type))
+
+        results.sort(reverse=True)
+        return [
+            {"id": contact_id, "score": round(score, 3), "match_type": match_type}
+            for score, _, contact_id, match_type in results[:limit]
+        ]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "contacts": len(self._contact_terms),
+            "terms": len(self._term_contacts),
+            "bktree_size": self._bktree.size,
+            "phonetic": METAPHONE_AVAILABLE
+        }
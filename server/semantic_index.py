@@ -0,0 +1,149 @@
+"""
+Semantic Index for Voice AI Agent
+Local CPU sentence embeddings and a memory-mapped vector matrix for meaning-based search
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Try to import sentence-transformers with error handling
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class LocalEmbedder:
+    """Sentence-transformers model on the CPU, loaded on first use; returns unit-length float32 vectors"""
+
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None, batch_size: int = 64):
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"🧠 Loading embedding model {self.model_name} (CPU)")
+                    self._model = SentenceTransformer(self.model_name, device="cpu", cache_folder=self.cache_dir)
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return self._load().get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self._load().encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                      convert_to_numpy=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+class VectorMatrix:
+    """
+    Unit-length vectors stored row by row in a memory-mapped float32 file, so the matrix lives in the
+    page cache instead of the heap and survives restarts. The file grows by doubling; removed rows are
+    marked dead and reused. Cosine search over every live row is a single matrix-vector product.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        self._map(max(1024, os.path.getsize(path) // (4 * dimension)))
+        self._rows: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = [None] * self.capacity
+        self._labels = np.zeros(self.capacity, dtype=np.uint8)
+        self._alive = np.zeros(self.capacity, dtype=bool)
+        self._free: List[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _map(self, capacity: int):
+        with open(self.path, "r+b") as matrix_file:
+            if os.path.getsize(self.path) < capacity * 4 * self.dimension:
+                matrix_file.truncate(capacity * 4 * self.dimension)
+        self._matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        self.capacity = capacity
+
+    def _grow(self, needed: int):
+        capacity = max(needed, 2 * self.capacity)
+        self._matrix.flush()
+        self._map(capacity)
+        grown = capacity - len(self._keys)
+        self._keys.extend([None] * grown)
+        self._labels = np.concatenate([self._labels, np.zeros(grown, dtype=np.uint8)])
+        self._alive = np.concatenate([self._alive, np.zeros(grown, dtype=bool)])
+
+    def restore(self, rows: Iterable[Tuple[str, int, int]]):
+        """Re-attach (key, row, label) assignments persisted by the owner after a restart"""
+        with self._lock:
+            for key, row, label in rows:
+                if row >= self.capacity:
+                    self._grow(row + 1)
+                self._rows[key] = row
+                self._keys[row] = key
+                self._labels[row] = label
+                self._alive[row] = True
+                self._size = max(self._size, row + 1)
+            self._free = [row for row in range(self._size) if not self._alive[row]]
+
+    def put(self, key: str, vector: np.ndarray, label: int = 0) -> int:
+        """Store (or overwrite) the vector for key; returns its row"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                else:
+                    row = self._size
+                    if row >= self.capacity:
+                        self._grow(row + 1)
+                    self._size += 1
+                self._rows[key] = row
+                self._keys[row] = key
+            self._matrix[row] = vector
+            self._labels[row] = label
+            self._alive[row] = True
+            return row
+
+    def remove(self, key: str):
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is not None:
+                self._keys[row] = None
+                self._alive[row] = False
+                self._free.append(row)
+
+    def search(self, query: np.ndarray, limit: int, labels: Optional[Iterable[int]] = None) -> List[Tuple[str, float]]:
+        """(key, cosine similarity) of the closest live rows, best first"""
+        with self._lock:
+            size = self._size
+            if not size:
+                return []
+            scores = self._matrix[:size] @ query.astype(np.float32)
+            mask = self._alive[:size]
+            if labels is not None:
+                mask = mask & np.isin(self._labels[:size], list(labels))
+            scores[~mask] = -np.inf
+            limit = min(limit, int(mask.sum()))
+            if limit <= 0:
+                return []
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top])]
+            return [(self._keys[row], float(scores[row])) for row in top]
+
+    def flush(self):
+        with self._lock:
+            self._matrix.flush()
@@ -6,11 +6,11 @@ Matches GitHub repository patterns for Android app compatibility
 import os
 import json
 import base64
-import tempfile
+import asyncio
 import logging
-import requests
 import aiohttp
 from datetime import datetime
+from typing import Optional
 from fastapi import FastAPI, Request, File, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -23,6 +23,19 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
 JUNE_VOICE = "female_1"
 MCP_SERVER_URL = "http://localhost:8080"
+WHISPER_SERVER_URL = "http://localhost:5004"
+
+# Whisper mode: "http" calls the Whisper server, "inprocess" loads the model in the gateway
+WHISPER_MODE = os.getenv("WHISPER_MODE", "http").lower()
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "pytorch")
+
+# Per-upstream connection limits and timeouts (seconds) for the shared HTTP pool
+UPSTREAM_LIMITS = {
+    "whisper": {"limit": int(os.getenv("WHISPER_POOL_SIZE", "8")), "timeout": 30, "connect_timeout": 2},
+    "mcp": {"limit": int(os.getenv("MCP_POOL_SIZE", "32")), "timeout": 10, "connect_timeout": 2},
+}
+HTTP_KEEPALIVE_SECONDS = 60
 
 app = FastAPI()
 app.add_middleware(
@@ -33,6 +46,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class HTTPClientPool:
+    """App-scoped keep-alive aiohttp sessions, one per upstream service"""
+
+    def __init__(self, upstreams: dict):
+        self._upstreams = upstreams
+        self._sessions = {}
+
+    async def start(self):
+        """Open one pooled session per upstream"""
+        for name, config in self._upstreams.items():
+            connector = aiohttp.TCPConnector(
+                limit=config["limit"],
+                limit_per_host=config["limit"],
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=config["timeout"],
+                sock_connect=config["connect_timeout"],
+            )
+            self._sessions[name] = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            logger.info(f"HTTP pool ready for {name} (limit={config['limit']}, timeout={config['timeout']}s)")
+
+    async def close(self):
+        """Close all pooled sessions"""
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    def session(self, name: str) -> aiohttp.ClientSession:
+        """Get the pooled session for an upstream"""
+        if name not in self._sessions:
+            raise RuntimeError(f"HTTP pool for '{name}' is not started")
+        return self._sessions[name]
+
+# Global HTTP client pool
+http_pool = HTTPClientPool(UPSTREAM_LIMITS)
+
+# In-process Whisper engine (only when WHISPER_MODE=inprocess)
+whisper_engine = None
+
+async def load_inprocess_whisper():
+    """Load the Whisper engine inside the gateway, keeping the HTTP path as fallback"""
+    global whisper_engine
+    try:
+        from whisper_engine import WhisperEngine
+    except ImportError as e:
+        logger.warning(f"In-process Whisper unavailable ({e}) - using Whisper server")
+        return
+    
+    engine = WhisperEngine(WHISPER_MODEL, backend=WHISPER_BACKEND)
+    if await engine.load_async():
+        whisper_engine = engine
+    else:
+        engine.shutdown()
+        logger.warning("In-process Whisper failed to load - using Whisper server")
+
+@app.on_event("startup")
+async def startup_event():
+    """Create the shared HTTP client pool and optional in-process Whisper engine"""
+    await http_pool.start()
+    if WHISPER_MODE == "inprocess":
+        await load_inprocess_whisper()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the shared HTTP client pool"""
+    await http_pool.close()
+    if whisper_engine is not None:
+        whisper_engine.shutdown()
+
 # Simple response creators (GitHub style)
 def create_speak_response(message: str, voice: str = JUNE_VOICE):
     """Create a simple speak response like GitHub implementation"""
@@ -156,29 +239,25 @@ async def handle_gmail_query(user_query: str):
         try:
             # Try to get email summary from MCP server
             logger.info("Requesting email summary from MCP server")
-            mcp_response = requests.get(
-                "http://localhost:8080/gmail/recent",
-                timeout=10
-            )
+            async with http_pool.session("mcp").get(f"{MCP_SERVER_URL}/gmail/recent") as mcp_response:
+                if mcp_response.status != 200:
+                    logger.error(f"MCP server error: {mcp_response.status}")
+                    return create_speak_response("Gmail service returned an error.")
+                result = await mcp_response.json()
             
-            if mcp_response.status_code == 200:
-                result = mcp_response.json()
-                logger.info(f"MCP email response: {result}")
-                
-                emails = result.get("emails", [])
-                if emails:
-                    email_count = len(emails)
-                    if email_count == 1:
-                        return create_speak_response(f"You have {email_count} recent email. The latest is from {emails[0].get('sender', 'unknown')} with subject '{emails[0].get('subject', 'no subject')}'")
-                    else:
-                        return create_speak_response(f"You have {email_count} recent emails. The latest is from {emails[0].get('sender', 'unknown')} with subject '{emails[0].get('subject', 'no subject')}'")
+            logger.info(f"MCP email response: {result}")
+            
+            emails = result.get("emails", [])
+            if emails:
+                email_count = len(emails)
+                if email_count == 1:
+                    return create_speak_response(f"You have {email_count} recent email. The latest is from {emails[0].get('sender', 'unknown')} with subject '{emails[0].get('subject', 'no subject')}'")
                 else:
-                    return create_speak_response("No recent emails found.")
+                    return create_speak_response(f"You have {email_count} recent emails. The latest is from {emails[0].get('sender', 'unknown')} with subject '{emails[0].get('subject', 'no subject')}'")
             else:
-                logger.error(f"MCP server error: {mcp_response.status_code}")
-                return create_speak_response("Gmail service returned an error.")
+                return create_speak_response("No recent emails found.")
                 
-        except requests.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"MCP server connection error: {e}")
             return create_speak_response("Cannot connect to Gmail service. Make sure MCP server is running.")
     
@@ -193,6 +272,32 @@ async def handle_gmail_query(user_query: str):
         "app_name": "gmail"
     }
 
+async def find_free_slot(window_start, window_end, duration_minutes: int, attendee: str = ""):
+    """Ask the MCP server for the first free slot in a window; None if there is none or the lookup fails"""
+    params = {
+        "duration_minutes": duration_minutes,
+        "start": window_start.isoformat(),
+        "end": window_end.isoformat(),
+        "count": 1
+    }
+    if attendee:
+        params["attendees"] = attendee
+    
+    try:
+        async with http_pool.session("mcp").get(f"{MCP_SERVER_URL}/calendar/availability", params=params) as response:
+            if response.status != 200:
+                logger.warning(f"Availability lookup failed: HTTP {response.status}")
+                return None
+            result = await response.json()
+            slots = result.get("slots", [])
+            if not slots:
+                return None
+            logger.info(f"📅 First free slot: {slots[0]['readable']}")
+            return datetime.fromisoformat(slots[0]["start"])
+    except Exception as e:
+        logger.error(f"Error looking up availability: {e}")
+        return None
+
 async def extract_meeting_details(user_query: str):
     """Extract meeting details from natural language using AI parsing"""
     import re
@@ -252,8 +357,11 @@ async def extract_meeting_details(user_query: str):
             
         start_time = base_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
     else:
-        # Default to next hour if no time specified
-        start_time = base_date.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        # No time given: take the first conflict-free slot that day, else fall back to the next hour
+        day_start = base_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        start_time = await find_free_slot(day_start, day_start + timedelta(days=1), duration_minutes, attendee)
+        if start_time is None:
+            start_time = base_date.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
     
     end_time = start_time + timedelta(minutes=duration_minutes)
     
@@ -296,20 +404,18 @@ async def call_mcp_calendar_create(meeting_details: dict):
         if meeting_details.get("attendee"):
             payload["location"] = f"Meeting with {meeting_details['attendee']}"
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "http://localhost:8080/calendar/create_event",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    logger.info(f"MCP calendar response: {result}")
-                    return result
-                else:
-                    error_text = await response.text()
-                    logger.error(f"MCP calendar error {response.status}: {error_text}")
-                    return {"success": False, "detail": f"HTTP {response.status}: {error_text}"}
+        async with http_pool.session("mcp").post(
+            f"{MCP_SERVER_URL}/calendar/create_event",
+            json=payload
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                logger.info(f"MCP calendar response: {result}")
+                return result
+            else:
+                error_text = await response.text()
+                logger.error(f"MCP calendar error {response.status}: {error_text}")
+                return {"success": False, "detail": f"HTTP {response.status}: {error_text}"}
                     
     except Exception as e:
         logger.error(f"Error calling MCP calendar service: {e}")
@@ -448,29 +554,28 @@ Note: Please fill in the bracketed sections with your specific information."""
             "content": note_content
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{MCP_SERVER_URL}/notes/create", json=mcp_data) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    if "resume" in text_lower:
-                        speak_message = "I've created a resume draft template for you in your notes. You can fill in your specific details."
-                    else:
-                        speak_message = f"I've created a note: {note_content}"
-                    
-                    return {
-                        "action": "notes",
-                        "message": f"Created {'resume draft' if 'resume' in text_lower else 'note'}: {note_content[:50]}...",
-                        "note_id": result.get("id", ""),
-                        "speak": speak_message
-                    }
+        async with http_pool.session("mcp").post(f"{MCP_SERVER_URL}/notes/create", json=mcp_data) as response:
+            if response.status == 200:
+                result = await response.json()
+                if "resume" in text_lower:
+                    speak_message = "I've created a resume draft template for you in your notes. You can fill in your specific details."
                 else:
-                    logger.error(f"MCP server error: {response.status}")
-                    return {
-                        "action": "notes",
-                        "message": "Error creating note",
-                        "speak": "Sorry, I had trouble creating your note."
-                    }
-                    
+                    speak_message = f"I've created a note: {note_content}"
+                
+                return {
+                    "action": "notes",
+                    "message": f"Created {'resume draft' if 'resume' in text_lower else 'note'}: {note_content[:50]}...",
+                    "note_id": result.get("id", ""),
+                    "speak": speak_message
+                }
+            else:
+                logger.error(f"MCP server error: {response.status}")
+                return {
+                    "action": "notes",
+                    "message": "Error creating note",
+                    "speak": "Sorry, I had trouble creating your note."
+                }
+                
     except Exception as e:
         logger.error(f"Error creating note: {e}")
         return {
@@ -558,26 +663,25 @@ async def handle_list_request(user_query: str):
             "append": True
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{MCP_SERVER_URL}/lists/create", json=mcp_data) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    items_text = ", ".join(items)
-                    return {
-                        "action": "list",
-                        "message": f"Added to {list_type.lower()}: {items_text}",
-                        "list_id": result.get("id", ""),
-                        "items": items,
-                        "speak": f"I've added {items_text} to your {list_type.lower()}"
-                    }
-                else:
-                    logger.error(f"MCP server error: {response.status}")
-                    return {
-                        "action": "list",
-                        "message": "Error creating list",
-                        "speak": "Sorry, I had trouble creating your list."
-                    }
-                    
+        async with http_pool.session("mcp").post(f"{MCP_SERVER_URL}/lists/create", json=mcp_data) as response:
+            if response.status == 200:
+                result = await response.json()
+                items_text = ", ".join(items)
+                return {
+                    "action": "list",
+                    "message": f"Added to {list_type.lower()}: {items_text}",
+                    "list_id": result.get("id", ""),
+                    "items": items,
+                    "speak": f"I've added {items_text} to your {list_type.lower()}"
+                }
+            else:
+                logger.error(f"MCP server error: {response.status}")
+                return {
+                    "action": "list",
+                    "message": "Error creating list",
+                    "speak": "Sorry, I had trouble creating your list."
+                }
+                
     except Exception as e:
         logger.error(f"Error creating list: {e}")
         return {
@@ -609,6 +713,48 @@ async def process_query(text: str):
         # General response
         return create_speak_response("I'm here to help with calls, emails, calendar, messages, notes, and lists.")
 
+async def transcribe_with_whisper(audio_data: bytes) -> Optional[str]:
+    """Transcribe in-process when the engine is loaded, otherwise via the Whisper service"""
+    if whisper_engine is not None:
+        try:
+            result = await whisper_engine.transcribe_bytes_async(audio_data)
+            return result["text"].strip()
+        except Exception as e:
+            logger.error(f"In-process transcription failed, falling back to Whisper server: {e}")
+    
+    form = aiohttp.FormData()
+    form.add_field("audio", audio_data, filename="audio.wav", content_type="audio/wav")
+    
+    async with http_pool.session("whisper").post(f"{WHISPER_SERVER_URL}/transcribe", data=form) as whisper_response:
+        if whisper_response.status != 200:
+            logger.error(f"Whisper service error: {whisper_response.status}")
+            return None
+        result = await whisper_response.json()
+    
+    return result["text"]
+
+async def transcribe_and_process(audio_data: bytes):
+    """Transcribe audio and route the transcription through the query pipeline"""
+    try:
+        transcription = await transcribe_with_whisper(audio_data)
+        if transcription is None:
+            return create_speak_response("Speech recognition service unavailable.")
+        if not transcription.strip():
+            # Voice activity detection found no speech in the clip
+            return create_speak_response("I didn't catch that. Please try again.")
+        
+        logger.info(f"🎤 Voice transcribed: '{transcription}'")
+        
+        # Process query
+        return await process_query(transcription)
+        
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error connecting to Whisper service: {e}")
+        return create_speak_response("Speech recognition service unavailable.")
+    except Exception as e:
+        logger.error(f"Error processing voice: {e}")
+        return create_speak_response("Sorry, I couldn't process your request.")
+
 # Main endpoints
 @app.post("/query")
 async def process_query_endpoint(request: dict):
@@ -661,45 +807,7 @@ async def process_voice(request: Request):
         if not audio_data:
             return create_speak_response("No audio data received.")
         
-        # Save audio to temporary file
-        temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        temp_audio.write(audio_data)
-        temp_audio.close()
-        logger.info(f"Audio file saved: {temp_audio.name}, size: {len(audio_data)} bytes")
-        
-        try:
-            # Transcribe with Whisper
-            with open(temp_audio.name, "rb") as audio_file:
-                whisper_response = requests.post(
-                    "http://localhost:5004/transcribe",
-                    files={"audio": ("audio.wav", audio_file, "audio/wav")},
-                    timeout=30
-                )
-            
-            if whisper_response.status_code == 200:
-                transcription = whisper_response.json()["text"]
-                logger.info(f"🎤 Voice transcribed: '{transcription}'")
-                
-                # Process query
-                result = await process_query(transcription)
-                return result
-            else:
-                logger.error(f"Whisper service error: {whisper_response.status_code}")
-                return create_speak_response("Speech recognition service unavailable.")
-            
-        except requests.RequestException as e:
-            logger.error(f"Error connecting to Whisper service: {e}")
-            return create_speak_response("Speech recognition service unavailable.")
-        except Exception as e:
-            logger.error(f"Error processing voice: {e}")
-            return create_speak_response("Sorry, I couldn't process your request.")
-        
-        finally:
-            # Clean up temp file
-            try:
-                os.unlink(temp_audio.name)
-            except:
-                pass
+        return await transcribe_and_process(audio_data)
                 
     except Exception as e:
         logger.error(f"Error in voice endpoint: {e}")
@@ -717,45 +825,7 @@ async def process_voice_json(request: Request):
         audio_data = base64.b64decode(data["audio"])
         logger.info(f"JSON audio size: {len(audio_data)} bytes")
         
-        # Save audio to temporary file
-        temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        temp_audio.write(audio_data)
-        temp_audio.close()
-        logger.info(f"Audio file saved: {temp_audio.name}, size: {len(audio_data)} bytes")
-        
-        try:
-            # Transcribe with Whisper
-            with open(temp_audio.name, "rb") as audio_file:
-                whisper_response = requests.post(
-                    "http://localhost:5004/transcribe",
-                    files={"audio": ("audio.wav", audio_file, "audio/wav")},
-                    timeout=30
-                )
-            
-            if whisper_response.status_code == 200:
-                transcription = whisper_response.json()["text"]
-                logger.info(f"🎤 Voice transcribed: '{transcription}'")
-                
-                # Process query
-                result = await process_query(transcription)
-                return result
-            else:
-                logger.error(f"Whisper service error: {whisper_response.status_code}")
-                return create_speak_response("Speech recognition service unavailable.")
-            
-        except requests.RequestException as e:
-            logger.error(f"Error connecting to Whisper service: {e}")
-            return create_speak_response("Speech recognition service unavailable.")
-        except Exception as e:
-            logger.error(f"Error processing voice: {e}")
-            return create_speak_response("Sorry, I couldn't process your request.")
-        
-        finally:
-            # Clean up temp file
-            try:
-                os.unlink(temp_audio.name)
-            except:
-                pass
+        return await transcribe_and_process(audio_data)
                 
     except Exception as e:
         logger.error(f"Error in voice_json endpoint: {e}")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# Checks that the energy VAD keeps speech and rejects clips that are only noise
+
+import numpy as np
+
+from whisper_engine import SAMPLE_RATE, trim_silence
+
+def speech_like(seconds: float, level: float = 0.2) -> np.ndarray:
+    """A voiced tone with a syllable-rate envelope, like continuous speech"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (level * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+def noise(seconds: float, rms: float) -> np.ndarray:
+    return (rms * np.random.default_rng(0).standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+def test_noise_only_is_rejected():
+    for rms in (0.01, 0.03):
+        trimmed, report = trim_silence(noise(5.0, rms))
+        assert not report["speech_detected"], f"noise at RMS {rms} detected as speech: {report}"
+        assert len(trimmed) == 0
+    print("✅ Noise-only clips rejected")
+
+def test_silence_is_rejected():
+    _, report = trim_silence(np.zeros(2 * SAMPLE_RATE, dtype=np.float32))
+    assert not report["speech_detected"]
+    print("✅ Silence rejected")
+
+def test_continuous_speech_is_kept():
+    _, report = trim_silence(speech_like(3.0))
+    assert report["speech_detected"]
+    assert report["speech_seconds"] >= 2.9
+    print("✅ Continuous speech kept")
+
+def test_leading_noise_is_trimmed():
+    clip = np.concatenate([noise(1.0, 0.002), speech_like(1.0) + noise(1.0, 0.002)])
+    _, report = trim_silence(clip)
+    assert report["speech_detected"]
+    assert report["trimmed_leading_seconds"] >= 0.7
+    print("✅ Leading noise trimmed")
+
+if __name__ == "__main__":
+    test_noise_only_is_rejected()
+    test_silence_is_rejected()
+    test_continuous_speech_is_kept()
+    test_leading_noise_is_trimmed()
@@ -0,0 +1,131 @@
+"""
+Full-Text Index for Voice AI Agent
+BM25-ranked keyword search with snippets over the MCP server's locally mirrored notes
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Hashable, List, Set, Tuple
+
+from name_index import normalize
+
+# Okapi BM25 parameters: term-frequency saturation and document-length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "i", "in", "is", "it", "me", "my",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "what", "with", "about", "did"
+}
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def stem(term: str) -> str:
+    """Fold common English plurals ("lists" -> "list", "batteries" -> "battery")"""
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if len(term) > 3 and term.endswith("s") and not term.endswith(("ss", "us", "is")):
+        return term[:-1]
+    return term
+
+def tokenize(text: str) -> List[str]:
+    # Single letters are mostly split contractions and initials ("dentist's" -> "dentist s")
+    return [stem(term) for term in normalize(text).split()
+            if term not in STOPWORDS and (len(term) > 1 or term.isdigit())]
+
+def snippet(text: str, query_terms: Set[str], width: int = 160) -> str:
+    """The stretch of text (about `width` characters) holding the most distinct query terms"""
+    hits = [(match.start(), stem(normalize(match.group()))) for match in WORD_RE.finditer(text)]
+    hits = [(position, term) for position, term in hits if term in query_terms]
+
+    start = 0
+    if hits:
+        # Two pointers over the hit positions: the window starting at a hit that covers the most distinct terms
+        best = 0
+        window: Counter = Counter()
+        right = 0
+        for position, term in hits:
+            while right < len(hits) and hits[right][0] < position + width:
+                window[hits[right][1]] += 1
+                right += 1
+            if len(window) > best:
+                best, start = len(window), position
+            window[term] -= 1
+            if not window[term]:
+                del window[term]
+        # Lead in with a little context, starting on a word boundary
+        lead = max(0, start - width // 4)
+        space = text.find(" ", lead, start)
+        start = 0 if lead == 0 else (space + 1 if space != -1 else start)
+
+    end = min(len(text), start + width)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+    return ("…" if start > 0 else "") + " ".join(text[start:end].split()) + ("…" if end < len(text) else "")
+
+class BM25Index:
+    """
+    In-memory inverted index (term -> {document: term frequency}) ranked with Okapi BM25.
+    Documents are added, replaced and removed one at a time so the index follows its source store.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._lengths: Dict[Hashable, int] = {}
+        self._doc_terms: Dict[Hashable, Set[str]] = {}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def update(self, doc_id: Hashable, text: str):
+        """Index (or re-index) a document"""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove(doc_id)
+            self._lengths[doc_id] = sum(terms.values())
+            self._doc_terms[doc_id] = set(terms)
+            self._total_length += self._lengths[doc_id]
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, doc_id: Hashable):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: Hashable):
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id, 0)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Hashable, float]]:
+        """Best matching (document, score) pairs, highest score first"""
+        query_terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._lengths)
+            if not count or not query_terms:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[Hashable, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self._lengths), "terms": len(self._postings)}
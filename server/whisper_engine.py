@@ -0,0 +1,1065 @@
+"""
+Whisper Transcription Engine for Voice AI Agent
+Decodes uploaded audio in memory and runs Whisper without temp files
+"""
+
+import asyncio
+import gc
+import logging
+import multiprocessing
+import os
+import struct
+import subprocess
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Try to import the inference backends with error handling
+try:
+    import whisper
+    WHISPER_AVAILABLE = True
+except ImportError:
+    WHISPER_AVAILABLE = False
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Whisper models expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Known Whisper models; memory_mb is the approximate resident size of the fp32 PyTorch model
+MODEL_CATALOG = {
+    "tiny": {"size": "~39 MB", "accuracy": "low", "speed": "fast", "memory_mb": 150},
+    "base": {"size": "~74 MB", "accuracy": "medium", "speed": "medium", "memory_mb": 300},
+    "small": {"size": "~244 MB", "accuracy": "good", "speed": "medium", "memory_mb": 1000},
+    "medium": {"size": "~769 MB", "accuracy": "better", "speed": "slow", "memory_mb": 3000},
+    "large": {"size": "~1550 MB", "accuracy": "best", "speed": "slowest", "memory_mb": 6000}
+}
+
+# Inference backend: "pytorch" (openai-whisper) or "ctranslate2" (faster-whisper, int8 on CPU)
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "pytorch").lower()
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+
+# Voice activity detection settings
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+VAD_FRAME_MS = 30
+VAD_MIN_THRESHOLD = float(os.getenv("VAD_MIN_THRESHOLD", "0.005"))  # ~ -46 dBFS
+VAD_NOISE_FACTOR = 3.0
+VAD_PADDING_SECONDS = 0.2
+VAD_MIN_SPEECH_SECONDS = 0.25
+# Loud-to-quiet frame ratio above which a clip has real dynamic range (speech), not steady noise
+VAD_MIN_DYNAMIC_RANGE = 1.5
+
+def parse_pcm16_wav(audio_data: bytes) -> Optional[np.ndarray]:
+    """
+    Read a 16 kHz mono 16-bit PCM WAV (what the Android app records) straight from bytes.
+    Returns None for any other format so the caller can fall back to ffmpeg.
+    """
+    if len(audio_data) < 12 or audio_data[0:4] != b"RIFF" or audio_data[8:12] != b"WAVE":
+        return None
+
+    fmt_ok = False
+    offset = 12
+    while offset + 8 <= len(audio_data):
+        chunk_id = audio_data[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", audio_data, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or body + 16 > len(audio_data):
+                return None
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", audio_data, body)
+            fmt_ok = audio_format == 1 and channels == 1 and sample_rate == SAMPLE_RATE and bits == 16
+            if not fmt_ok:
+                return None
+        elif chunk_id == b"data":
+            if not fmt_ok:
+                return None
+            # Streaming writers leave the size as 0 or 0xFFFFFFFF; trust the bytes we actually have
+            end = len(audio_data) if chunk_size in (0, 0xFFFFFFFF) else min(body + chunk_size, len(audio_data))
+            end -= (end - body) % 2
+            return np.frombuffer(audio_data, dtype="<i2", count=(end - body) // 2, offset=body).astype(np.float32) / 32768.0
+
+        # Chunks are word-aligned
+        offset = body + chunk_size + (chunk_size & 1)
+
+    return None
+
+def _ffmpeg_decode(source: str, audio_data: Optional[bytes] = None) -> bytes:
+    """Run ffmpeg on `source` (pipe:0 fed with audio_data, or a file path) and return 16 kHz mono s16le PCM"""
+    cmd = [
+        "ffmpeg",
+        "-i", source,
+        "-threads", "0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(SAMPLE_RATE),
+        "pipe:1"
+    ]
+    try:
+        return subprocess.run(cmd, input=audio_data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+
+def decode_audio(audio_data: bytes) -> np.ndarray:
+    """
+    Decode audio bytes to a 16 kHz mono float32 array.
+    16 kHz mono PCM WAV is read directly; everything else is piped through ffmpeg, falling back to a
+    temporary file for containers ffmpeg cannot read from a pipe (MP4/M4A with the moov atom at the end).
+    """
+    audio = parse_pcm16_wav(audio_data)
+    if audio is not None:
+        logger.debug(f"Decoded {len(audio)} samples via PCM WAV fast path")
+        return audio
+
+    try:
+        out = _ffmpeg_decode("pipe:0", audio_data)
+    except RuntimeError as pipe_error:
+        out = None
+        logger.debug(f"ffmpeg could not decode from a pipe, retrying from a file: {pipe_error}")
+    if not out:
+        # A pipe cannot seek, so a trailing moov atom is unreachable; a file can
+        fd, path = tempfile.mkstemp(prefix="whisper_", suffix=".audio")
+        try:
+            with os.fdopen(fd, "wb") as audio_file:
+                audio_file.write(audio_data)
+            out = _ffmpeg_decode(path)
+        finally:
+            os.unlink(path)
+
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+# ============================================================================
+# INFERENCE BACKENDS
+# ============================================================================
+
+class TranscriptionModel(ABC):
+    """A loaded model of one inference engine"""
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **options) -> dict:
+        """openai-whisper style result: text, language and segments (start, end, text, avg_logprob, no_speech_prob)"""
+
+class WhisperBackend(ABC):
+    """
+    Loads models for one inference engine. A subclass missing one of the abstract
+    methods fails when it is instantiated (at import, in BACKENDS) rather than on first use.
+    """
+
+    name = "base"
+    description = ""
+    memory_factor = 1.0  # resident size relative to the fp32 PyTorch model
+    speed_factor = 1.0   # decode time relative to the fp32 PyTorch model
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether the engine's package is installed"""
+
+    @abstractmethod
+    def load(self, model_name: str, threads: Optional[int] = None) -> TranscriptionModel:
+        """Load a model for this engine"""
+
+    def info(self) -> dict:
+        return {"name": self.name, "description": self.description, "available": self.available()}
+
+class PyTorchModel(TranscriptionModel):
+    """openai-whisper model; decodes in fp32 since we run on CPU"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **options) -> dict:
+        return self.model.transcribe(audio, language=language, fp16=False, **options)
+
+class PyTorchBackend(WhisperBackend):
+    name = "pytorch"
+    description = "openai-whisper on PyTorch (fp32 on CPU)"
+
+    def available(self) -> bool:
+        return WHISPER_AVAILABLE
+
+    def load(self, model_name: str, threads: Optional[int] = None):
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return PyTorchModel(whisper.load_model(model_name))
+
+class CTranslate2Model(TranscriptionModel):
+    """faster-whisper model adapted to the openai-whisper result format"""
+
+    # Options that both engines accept under the same name
+    SUPPORTED_OPTIONS = ("temperature", "beam_size", "best_of", "initial_prompt",
+                         "condition_on_previous_text", "compression_ratio_threshold",
+                         "log_prob_threshold", "no_speech_threshold")
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **options) -> dict:
+        if "logprob_threshold" in options:
+            options["log_prob_threshold"] = options.pop("logprob_threshold")
+        kwargs = {key: value for key, value in options.items()
+                  if key in self.SUPPORTED_OPTIONS and value is not None}
+
+        segments, info = self.model.transcribe(audio, language=language, **kwargs)
+        segments = [
+            {
+                "id": segment.id,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "avg_logprob": segment.avg_logprob,
+                "no_speech_prob": segment.no_speech_prob,
+                "compression_ratio": segment.compression_ratio,
+                "temperature": segment.temperature
+            }
+            for segment in segments  # segments is a generator; decoding happens here
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "language": info.language,
+            "segments": segments
+        }
+
+class CTranslate2Backend(WhisperBackend):
+    name = "ctranslate2"
+    description = f"faster-whisper on CTranslate2 ({WHISPER_COMPUTE_TYPE} on CPU)"
+    memory_factor = 0.35 if WHISPER_COMPUTE_TYPE.startswith("int8") else 1.0
+    speed_factor = 0.3
+
+    def available(self) -> bool:
+        return FASTER_WHISPER_AVAILABLE
+
+    def load(self, model_name: str, threads: Optional[int] = None):
+        model = WhisperModel(model_name, device="cpu", compute_type=WHISPER_COMPUTE_TYPE,
+                             cpu_threads=threads or 0)
+        return CTranslate2Model(model)
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (PyTorchBackend(), CTranslate2Backend())
+}
+
+def get_backend(name: Optional[str] = None) -> WhisperBackend:
+    """Look up a backend by name, defaulting to WHISPER_BACKEND"""
+    name = (name or WHISPER_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown Whisper backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+# ============================================================================
+# VOICE ACTIVITY DETECTION
+# ============================================================================
+
+def trim_silence(audio: np.ndarray) -> Tuple[np.ndarray, dict]:
+    """
+    Energy-based VAD over 30 ms frames. The threshold adapts to the clip's noise floor,
+    voiced frames are padded by 200 ms, and everything outside the padded regions is
+    dropped (leading, trailing and long internal pauses).
+    Returns the trimmed audio and a report; an empty array means no speech was found.
+    """
+    frame = SAMPLE_RATE * VAD_FRAME_MS // 1000
+    n_frames = len(audio) // frame
+    report = {
+        "original_seconds": round(len(audio) / SAMPLE_RATE, 2),
+        "speech_seconds": 0.0,
+        "trimmed_leading_seconds": 0.0,
+        "trimmed_trailing_seconds": 0.0,
+        "trimmed_seconds": round(len(audio) / SAMPLE_RATE, 2),
+        "speech_detected": False
+    }
+    if n_frames == 0:
+        return audio[:0], report
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    noise_floor, loud = (float(value) for value in np.percentile(rms, [10, 90]))
+    threshold = noise_floor * VAD_NOISE_FACTOR
+    if loud / max(noise_floor, 1e-6) > VAD_MIN_DYNAMIC_RANGE:
+        # When speech fills most of the clip the 10th percentile is speech, not noise; cap the
+        # threshold below the loud frames so a continuously voiced clip is not dropped as silence.
+        # Steady noise has no such range and keeps the noise-floor threshold, so it is rejected.
+        threshold = min(threshold, 0.5 * loud)
+    threshold = max(VAD_MIN_THRESHOLD, threshold)
+    voiced = rms > threshold
+
+    if voiced.sum() * frame < VAD_MIN_SPEECH_SECONDS * SAMPLE_RATE:
+        return audio[:0], report
+
+    pad = int(VAD_PADDING_SECONDS * 1000 / VAD_FRAME_MS)
+    keep = np.convolve(voiced.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same") > 0
+
+    trimmed = frames[keep].reshape(-1)
+    if keep[-1]:
+        trimmed = np.concatenate([trimmed, audio[n_frames * frame:]])
+
+    first = int(np.argmax(keep))
+    last = n_frames - 1 - int(np.argmax(keep[::-1]))
+    report.update({
+        "speech_seconds": round(len(trimmed) / SAMPLE_RATE, 2),
+        "trimmed_leading_seconds": round(first * frame / SAMPLE_RATE, 2),
+        "trimmed_trailing_seconds": round((len(audio) - (last + 1) * frame) / SAMPLE_RATE, 2) if not keep[-1] else 0.0,
+        "trimmed_seconds": round((len(audio) - len(trimmed)) / SAMPLE_RATE, 2),
+        "speech_detected": True
+    })
+    return trimmed, report
+
+def compute_confidence(result: dict) -> float:
+    """
+    Confidence from Whisper's own segment scores: exp(avg_logprob) discounted by the
+    no-speech probability, averaged over segments weighted by their duration.
+    """
+    segments = result.get("segments") or []
+    if not segments:
+        return 0.0
+
+    weights = np.array([max(seg.get("end", 0.0) - seg.get("start", 0.0), 0.01) for seg in segments])
+    token_prob = np.exp(np.array([seg.get("avg_logprob", -10.0) for seg in segments]))
+    speech_prob = 1.0 - np.array([seg.get("no_speech_prob", 0.0) for seg in segments])
+    return round(float(np.sum(weights * np.clip(token_prob * speech_prob, 0.0, 1.0)) / np.sum(weights)), 3)
+
+def prepare_audio(audio_data: bytes) -> Tuple[np.ndarray, Optional[dict]]:
+    """Decode an upload and trim its silence; the report is None when VAD is disabled"""
+    audio = decode_audio(audio_data)
+    if not VAD_ENABLED:
+        return audio, None
+
+    trimmed, report = trim_silence(audio)
+    if report["speech_detected"]:
+        logger.info(f"VAD: kept {report['speech_seconds']}s of {report['original_seconds']}s")
+    else:
+        logger.info(f"VAD: no speech in {report['original_seconds']}s clip - skipping transcription")
+    return trimmed, report
+
+def transcribe_with_vad(model, audio: np.ndarray, language: Optional[str] = "en", **options) -> dict:
+    """Trim silence before decoding and skip the model entirely for clips with no speech"""
+    if not VAD_ENABLED:
+        return model.transcribe(audio, language=language, **options)
+
+    trimmed, report = trim_silence(audio)
+    if not report["speech_detected"]:
+        logger.info(f"VAD: no speech in {report['original_seconds']}s clip - skipping transcription")
+        return {"text": "", "language": language, "segments": [], "vad": report}
+
+    logger.info(f"VAD: kept {report['speech_seconds']}s of {report['original_seconds']}s")
+    result = model.transcribe(trimmed, language=language, **options)
+    result["vad"] = report
+    return result
+
+class WhisperEngine:
+    """Holds a Whisper model and runs transcriptions off the event loop"""
+
+    def __init__(self, model_name: str = "base", backend: Optional[str] = None):
+        self.model_name = model_name
+        self.backend = get_backend(backend)
+        self.model = None
+        # openai-whisper installs decoder hooks on the model per call, so calls are serialized
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self) -> bool:
+        """Load the Whisper model with error handling"""
+        if not self.backend.available():
+            logger.warning(f"Whisper backend '{self.backend.name}' not installed - transcription unavailable")
+            return False
+
+        try:
+            self.model = self.backend.load(self.model_name)
+            logger.info(f"✅ Whisper model '{self.model_name}' loaded on {self.backend.name} backend")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to load Whisper model '{self.model_name}' on {self.backend.name}: {e}")
+            return False
+
+    async def load_async(self) -> bool:
+        """Load the model on the engine thread so startup does not block the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.load)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = "en", **options) -> dict:
+        """Transcribe a decoded 16 kHz float32 buffer"""
+        if self.model is None:
+            raise RuntimeError("Whisper model not loaded")
+        return self.model.transcribe(audio, language=language, **options)
+
+    async def transcribe_async(self, audio: np.ndarray, language: Optional[str] = "en", **options) -> dict:
+        """Transcribe a decoded buffer on the engine thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self.transcribe, audio, language, **options))
+
+    def transcribe_bytes(self, audio_data: bytes, language: Optional[str] = "en", **options) -> dict:
+        """Decode uploaded audio bytes, trim silence and transcribe them"""
+        if self.model is None:
+            raise RuntimeError("Whisper model not loaded")
+        return transcribe_with_vad(self.model, decode_audio(audio_data), language=language, **options)
+
+    async def transcribe_bytes_async(self, audio_data: bytes, language: Optional[str] = "en", **options) -> dict:
+        """Decode and transcribe on the engine thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self.transcribe_bytes, audio_data, language, **options))
+
+    def shutdown(self):
+        """Stop the engine thread and release the model"""
+        self._executor.shutdown(wait=False)
+        self.model = None
+
+# ============================================================================
+# MODEL REGISTRY
+# ============================================================================
+
+class ModelRegistry:
+    """
+    Lazily loaded Whisper models kept resident under a RAM budget.
+    Concurrent requests for a model that is still loading share one load, and the
+    least recently used idle models are evicted to make room for new ones.
+    """
+
+    def __init__(self, default_model: str = "base", memory_budget_mb: int = 2048,
+                 backend: Optional[str] = None):
+        self.backend = get_backend(backend)
+        self.default_model = default_model.lower()
+        self.resolve(self.default_model)
+        self.memory_budget_mb = memory_budget_mb
+
+        self._engines = OrderedDict()  # model name -> WhisperEngine, least recently used first
+        self._loading = {}             # model name -> Future shared by concurrent callers
+        self._in_use = {}              # model name -> active request count
+        self._lock = asyncio.Lock()
+        self._reserved_mb = 0          # memory claimed by models that are still loading
+        self._loads = 0
+        self._evictions = 0
+
+    def resolve(self, model_name: Optional[str]) -> str:
+        """Validate a requested model name, falling back to the default"""
+        name = (model_name or self.default_model).lower()
+        if name not in MODEL_CATALOG:
+            raise ValueError(f"Unknown Whisper model '{name}' (choose from {', '.join(MODEL_CATALOG)})")
+        return name
+
+    def estimate_mb(self, model_name: str) -> int:
+        return int(MODEL_CATALOG[model_name]["memory_mb"] * self.backend.memory_factor)
+
+    @property
+    def resident_mb(self) -> int:
+        return sum(self.estimate_mb(name) for name in self._engines) + self._reserved_mb
+
+    def is_loaded(self, model_name: Optional[str] = None) -> bool:
+        return self.resolve(model_name) in self._engines
+
+    async def acquire(self, model_name: Optional[str] = None) -> WhisperEngine:
+        """Borrow a loaded engine; it cannot be evicted until released"""
+        name = self.resolve(model_name)
+        self._in_use[name] = self._in_use.get(name, 0) + 1
+        try:
+            return await self.get(name)
+        except BaseException:
+            self._in_use[name] -= 1
+            raise
+
+    def release(self, engine: WhisperEngine):
+        self._in_use[engine.model_name] -= 1
+
+    def in_flight(self, model_name: Optional[str] = None) -> int:
+        """Requests currently holding (or waiting on) a model, for one model or all"""
+        if model_name is not None:
+            return self._in_use.get(model_name, 0)
+        return sum(self._in_use.values())
+
+    @asynccontextmanager
+    async def use(self, model_name: Optional[str] = None):
+        """Borrow a loaded engine for the duration of a block"""
+        engine = await self.acquire(model_name)
+        try:
+            yield engine
+        finally:
+            self.release(engine)
+
+    async def get(self, model_name: Optional[str] = None) -> WhisperEngine:
+        """Return a loaded engine, loading it (once) if needed"""
+        name = self.resolve(model_name)
+
+        if name in self._engines:
+            self._engines.move_to_end(name)
+            return self._engines[name]
+
+        if name not in self._loading:
+            self._loading[name] = asyncio.ensure_future(self._load(name))
+        try:
+            return await asyncio.shield(self._loading[name])
+        finally:
+            if name in self._loading and self._loading[name].done():
+                del self._loading[name]
+
+    async def _load(self, name: str) -> WhisperEngine:
+        needed = self.estimate_mb(name)
+        if needed > self.memory_budget_mb:
+            raise MemoryError(f"Model '{name}' (~{needed} MB) exceeds the {self.memory_budget_mb} MB budget")
+
+        async with self._lock:
+            self._evict_for(needed)
+            self._reserved_mb += needed
+
+        try:
+            engine = WhisperEngine(name, backend=self.backend.name)
+            if not await engine.load_async():
+                engine.shutdown()
+                raise RuntimeError(f"Failed to load Whisper model '{name}'")
+        finally:
+            self._reserved_mb -= needed
+
+        self._engines[name] = engine
+        self._loads += 1
+        return engine
+
+    def _evict_for(self, needed_mb: int):
+        """Evict least recently used idle models until the new model fits"""
+        for name in list(self._engines):
+            if self.resident_mb + needed_mb <= self.memory_budget_mb:
+                break
+            if self._in_use.get(name, 0) > 0:
+                continue
+            logger.info(f"♻️ Evicting Whisper model '{name}' to free ~{self.estimate_mb(name)} MB")
+            self._engines.pop(name).shutdown()
+            self._evictions += 1
+        gc.collect()
+
+        if self.resident_mb + needed_mb > self.memory_budget_mb:
+            logger.warning(f"Memory budget exceeded while models are busy: "
+                           f"{self.resident_mb + needed_mb}/{self.memory_budget_mb} MB")
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "default_model": self.default_model,
+            "loaded_models": list(self._engines),
+            "loading_models": list(self._loading),
+            "resident_mb": self.resident_mb,
+            "memory_budget_mb": self.memory_budget_mb,
+            "loads": self._loads,
+            "evictions": self._evictions
+        }
+
+    def shutdown(self):
+        for engine in self._engines.values():
+            engine.shutdown()
+        self._engines.clear()
+
+# ============================================================================
+# STREAMING TRANSCRIPTION
+# ============================================================================
+
+def pcm16_to_float32(frame: bytes) -> np.ndarray:
+    """Convert raw little-endian int16 PCM bytes to float32 samples"""
+    usable = len(frame) - (len(frame) % 2)
+    return np.frombuffer(frame, dtype="<i2", count=usable // 2).astype(np.float32) / 32768.0
+
+class StreamingSession:
+    """
+    Sliding-window state for one live stream of 16 kHz PCM audio.
+    Tracks when a partial decode is due and detects end of speech from frame energy.
+    Decoding itself is done by the caller so it can run off the event loop.
+    """
+
+    FRAME_SAMPLES = SAMPLE_RATE * 30 // 1000  # 30 ms energy frames
+
+    def __init__(self, partial_interval: float = 1.0, window_seconds: float = 20.0,
+                 endpoint_silence: float = 0.7, max_seconds: float = 30.0,
+                 energy_threshold: float = 0.01):
+        self.partial_interval = int(partial_interval * SAMPLE_RATE)
+        self.window_samples = int(window_seconds * SAMPLE_RATE)
+        self.endpoint_samples = int(endpoint_silence * SAMPLE_RATE)
+        self.max_samples = int(max_seconds * SAMPLE_RATE)
+        self.energy_threshold = energy_threshold
+
+        self._chunks = []
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)  # samples not yet scored for energy
+        self.total_samples = 0
+        self.window_start = 0
+        self.committed_text = ""
+        self.last_partial = ""
+        self.language = None
+        self._previous_segments = []  # segment texts of the last decode of the current window
+        self._last_decode_at = 0
+        self._speech_started = False
+        self._trailing_silence = 0
+
+    @property
+    def audio(self) -> np.ndarray:
+        if self._chunks:
+            self._audio = np.concatenate([self._audio] + self._chunks)
+            self._chunks = []
+        return self._audio
+
+    @property
+    def seconds(self) -> float:
+        return self.total_samples / SAMPLE_RATE
+
+    def feed(self, samples: np.ndarray):
+        """Append samples and update speech/silence tracking"""
+        if len(samples) == 0:
+            return
+        self._chunks.append(samples)
+        self.total_samples += len(samples)
+
+        pending = np.concatenate([self._pending, samples])
+        n_frames = len(pending) // self.FRAME_SAMPLES
+        self._pending = pending[n_frames * self.FRAME_SAMPLES:]
+        if n_frames == 0:
+            return
+
+        frames = pending[:n_frames * self.FRAME_SAMPLES].reshape(n_frames, self.FRAME_SAMPLES)
+        voiced = np.sqrt(np.mean(frames * frames, axis=1)) > self.energy_threshold
+        if voiced.any():
+            self._speech_started = True
+            last_voiced = n_frames - 1 - int(np.argmax(voiced[::-1]))
+            self._trailing_silence = (n_frames - 1 - last_voiced) * self.FRAME_SAMPLES
+        elif self._speech_started:
+            self._trailing_silence += n_frames * self.FRAME_SAMPLES
+
+    def partial_due(self) -> bool:
+        """True once enough new speech has arrived since the last decode"""
+        return self._speech_started and self.total_samples - self._last_decode_at >= self.partial_interval
+
+    def endpoint_reason(self) -> Optional[str]:
+        """Return why the utterance is over, or None while the user is still speaking"""
+        if self.total_samples >= self.max_samples:
+            return "max_duration"
+        if self._speech_started and self._trailing_silence >= self.endpoint_samples:
+            return "endpoint"
+        return None
+
+    def window(self) -> np.ndarray:
+        """Audio that has not been committed to the transcript yet"""
+        self._last_decode_at = self.total_samples
+        return self.audio[self.window_start:]
+
+    def decode_options(self) -> dict:
+        """Greedy decode conditioned on the committed text for continuity"""
+        options = {"temperature": 0.0, "condition_on_previous_text": False}
+        if self.committed_text:
+            options["initial_prompt"] = self.committed_text[-200:]
+        return options
+
+    def apply_partial(self, result: dict) -> str:
+        """
+        Merge a window decode into the hypothesis. Leading segments that two decodes in a row
+        agree on are committed and the window slides past them, so later decodes (and the final
+        one) only cover the uncommitted tail. Once the window outgrows its limit, every segment
+        but the last is committed regardless.
+        """
+        segments = result.get("segments", [])
+        self.language = result.get("language") or self.language
+
+        settled = 0
+        while (settled < len(segments) - 1 and settled < len(self._previous_segments)
+               and self._words(segments[settled]["text"]) == self._words(self._previous_segments[settled])):
+            settled += 1
+        if self.total_samples - self.window_start > self.window_samples and len(segments) > 1:
+            settled = len(segments) - 1
+
+        if settled:
+            done, rest = segments[:settled], segments[settled:]
+            self.committed_text = self._join(self.committed_text, "".join(seg["text"] for seg in done))
+            self.window_start += int(done[-1]["end"] * SAMPLE_RATE)
+            tail = "".join(seg["text"] for seg in rest)
+        else:
+            rest = segments
+            tail = result.get("text", "")
+        self._previous_segments = [seg["text"] for seg in rest]
+
+        self.last_partial = self._join(self.committed_text, tail)
+        return self.last_partial
+
+    def finalize(self, result: dict) -> str:
+        """Combine the committed text with the final window decode"""
+        return self._join(self.committed_text, result.get("text", ""))
+
+    @staticmethod
+    def _join(prefix: str, text: str) -> str:
+        return f"{prefix.strip()} {text.strip()}".strip()
+
+    @staticmethod
+    def _words(text: str) -> list:
+        return text.lower().split()
+
+# ============================================================================
+# ADAPTIVE MODEL SELECTION
+# ============================================================================
+
+# Models from fastest to most accurate
+MODEL_LADDER = ["tiny", "base", "small", "medium", "large"]
+
+# Starting real-time factors (decode seconds per audio second) on CPU; refined from observed jobs
+DEFAULT_RTF = {"tiny": 0.05, "base": 0.1, "small": 0.3, "medium": 0.9, "large": 1.8}
+
+# Whisper's default temperature fallback schedule
+FULL_TEMPERATURE_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Approximate slowdown of beam search (beam 5) over greedy decoding
+BEAM_SEARCH_COST = 2.0
+
+class TranscriptionPolicy:
+    """
+    Chooses a model and decode settings per request from audio duration, queue depth and
+    the caller's latency budget. Short clips prefer a fast model and long dictation a more
+    accurate one; under load the choice steps down the ladder instead of letting the queue
+    grow, and beam search / temperature fallback are dropped when time is tight.
+    """
+
+    def __init__(self, short_model: str = "base", long_model: str = "small",
+                 long_clip_seconds: float = 8.0, max_queue: int = 4,
+                 default_budget_ms: int = 10000, allowed_models: Optional[list] = None,
+                 speed_factor: float = 1.0):
+        self.short_model = short_model
+        self.long_model = long_model
+        self.long_clip_seconds = long_clip_seconds
+        self.max_queue = max_queue
+        self.default_budget_ms = default_budget_ms
+        self.allowed_models = [m for m in MODEL_LADDER if allowed_models is None or m in allowed_models]
+        self._rtf = {name: rtf * speed_factor for name, rtf in DEFAULT_RTF.items()}
+        self._decisions = {}
+        self._downgrades = 0
+        self._budget_misses = 0
+        self._cascade_accepted = 0
+        self._cascade_redecoded = 0
+
+    def expected_ms(self, model_name: str, audio_seconds: float, queued: int) -> float:
+        """Rough completion time: our clip plus one clip's worth per job already on that model"""
+        return (queued + 1) * max(audio_seconds, 1.0) * self._rtf[model_name] * 1000
+
+    def decide(self, audio_seconds: float, queue_depth: int, queued_by_model: dict,
+               latency_budget_ms: Optional[int] = None, requested: Optional[str] = None) -> dict:
+        """Pick a model and decode options for one clip"""
+        budget = latency_budget_ms or self.default_budget_ms
+
+        if requested:
+            model_name, reason = requested, "requested"
+        else:
+            preferred = self.long_model if audio_seconds > self.long_clip_seconds else self.short_model
+            rung = self.allowed_models.index(preferred) if preferred in self.allowed_models else 0
+            reason = "long_clip" if audio_seconds > self.long_clip_seconds else "short_clip"
+
+            # Step down one rung per queued job beyond the limit, then until the budget fits
+            if queue_depth >= self.max_queue:
+                rung = max(0, rung - (queue_depth - self.max_queue + 1))
+                reason = "queue_pressure"
+            while rung > 0 and self.expected_ms(self.allowed_models[rung], audio_seconds,
+                                                queued_by_model.get(self.allowed_models[rung], 0)) > budget:
+                rung -= 1
+                reason = "latency_budget"
+            model_name = self.allowed_models[rung]
+            if model_name != preferred:
+                self._downgrades += 1
+
+        expected = self.expected_ms(model_name, audio_seconds, queued_by_model.get(model_name, 0))
+        relaxed = expected * BEAM_SEARCH_COST * 1.5 < budget and queue_depth < self.max_queue
+
+        # Beam search and temperature fallback cost several decodes; only spend that when there is slack
+        options = {
+            "beam_size": 5 if relaxed else 1,
+            "temperature": FULL_TEMPERATURE_FALLBACK if relaxed else (0.0,)
+        }
+        decision = {
+            "model": model_name,
+            "reason": reason,
+            "audio_seconds": round(audio_seconds, 2),
+            "queue_depth": queue_depth,
+            "latency_budget_ms": budget,
+            "expected_ms": round(expected),
+            "beam_size": options["beam_size"],
+            "temperature_fallback": relaxed
+        }
+        self._decisions[model_name] = self._decisions.get(model_name, 0) + 1
+        return {"decision": decision, "options": options}
+
+    def observe(self, model_name: str, audio_seconds: float, elapsed_seconds: float, beam_size: int = 1):
+        """Refine a model's real-time factor from an observed decode"""
+        observed = elapsed_seconds / max(audio_seconds, 1.0)
+        if beam_size > 1:
+            observed /= BEAM_SEARCH_COST
+        self._rtf[model_name] = 0.8 * self._rtf[model_name] + 0.2 * observed
+
+    def record(self, decision: dict, elapsed_seconds: float):
+        """Record the outcome of a decision"""
+        self.observe(decision["model"], decision["audio_seconds"], elapsed_seconds, decision["beam_size"])
+        if elapsed_seconds * 1000 > decision["latency_budget_ms"]:
+            self._budget_misses += 1
+
+    def record_cascade(self, redecoded: bool):
+        """Count whether a cascade first pass was accepted or re-decoded"""
+        if redecoded:
+            self._cascade_redecoded += 1
+        else:
+            self._cascade_accepted += 1
+
+    def stats(self) -> dict:
+        return {
+            "short_model": self.short_model,
+            "long_model": self.long_model,
+            "long_clip_seconds": self.long_clip_seconds,
+            "max_queue": self.max_queue,
+            "default_budget_ms": self.default_budget_ms,
+            "decisions_by_model": dict(self._decisions),
+            "downgrades": self._downgrades,
+            "budget_misses": self._budget_misses,
+            "cascade_accepted": self._cascade_accepted,
+            "cascade_redecoded": self._cascade_redecoded,
+            "real_time_factors": {name: round(rtf, 3) for name, rtf in self._rtf.items()}
+        }
+
+# ============================================================================
+# PROCESS POOL ENGINE
+# ============================================================================
+
+# Model held by each pool worker process
+_worker_model = None
+
+class QueueFullError(RuntimeError):
+    """Raised when the transcription queue is at capacity"""
+
+def _init_worker(model_name: str, backend_name: str, threads: int, reports=None):
+    """
+    Load a private Whisper model in a pool worker with a fixed inference thread count,
+    then report (pid, loaded) on the pool's reports queue
+    """
+    global _worker_model
+    logging.basicConfig(level=logging.INFO)
+    backend = get_backend(backend_name)
+
+    if not backend.available():
+        logger.warning(f"Worker {os.getpid()}: Whisper backend '{backend.name}' not installed")
+    else:
+        try:
+            _worker_model = backend.load(model_name, threads=threads)
+            logger.info(f"✅ Worker {os.getpid()} loaded Whisper model '{model_name}' on {backend.name} ({threads} threads)")
+        except Exception as e:
+            logger.error(f"❌ Worker {os.getpid()} failed to load Whisper model: {e}")
+
+    if reports is not None:
+        reports.put((os.getpid(), _worker_model is not None))
+
+def _worker_ping() -> bool:
+    """Report whether this worker has a model loaded"""
+    return _worker_model is not None
+
+def _worker_transcribe(audio_data: bytes, language: Optional[str]) -> dict:
+    """Decode and transcribe in a pool worker"""
+    if _worker_model is None:
+        raise RuntimeError("Whisper model not loaded in worker")
+    result = transcribe_with_vad(_worker_model, decode_audio(audio_data), language=language)
+    return {
+        "text": result["text"],
+        "language": result.get("language", language),
+        "segments": result.get("segments", []),
+        "vad": result.get("vad")
+    }
+
+# Longest to wait for the workers to load their models, and how often to try again after a failed warmup
+POOL_WARMUP_TIMEOUT = float(os.getenv("WHISPER_WARMUP_TIMEOUT", "300"))
+POOL_WARMUP_RETRY_SECONDS = float(os.getenv("WHISPER_WARMUP_RETRY_SECONDS", "30"))
+
+class TranscriptionPool:
+    """
+    Transcription engine backed by N worker processes, each holding its own model.
+    Jobs are fed through an async queue so the event loop never blocks on inference.
+    Every worker process reports from its initializer whether it loaded the model; the pool is
+    ready only once all N have. A failed warmup is retried on a later request.
+    """
+
+    def __init__(self, model_name: str = "base", workers: int = 2,
+                 torch_threads: Optional[int] = None, max_queue: int = 64,
+                 backend: Optional[str] = None):
+        self.model_name = model_name
+        self.backend = get_backend(backend)
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.max_queue = max_queue
+        self.ready = False
+
+        self._executor = None
+        self._reports = None
+        self._warmed_at = 0.0
+        self._rewarm = None
+        self._restart_lock = None
+        self._restarts = 0
+        self._queue = None
+        self._dispatchers = []
+        self._busy = 0
+        self._busy_seconds = 0.0
+        self._started_at = None
+        self._completed = 0
+        self._failed = 0
+        self._latencies = deque(maxlen=200)
+        self._queue_waits = deque(maxlen=200)
+
+    def _spawn(self) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context("spawn")
+        self._reports = context.Queue()
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.model_name, self.backend.name, self.torch_threads, self._reports)
+        )
+
+    def _collect_reports(self, reports) -> dict:
+        """pid -> loaded for each worker that finished its initializer within POOL_WARMUP_TIMEOUT"""
+        loaded = {}
+        deadline = time.monotonic() + POOL_WARMUP_TIMEOUT
+        while len(loaded) < self.workers:
+            try:
+                pid, ok = reports.get(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception:
+                break
+            loaded[pid] = ok
+        return loaded
+
+    async def _warmup(self) -> bool:
+        """Start all N worker processes and wait for each one's initializer report"""
+        loop = asyncio.get_running_loop()
+        self._warmed_at = time.monotonic()
+        # Each submit with no idle worker starts another process, so N pings bring up all N
+        pings = [loop.run_in_executor(self._executor, _worker_ping) for _ in range(self.workers)]
+        loaded = await loop.run_in_executor(None, self._collect_reports, self._reports)
+        await asyncio.gather(*pings, return_exceptions=True)
+        return len(loaded) == self.workers and all(loaded.values())
+
+    async def start(self):
+        """Spawn the worker processes, warm them up and start the dispatchers"""
+        self._executor = self._spawn()
+        self._restart_lock = asyncio.Lock()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._started_at = time.monotonic()
+
+        self.ready = await self._warmup()
+
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        logger.info(f"🎤 Transcription pool started: {self.workers} workers x {self.torch_threads} threads, model '{self.model_name}' on {self.backend.name}")
+
+    async def ensure_ready(self) -> bool:
+        """Whether the pool can take jobs; if its last warmup failed, warm a fresh pool (at most every POOL_WARMUP_RETRY_SECONDS)"""
+        if self.ready or self._executor is None or self._restart_lock.locked():
+            return self.ready
+        if time.monotonic() - self._warmed_at >= POOL_WARMUP_RETRY_SECONDS:
+            # Re-warm in the background; this request is turned away rather than held for a model load
+            self._warmed_at = time.monotonic()
+            self._rewarm = asyncio.create_task(self._restart(self._executor, "not every worker loaded its model"))
+        return self.ready
+
+    async def _restart(self, broken: ProcessPoolExecutor, reason: str = "a worker died"):
+        """Replace an executor that is broken or not warmed up; concurrent callers share one rebuild"""
+        async with self._restart_lock:
+            if self._executor is not broken:
+                return
+            self.ready = False
+            logger.error(f"❌ Restarting the transcription process pool: {reason}")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._spawn()
+            self._restarts += 1
+            self.ready = await self._warmup()
+            if self.ready:
+                logger.info("✅ Transcription pool restarted")
+            else:
+                logger.error("❌ Transcription pool restarted but not every worker loaded its model")
+
+    async def stop(self):
+        """Cancel dispatchers and shut the worker processes down"""
+        for task in self._dispatchers:
+            task.cancel()
+        self._dispatchers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.ready = False
+
+    async def transcribe(self, audio_data: bytes, language: Optional[str] = "en") -> dict:
+        """Queue a transcription job and wait for its result"""
+        if self._queue is None:
+            raise RuntimeError("Transcription pool is not started")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((audio_data, language, future, time.monotonic()))
+        except asyncio.QueueFull:
+            raise QueueFullError("Transcription queue is full")
+        return await future
+
+    async def _dispatch(self):
+        """Feed queued jobs to the process pool, one in flight per dispatcher"""
+        loop = asyncio.get_running_loop()
+        while True:
+            audio_data, language, future, enqueued_at = await self._queue.get()
+            started_at = time.monotonic()
+            self._queue_waits.append(started_at - enqueued_at)
+            self._busy += 1
+            executor = self._executor
+            try:
+                result = await loop.run_in_executor(executor, _worker_transcribe, audio_data, language)
+                self._completed += 1
+                if not future.done():
+                    future.set_result(result)
+            except BrokenProcessPool as e:
+                self._failed += 1
+                self.ready = False
+                if not future.done():
+                    future.set_exception(e)
+                await self._restart(executor)
+            except Exception as e:
+                self._failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                finished_at = time.monotonic()
+                self._busy -= 1
+                self._busy_seconds += finished_at - started_at
+                self._latencies.append(finished_at - enqueued_at)
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        """Queue depth, worker utilization and per-job latency for /health"""
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        latencies = sorted(self._latencies)
+
+        def percentile(values, pct):
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(len(values) * pct))] * 1000, 1)
+
+        return {
+            "model": self.model_name,
+            "backend": self.backend.name,
+            "workers": self.workers,
+            "torch_threads_per_worker": self.torch_threads,
+            "ready": self.ready,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "busy_workers": self._busy,
+            "utilization": round(self._busy / self.workers, 2),
+            "lifetime_utilization": round(self._busy_seconds / (uptime * self.workers), 3) if uptime else 0.0,
+            "jobs_completed": self._completed,
+            "jobs_failed": self._failed,
+            "restarts": self._restarts,
+            "latency_ms": {
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "avg_queue_wait": round(sum(self._queue_waits) / len(self._queue_waits) * 1000, 1) if self._queue_waits else None
+            }
+        }
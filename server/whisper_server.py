@@ -6,10 +6,15 @@ Provides speech-to-text conversion using OpenAI Whisper
 
 import os
 import json
+import time
+import asyncio
 import logging
-import tempfile
-import whisper
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from typing import Optional
+from whisper_engine import (
+    BACKENDS, MODEL_CATALOG, ModelRegistry, StreamingSession, TranscriptionPolicy,
+    SAMPLE_RATE, compute_confidence, pcm16_to_float32, prepare_audio
+)
+from fastapi import FastAPI, HTTPException, File, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -29,13 +34,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load Whisper model
-try:
-    model = whisper.load_model("base")
-    logger.info("Whisper model loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load Whisper model: {e}")
-    model = None
+# Streaming configuration
+STREAM_PARTIAL_INTERVAL = float(os.getenv("STREAM_PARTIAL_INTERVAL", "1.0"))
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "20"))
+STREAM_ENDPOINT_SILENCE = float(os.getenv("STREAM_ENDPOINT_SILENCE", "0.7"))
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "30"))
+STREAM_ENERGY_THRESHOLD = float(os.getenv("STREAM_ENERGY_THRESHOLD", "0.01"))
+
+# Model registry configuration
+WHISPER_DEFAULT_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "2048"))
+
+# Whisper models are loaded on demand on the configured backend (WHISPER_BACKEND=pytorch|ctranslate2)
+registry = ModelRegistry(
+    default_model=WHISPER_DEFAULT_MODEL,
+    memory_budget_mb=WHISPER_MEMORY_BUDGET_MB,
+    backend=os.getenv("WHISPER_BACKEND")
+)
+
+# Adaptive model selection by clip length, queue pressure and latency budget
+policy = TranscriptionPolicy(
+    short_model=os.getenv("WHISPER_SHORT_MODEL", WHISPER_DEFAULT_MODEL),
+    long_model=os.getenv("WHISPER_LONG_MODEL", "small"),
+    long_clip_seconds=float(os.getenv("WHISPER_LONG_CLIP_SECONDS", "8")),
+    max_queue=int(os.getenv("WHISPER_POLICY_MAX_QUEUE", "4")),
+    default_budget_ms=int(os.getenv("WHISPER_LATENCY_BUDGET_MS", "10000")),
+    allowed_models=[name for name in MODEL_CATALOG if registry.estimate_mb(name) <= WHISPER_MEMORY_BUDGET_MB],
+    speed_factor=registry.backend.speed_factor
+)
+
+# Cascaded decoding: accept the first-pass model's transcript when its confidence clears the threshold
+CASCADE_ENABLED = os.getenv("WHISPER_CASCADE", "true").lower() == "true"
+CASCADE_FIRST_MODEL = os.getenv("WHISPER_CASCADE_FIRST_MODEL", "tiny")
+CASCADE_THRESHOLD = float(os.getenv("WHISPER_CASCADE_THRESHOLD", "0.6"))
+
+@app.on_event("startup")
+async def startup_event():
+    """Preload the default model so the first request does not pay for it"""
+    try:
+        await registry.get()
+        logger.info(f"Whisper model '{registry.default_model}' loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load Whisper model: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release loaded models"""
+    registry.shutdown()
 
 @app.get("/health")
 async def health_check():
@@ -43,48 +88,112 @@ async def health_check():
     return {
         "status": "Whisper Server is running", 
         "service": "whisper",
-        "model_loaded": model is not None
+        "model_loaded": registry.is_loaded(),
+        "backend": registry.backend.name,
+        "models": registry.stats(),
+        "policy": policy.stats()
     }
 
 @app.post("/whisper/transcribe")
-async def transcribe_audio(file: UploadFile = File(...)):
-    """Transcribe audio file to text"""
+async def transcribe_audio(file: UploadFile = File(...), model: Optional[str] = None,
+                           latency_budget_ms: Optional[int] = None):
+    """
+    Transcribe audio file to text.
+    Pass ?model=tiny|base|small|medium|large to pin a model; otherwise the policy picks one
+    from the clip length, current load and ?latency_budget_ms.
+    """
     try:
-        if model is None:
-            raise HTTPException(status_code=500, detail="Whisper model not loaded")
-        
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            audio_path = temp_file.name
+        requested = registry.resolve(model) if model else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        content = await file.read()
         logger.info(f"Transcribing audio file: {file.filename}, size: {len(content)} bytes")
 
-        # Transcribe with Whisper
-        result = model.transcribe(audio_path, fp16=False)
+        # Decode (PCM WAV fast path or ffmpeg) and trim silence off the event loop
+        loop = asyncio.get_running_loop()
+        audio, vad = await loop.run_in_executor(None, prepare_audio, content)
+        if vad is not None and not vad["speech_detected"]:
+            return {
+                "status": "no_speech",
+                "text": "",
+                "language": "unknown",
+                "confidence": 0.0,
+                "model": None,
+                "vad": vad
+            }
+
+        audio_seconds = len(audio) / SAMPLE_RATE
+        started = time.monotonic()
+        cascade = None
+
+        # Cascade: a cheap greedy pass first, re-decoded only when Whisper is unsure of it
+        if requested is None and CASCADE_ENABLED and CASCADE_FIRST_MODEL in policy.allowed_models:
+            async with registry.use(CASCADE_FIRST_MODEL) as engine:
+                result = await engine.transcribe_async(audio, language=None, beam_size=1, temperature=(0.0,))
+            first_elapsed = time.monotonic() - started
+            policy.observe(CASCADE_FIRST_MODEL, audio_seconds, first_elapsed)
+            confidence = compute_confidence(result)
+            cascade = {
+                "first_model": CASCADE_FIRST_MODEL,
+                "first_confidence": confidence,
+                "threshold": CASCADE_THRESHOLD,
+                "redecoded": False
+            }
+            decision = {
+                "model": CASCADE_FIRST_MODEL,
+                "reason": "cascade_first_pass",
+                "audio_seconds": round(audio_seconds, 2),
+                "beam_size": 1
+            }
+
+        if cascade is None or confidence < CASCADE_THRESHOLD:
+            budget_ms = latency_budget_ms or policy.default_budget_ms
+            if cascade is not None:
+                budget_ms = max(round(budget_ms - first_elapsed * 1000), 1)
+            plan = policy.decide(
+                audio_seconds=audio_seconds,
+                queue_depth=registry.in_flight(),
+                queued_by_model={name: registry.in_flight(name) for name in MODEL_CATALOG},
+                latency_budget_ms=budget_ms,
+                requested=requested
+            )
+            if cascade is None or plan["decision"]["model"] != CASCADE_FIRST_MODEL:
+                decision = plan["decision"]
+                logger.info(f"Policy chose '{decision['model']}' ({decision['reason']}) for {decision['audio_seconds']}s clip")
+
+                decode_started = time.monotonic()
+                async with registry.use(decision["model"]) as engine:
+                    result = await engine.transcribe_async(audio, language=None, **plan["options"])
+                policy.record(decision, time.monotonic() - decode_started)
+                confidence = compute_confidence(result)
+                if cascade is not None:
+                    cascade["redecoded"] = True
+
+        if cascade is not None:
+            policy.record_cascade(cascade["redecoded"])
+        elapsed = time.monotonic() - started
+
         text = result["text"].strip()
         
-        # Clean up temp file
-        os.unlink(audio_path)
-        
-        logger.info(f"Transcription result: '{text}'")
+        logger.info(f"Transcription result: '{text}' ({decision['model']}, confidence {confidence}) in {elapsed * 1000:.0f} ms")
         
         return {
             "status": "success",
             "text": text,
-            "language": result.get("language", "unknown"),
-            "confidence": 0.95  # Mock confidence score
+            "language": result.get("language") or "unknown",
+            "confidence": confidence,
+            "model": decision["model"],
+            "policy": dict(decision, actual_ms=round(elapsed * 1000)),
+            "cascade": cascade,
+            "vad": vad
         }
         
+    except MemoryError as e:
+        raise HTTPException(status_code=507, detail=str(e))
     except Exception as e:
         logger.error(f"Error transcribing audio: {e}")
-        # Clean up temp file if it exists
-        try:
-            if 'audio_path' in locals():
-                os.unlink(audio_path)
-        except:
-            pass
         raise HTTPException(status_code=500, detail=f"Failed to transcribe audio: {str(e)}")
 
 @app.post("/transcribe")
@@ -93,38 +202,139 @@ async def transcribe_audio_simple(audio: UploadFile = File(...)):
     return await transcribe_audio(audio)
 
 @app.post("/whisper/transcribe-streaming")
-async def transcribe_streaming(file: UploadFile = File(...)):
+async def transcribe_streaming(file: UploadFile = File(...), model: Optional[str] = None):
     """Transcribe audio with streaming/real-time processing"""
     try:
-        if model is None:
-            raise HTTPException(status_code=500, detail="Whisper model not loaded")
-        
-        # For now, use same logic as regular transcribe
-        # In real implementation, this would handle streaming
-        return await transcribe_audio(file)
+        # Whole-upload transcription; live streaming uses the WebSocket route on this path
+        return await transcribe_audio(file, model)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in streaming transcription: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to stream transcribe: {str(e)}")
 
+@app.websocket("/whisper/transcribe-streaming")
+async def transcribe_streaming_ws(websocket: WebSocket):
+    """
+    Live transcription over WebSocket.
+    Client sends binary frames of 16 kHz mono int16 PCM while the user speaks, and may
+    send {"event": "end"} to finish early. Server replies with {"type": "partial"} messages
+    and one {"type": "final"} message once end of speech is detected.
+    """
+    await websocket.accept()
+
+    try:
+        engine = await registry.acquire(websocket.query_params.get("model"))
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": f"Whisper model not available: {e}"})
+        await websocket.close()
+        return
+
+    session = StreamingSession(
+        partial_interval=STREAM_PARTIAL_INTERVAL,
+        window_seconds=STREAM_WINDOW_SECONDS,
+        endpoint_silence=STREAM_ENDPOINT_SILENCE,
+        max_seconds=STREAM_MAX_SECONDS,
+        energy_threshold=STREAM_ENERGY_THRESHOLD
+    )
+    reason = None
+    partial_task = None
+
+    async def decode_partial(window, options: dict, window_start: int):
+        """Decode a window off the receive loop; results for a window that has since moved are dropped"""
+        try:
+            result = await engine.transcribe_async(window, **options)
+        except Exception as e:
+            logger.warning(f"Partial streaming decode failed: {e}")
+            return
+        if session.window_start != window_start:
+            return
+        text = session.apply_partial(result)
+        # Once the utterance has ended only the committed prefix matters, the final message follows
+        if reason is None:
+            await websocket.send_json({
+                "type": "partial",
+                "text": text,
+                "audio_seconds": round(session.seconds, 2)
+            })
+
+    try:
+        while reason is None:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes"):
+                session.feed(pcm16_to_float32(message["bytes"]))
+            elif message.get("text"):
+                if json.loads(message["text"]).get("event") == "end":
+                    reason = "client_end"
+                    break
+
+            reason = session.endpoint_reason()
+            # One partial decode at a time; frames keep arriving while it runs
+            if reason is None and session.partial_due() and (partial_task is None or partial_task.done()):
+                partial_task = asyncio.create_task(
+                    decode_partial(session.window(), session.decode_options(), session.window_start)
+                )
+
+        # The engine runs decodes in order, so let an in-flight partial finish and commit what it settled,
+        # then decode only the uncommitted tail
+        if partial_task is not None:
+            await partial_task
+        window = session.window()
+        result = await engine.transcribe_async(window, **session.decode_options()) if len(window) else {"text": ""}
+        text = session.finalize(result)
+        logger.info(f"Streaming transcription ({reason}, {session.seconds:.1f}s): '{text}'")
+
+        await websocket.send_json({
+            "type": "final",
+            "text": text,
+            "reason": reason,
+            "language": result.get("language") or session.language or "unknown",
+            "audio_seconds": round(session.seconds, 2)
+        })
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.info("Streaming client disconnected")
+    except Exception as e:
+        logger.error(f"Error in streaming transcription: {e}")
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        if partial_task is not None and not partial_task.done():
+            partial_task.cancel()
+        registry.release(engine)
+
 @app.get("/whisper/models")
 async def get_available_models():
     """Get available Whisper models"""
     try:
+        loaded = registry.stats()["loaded_models"]
         models = [
-            {"name": "tiny", "size": "~39 MB", "accuracy": "low", "speed": "fast"},
-            {"name": "base", "size": "~74 MB", "accuracy": "medium", "speed": "medium"},
-            {"name": "small", "size": "~244 MB", "accuracy": "good", "speed": "medium"},
-            {"name": "medium", "size": "~769 MB", "accuracy": "better", "speed": "slow"},
-            {"name": "large", "size": "~1550 MB", "accuracy": "best", "speed": "slowest"}
+            {
+                "name": name,
+                "size": info["size"],
+                "accuracy": info["accuracy"],
+                "speed": info["speed"],
+                "memory_mb": registry.estimate_mb(name),
+                "loaded": name in loaded
+            }
+            for name, info in MODEL_CATALOG.items()
         ]
         
-        current_model = "base" if model is not None else None
-        
         return {
             "available_models": models,
-            "current_model": current_model,
-            "model_loaded": model is not None
+            "current_model": registry.default_model if registry.is_loaded() else None,
+            "model_loaded": registry.is_loaded(),
+            "backend": registry.backend.name,
+            "available_backends": [backend.info() for backend in BACKENDS.values()],
+            "registry": registry.stats()
         }
     except Exception as e:
         logger.error(f"Error fetching models: {e}")
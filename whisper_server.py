@@ -4,20 +4,23 @@ Provides speech-to-text transcription service on port 5004
 """
 
 import os
+import sys
 import logging
-import tempfile
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 
+# Shared audio decoding lives alongside the other services in server/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server"))
+
 # Try to import whisper with error handling
 try:
-    import whisper
-    WHISPER_AVAILABLE = True
+    from whisper_engine import TranscriptionPool, QueueFullError, compute_confidence, get_backend
+    WHISPER_AVAILABLE = get_backend().available()
 except ImportError:
     WHISPER_AVAILABLE = False
-    logging.warning("Whisper not available - using mock responses")
+    logging.warning("Whisper not available - transcription requests will be rejected")
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -34,28 +37,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global whisper model
-model = None
+# Transcription engine configuration
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "pytorch")
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "2"))
+WHISPER_TORCH_THREADS = int(os.getenv("WHISPER_TORCH_THREADS", "0")) or None
+WHISPER_MAX_QUEUE = int(os.getenv("WHISPER_MAX_QUEUE", "64"))
+
+# Global transcription pool (one Whisper model per worker process)
+pool = None
 
-def load_whisper_model():
-    """Load Whisper model with error handling"""
-    global model
+async def start_transcription_pool():
+    """Start the worker pool with error handling"""
+    global pool
     if not WHISPER_AVAILABLE:
-        logger.warning("Whisper not installed - transcription will return mock responses")
+        logger.warning("Whisper not installed - transcription requests will return 503")
         return False
         
     try:
-        model = whisper.load_model("base")
-        logger.info("✅ Whisper model loaded successfully")
-        return True
+        pool = TranscriptionPool(
+            model_name=WHISPER_MODEL,
+            workers=WHISPER_WORKERS,
+            torch_threads=WHISPER_TORCH_THREADS,
+            max_queue=WHISPER_MAX_QUEUE,
+            backend=WHISPER_BACKEND
+        )
+        await pool.start()
+        if not pool.ready:
+            logger.error("❌ Transcription workers started but no Whisper model loaded")
+        return pool.ready
     except Exception as e:
-        logger.error(f"❌ Failed to load Whisper model: {e}")
+        logger.error(f"❌ Failed to start transcription pool: {e}")
+        pool = None
         return False
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize Whisper model on startup"""
-    load_whisper_model()
+    """Start the transcription worker pool on startup"""
+    await start_transcription_pool()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the transcription worker pool"""
+    if pool is not None:
+        await pool.stop()
 
 @app.post("/transcribe")
 async def transcribe_audio(audio: UploadFile = File(...)):
@@ -63,8 +88,6 @@ async def transcribe_audio(audio: UploadFile = File(...)):
     Transcribe audio file to text
     Accepts audio file uploads and returns transcribed text
     """
-    temp_file_path = None
-    
     try:
         # Validate file type
         if not audio.content_type or not audio.content_type.startswith('audio/'):
@@ -78,50 +101,42 @@ async def transcribe_audio(audio: UploadFile = File(...)):
         if len(audio_data) == 0:
             raise HTTPException(status_code=400, detail="Empty audio file")
         
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            temp_file.write(audio_data)
-            temp_file_path = temp_file.name
-        
-        logger.info(f"Audio saved to: {temp_file_path}")
-        
         # Transcribe with Whisper
-        if model is not None and WHISPER_AVAILABLE:
+        if pool is not None and await pool.ensure_ready():
             try:
-                result = model.transcribe(temp_file_path, language="en")
+                # Decoding and inference run in a worker process; 16 kHz PCM WAV skips ffmpeg
+                result = await pool.transcribe(audio_data, language="en")
                 transcription = result["text"].strip()
+                vad = result.get("vad") or {}
                 logger.info(f"🎤 Transcribed: '{transcription}'")
                 
                 return JSONResponse({
                     "text": transcription,
-                    "status": "success",
-                    "language": "en"
+                    "status": "success" if vad.get("speech_detected", True) else "no_speech",
+                    "language": "en",
+                    "confidence": compute_confidence(result),
+                    "vad": result.get("vad")
                 })
                 
+            except QueueFullError:
+                logger.warning("Transcription queue full - rejecting request")
+                raise HTTPException(status_code=503, detail="Transcription queue is full, retry shortly")
             except Exception as whisper_error:
                 logger.error(f"Whisper transcription error: {whisper_error}")
-                # Fall through to mock response
+                if not pool.ready:
+                    # A worker died and the pool is being rebuilt
+                    raise HTTPException(status_code=503, detail="Transcription workers are restarting, retry shortly")
+                raise
         
-        # Mock response if Whisper not available
-        logger.warning("Using mock transcription - Whisper not available")
-        return JSONResponse({
-            "text": "test voice command",
-            "status": "mock",
-            "message": "Whisper not available - using mock response"
-        })
+        # No usable model: tell the caller instead of inventing a transcript
+        logger.warning("Rejecting transcription - Whisper model not loaded")
+        raise HTTPException(status_code=503, detail="Whisper model not available")
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Transcription error: {e}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
-    
-    finally:
-        # Clean up temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-                logger.info("Temporary file cleaned up")
-            except Exception as cleanup_error:
-                logger.warning(f"Could not clean up temp file: {cleanup_error}")
 
 @app.get("/health")
 async def health_check():
@@ -131,7 +146,9 @@ async def health_check():
         "service": "whisper-server",
         "port": 5004,
         "whisper_available": WHISPER_AVAILABLE,
-        "model_loaded": model is not None
+        "model_loaded": pool is not None and pool.ready,
+        "backend": WHISPER_BACKEND,
+        "engine": pool.stats() if pool is not None else None
     }
 
 @app.get("/")